@@ -0,0 +1,218 @@
+"""
+Memoized reads of read-only adsk collections, for the length of a transaction.
+
+Walking the data panel reads the same collections again and again:
+generate_json.sync_dict asks every folder for `dataFiles.count` and then for
+each `dataFiles.item(i)`, and asks again when it recurses into the folder;
+find_version reads `dataFile.versions`; the fdocs fgen reads
+`fdoc.documentReferences`. Each of these reads can be a round trip to the
+server. Inside a transaction, each collection is read once: the first access
+takes a snapshot, and later `count`, `item` and `itemByName` calls are served
+from it:
+
+    with adsk_proxy.transaction() as tx:
+        folder_dict = generate_json.sync_dict({}, root_folder)
+    print(tx.stats())
+
+Outside a transaction the helpers return the live collection, so code using
+them behaves as before. The changes AIDE makes itself invalidate the
+snapshots they affect: adding a folder through a snapshot of dataFolders drops
+that snapshot, and a save into a folder, through saved(), drops the folder's
+dataFiles and every versions snapshot. Changes made by anyone else aren't
+seen until the transaction ends, so keep transactions to a single pass over
+the data panel.
+
+Transactions aren't shared between threads; like the rest of the Fusion API,
+they are meant for the main thread.
+"""
+
+import contextlib
+
+_transaction = None
+
+
+class CollectionSnapshot:
+    """A read-only collection whose reads are remembered by its Transaction.
+
+    Items are read on first use, one index (or name) at a time, so asking for
+    the first few items doesn't read the whole collection.
+    """
+
+    __slots__ = ("_tx", "_key", "_remote", "_count", "_items", "_by_name")
+
+    def __init__(self, tx, key, remote):
+        self._tx = tx
+        self._key = key
+        self._remote = remote
+        self._count = None
+        self._items = {}
+        self._by_name = {}
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._tx.remote_reads += 1
+            self._count = self._remote.count
+        else:
+            self._tx.reads_avoided += 1
+        return self._count
+
+    def item(self, index):
+        if index in self._items:
+            self._tx.reads_avoided += 1
+            return self._items[index]
+        self._tx.remote_reads += 1
+        item = self._items[index] = self._remote.item(index)
+        return item
+
+    def itemByName(self, name):
+        if name in self._by_name:
+            self._tx.reads_avoided += 1
+            return self._by_name[name]
+        self._tx.remote_reads += 1
+        item = self._by_name[name] = self._remote.itemByName(name)
+        return item
+
+    def add(self, *args):
+        """Add to the live collection, such as dataFolders.add(name), and drop this snapshot."""
+        self._tx.invalidate_key(self._key)
+        self._count = None
+        self._items.clear()
+        self._by_name.clear()
+        return self._remote.add(*args)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.item(i)
+
+
+class Transaction:
+    """The snapshots taken since the transaction began. Made by transaction.
+
+    Attributes
+    ----------
+    remote_reads : int
+        Reads that went to the live collections, counting the read of the
+        collection itself.
+    reads_avoided : int
+        Reads served from a snapshot.
+    invalidations : int
+        Snapshots dropped because AIDE changed what they held.
+    """
+
+    def __init__(self):
+        # {(owner key, attribute): (owner, CollectionSnapshot)}. The owner is kept so its id() stays unique.
+        self._snapshots = {}
+        self.remote_reads = 0
+        self.reads_avoided = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def stats(self):
+        return {"snapshots": len(self._snapshots), "remote_reads": self.remote_reads,
+                "reads_avoided": self.reads_avoided, "invalidations": self.invalidations}
+
+    def collection(self, owner, attribute):
+        """The snapshot of owner.attribute, reading the collection on first use."""
+        key = (_owner_key(owner), attribute)
+        known = self._snapshots.get(key)
+        if known is not None:
+            self.reads_avoided += 1
+            return known[1]
+        self.remote_reads += 1
+        snapshot = CollectionSnapshot(self, key, getattr(owner, attribute))
+        self._snapshots[key] = (owner, snapshot)
+        return snapshot
+
+    def data_files(self, folder):
+        return self.collection(folder, "dataFiles")
+
+    def data_folders(self, folder):
+        return self.collection(folder, "dataFolders")
+
+    def versions(self, data_file):
+        return self.collection(data_file, "versions")
+
+    def document_references(self, fdoc):
+        return self.collection(fdoc, "documentReferences")
+
+    def invalidate(self, owner, attribute=None):
+        """Drop the snapshot of owner.attribute, or of every collection of owner."""
+        owner_key = _owner_key(owner)
+        for key in [k for k in self._snapshots if k[0] == owner_key and attribute in (None, k[1])]:
+            self.invalidate_key(key)
+
+    def invalidate_key(self, key):
+        if self._snapshots.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def saved(self, folder):
+        """Drop what a save into folder changes: its dataFiles, and the versions of any file."""
+        self.invalidate(folder, "dataFiles")
+        for key in [k for k in self._snapshots if k[1] == "versions"]:
+            self.invalidate_key(key)
+
+
+def _owner_key(owner):
+    # dataFolders and dataFiles have an id that stays the same across the
+    # wrappers the API hands out for them. Anything else is keyed by identity.
+    owner_id = getattr(owner, "id", None)
+    return owner_id if isinstance(owner_id, str) else id(owner)
+
+
+def current():
+    """The running Transaction, or None."""
+    return _transaction
+
+
+@contextlib.contextmanager
+def transaction():
+    """Memoize the collection reads made in the block. Yields the Transaction.
+
+    A transaction started inside another one joins it.
+    """
+    global _transaction
+    if _transaction is not None:
+        yield _transaction
+        return
+    tx = _transaction = Transaction()
+    try:
+        yield tx
+    finally:
+        _transaction = None
+
+
+def data_files(folder):
+    """folder.dataFiles, from a snapshot when in a transaction."""
+    tx = _transaction
+    return folder.dataFiles if tx is None else tx.data_files(folder)
+
+
+def data_folders(folder):
+    """folder.dataFolders, from a snapshot when in a transaction."""
+    tx = _transaction
+    return folder.dataFolders if tx is None else tx.data_folders(folder)
+
+
+def versions(data_file):
+    """data_file.versions, from a snapshot when in a transaction."""
+    tx = _transaction
+    return data_file.versions if tx is None else tx.versions(data_file)
+
+
+def document_references(fdoc):
+    """fdoc.documentReferences, from a snapshot when in a transaction."""
+    tx = _transaction
+    return fdoc.documentReferences if tx is None else tx.document_references(fdoc)
+
+
+def saved(folder):
+    """Tell the running transaction, if any, that a document was saved into folder."""
+    tx = _transaction
+    if tx is not None:
+        tx.saved(folder)
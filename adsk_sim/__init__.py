@@ -0,0 +1,171 @@
+"""
+An in-process stand-in for the subset of the Fusion 360 `adsk` API that AIDE
+uses. It lets the draw, sync and lookup code run on a plain Python install so
+that we can measure and regression test it outside of a live Fusion session.
+
+Usage:
+
+    import adsk_sim
+    backend = adsk_sim.install(adsk_sim.CloudLatency(server=0.3))
+    adsk_sim.make_tree(backend.root_folder, {"cube:fdoc": {"parameters": {"width": "1 in"}}})
+
+    import aide_draw   # now imports adsk_sim as adsk
+    ...
+    print(backend.report())
+
+`install` registers this package as `adsk` (plus `adsk.core`, `adsk.fusion`
+and `adsk.cam`) in `sys.modules`. Every simulated call is counted in
+`backend.calls` and charged against a pluggable latency model. By default the
+latency only advances a virtual clock (`backend.clock`), so that a run that
+would take an hour in Fusion takes seconds here. Pass `realtime=True` to
+actually sleep instead.
+"""
+
+import sys
+import time
+import collections
+
+from .latency import LatencyModel, ZeroLatency, FixedLatency, CloudLatency, JitterLatency, \
+    SERVER_CALLS, COMPUTE_CALLS, UPLOAD, DO_EVENTS
+from . import core, fusion, cam
+
+_backend = None
+
+
+class Backend:
+    """Holds the state of one simulated Fusion session.
+
+    Attributes
+    ----------
+    latency : LatencyModel
+        Decides how long each call takes.
+    calls : collections.Counter
+        Number of times each simulated call was made, keyed by call name.
+    clock : float
+        Simulated seconds spent so far.
+    app : adsk_sim.core.Application
+        The application returned by `adsk.core.Application.get()`.
+    """
+
+    def __init__(self, latency=None, realtime=False):
+        self.latency = latency if latency is not None else ZeroLatency()
+        self.realtime = realtime
+        self.calls = collections.Counter()
+        self.clock = 0.0
+        self._next_id = 0
+        self.app = core.Application(self)
+
+    @property
+    def root_folder(self):
+        return self.app.data.activeProject.rootFolder
+
+    def call(self, name):
+        """Count a call to `name` and charge its latency."""
+        self.calls[name] += 1
+        self.advance(self.latency.delay(name))
+
+    def advance(self, seconds):
+        if seconds:
+            self.clock += seconds
+            if self.realtime:
+                time.sleep(seconds)
+
+    def now(self):
+        return self.clock
+
+    def new_id(self, prefix):
+        self._next_id += 1
+        return "urn:adsk.sim:{}:{}".format(prefix, self._next_id)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def server_calls(self):
+        return sum(n for name, n in self.calls.items() if self.latency.is_server_call(name))
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.clock = 0.0
+
+    def report(self):
+        """Return a human readable table of all the calls made so far."""
+        lines = ["{:<40} {:>8}".format("call", "count")]
+        for name, n in sorted(self.calls.items(), key=lambda item: (-item[1], item[0])):
+            lines.append("{:<40} {:>8}".format(name, n))
+        lines.append("{:<40} {:>8}".format("total", self.total_calls))
+        lines.append("{:<40} {:>8}".format("server calls", self.server_calls))
+        lines.append("{:<40} {:>8.2f}".format("simulated seconds", self.clock))
+        return "\n".join(lines)
+
+
+def backend():
+    """Return the currently installed backend, installing one if needed."""
+    if _backend is None:
+        install()
+    return _backend
+
+
+def install(latency=None, realtime=False):
+    """Register the simulator as the `adsk` package and return a fresh Backend.
+
+    Calling this again throws away the previous session, so each test or
+    benchmark can start from an empty project.
+    """
+    global _backend
+    _backend = Backend(latency, realtime)
+    module = sys.modules[__name__]
+    sys.modules["adsk"] = module
+    sys.modules["adsk.core"] = core
+    sys.modules["adsk.fusion"] = fusion
+    sys.modules["adsk.cam"] = cam
+    return _backend
+
+
+def doEvents():
+    """Let the simulated Fusion process queued events, such as finished uploads."""
+    b = backend()
+    b.call("doEvents")
+    b.app._process_events()
+
+
+def make_file(folder, name, parameters=None, references=None, features=None):
+    """Create a dataFile directly on the simulated server, without any call cost.
+
+    Parameters
+    ----------
+    folder : DataFolder
+        The folder the file is created in.
+    name : str
+        The name of the file.
+    parameters : {str: str}, optional
+        User parameter names and expressions of the stored design.
+    references : list of DataFile, optional
+        Files this design links to. They show up as documentReferences.
+    features : list of str, optional
+        Names of features that exist in the root component.
+    """
+    return folder._add_file(name, core._Snapshot(parameters, references, features))
+
+
+def make_tree(folder, tree):
+    """Populate `folder` from an AIDE-style dictionary.
+
+    Keys of the form "name:folder" become dataFolders and keys of the form
+    "name:fdoc" become dataFiles whose "parameters" become user parameters.
+    Returns the folder.
+    """
+    for key, value in tree.items():
+        name, _, key_type = key.partition(":")
+        if key_type == "folder":
+            child = folder._add_folder(name)
+            make_tree(child, value)
+        elif key_type == "fdoc":
+            make_file(folder, name, value.get("parameters"), features=value.get("features"))
+    return folder
+
+
+__all__ = ["Backend", "backend", "install", "doEvents", "make_file", "make_tree",
+           "LatencyModel", "ZeroLatency", "FixedLatency", "CloudLatency", "JitterLatency",
+           "SERVER_CALLS", "COMPUTE_CALLS", "UPLOAD", "DO_EVENTS"]
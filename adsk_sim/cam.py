@@ -0,0 +1,4 @@
+"""
+Simulated `adsk.cam`. AIDE imports it alongside core and fusion but doesn't
+use anything from it.
+"""
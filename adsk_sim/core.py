@@ -0,0 +1,693 @@
+"""
+Simulated `adsk.core`: the application, the data panel (projects, folders and
+files), documents, import options, the user interface and value helpers.
+"""
+
+import os
+import collections
+
+
+class Base:
+    """Common behaviour of all simulated API objects."""
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @classmethod
+    def classType(cls):
+        return "adsk::{}".format(cls.__name__)
+
+    @property
+    def objectType(self):
+        return self.classType()
+
+    @property
+    def isValid(self):
+        return True
+
+
+class _Collection(Base):
+    """A read-only API collection backed by a python list.
+
+    Every access is charged to the backend as `<Name>.count`, `<Name>.item`
+    and so on, where the name is the class name of the collection.
+    """
+
+    def __init__(self, backend, items):
+        self._b = backend
+        self._items = items
+
+    def _call(self, what):
+        self._b.call("{}.{}".format(type(self).__name__, what))
+
+    @property
+    def count(self):
+        self._call("count")
+        return len(self._items)
+
+    def item(self, index):
+        self._call("item")
+        if 0 <= index < len(self._items):
+            return self._items[index]
+        return None
+
+    def itemByName(self, name):
+        self._call("itemByName")
+        for obj in self._items:
+            if obj.name == name:
+                return obj
+        return None
+
+    def itemById(self, object_id):
+        self._call("itemById")
+        for obj in self._items:
+            if obj.id == object_id:
+                return obj
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index >= len(self._items):
+            raise IndexError(index)
+        return self.item(index)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.item(i)
+
+
+########################## Events ##########################################
+
+class Event(Base):
+    """An event that handlers can be added to."""
+
+    def __init__(self):
+        self._handlers = []
+
+    def add(self, handler):
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class EventHandler(Base):
+    def notify(self, args):
+        raise NotImplementedError
+
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class DataEventHandler(EventHandler):
+    pass
+
+
+class EventArgs(Base):
+    pass
+
+
+class DataEventArgs(EventArgs):
+    def __init__(self, file):
+        self.file = file
+
+
+class InputChangedEventArgs(EventArgs):
+    pass
+
+
+class CommandCreatedEventArgs(EventArgs):
+    def __init__(self, command):
+        self.command = command
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogError = 2
+
+
+########################## Data panel ######################################
+
+class _Snapshot:
+    """The stored contents of a single version of a design."""
+
+    def __init__(self, parameters=None, references=None, features=None):
+        self.parameters = collections.OrderedDict(parameters or {})
+        self.references = list(references or [])
+        self.features = list(features or [])
+
+
+class Data(Base):
+    def __init__(self, backend):
+        self._b = backend
+        self._files_by_id = {}
+        project = DataProject(backend, "Simulated Project")
+        self._projects = [project]
+        self.activeProject = project
+
+    @property
+    def dataProjects(self):
+        return DataProjects(self._b, self._projects)
+
+    def findFileById(self, file_id):
+        self._b.call("Data.findFileById")
+        lineage = self._files_by_id.get(file_id)
+        return lineage[-1] if lineage else None
+
+
+class DataProjects(_Collection):
+    pass
+
+
+class DataProject(Base):
+    def __init__(self, backend, name):
+        self._b = backend
+        self.name = name
+        self.id = backend.new_id("project")
+        self.rootFolder = DataFolder(backend, name, None, self)
+
+
+class DataFolder(Base):
+    def __init__(self, backend, name, parent, project):
+        self._b = backend
+        self._name = name
+        self._parent = parent
+        self._project = project
+        self._folders = []
+        self._files = []
+        self.id = backend.new_id("folder")
+
+    @property
+    def name(self):
+        self._b.call("DataFolder.name")
+        return self._name
+
+    @property
+    def parentFolder(self):
+        self._b.call("DataFolder.parentFolder")
+        return self._parent
+
+    @property
+    def parentProject(self):
+        return self._project
+
+    @property
+    def isRoot(self):
+        return self._parent is None
+
+    @property
+    def dataFolders(self):
+        return DataFolders(self._b, self._folders, self)
+
+    @property
+    def dataFiles(self):
+        return DataFiles(self._b, [lineage[-1] for lineage in self._files])
+
+    def _add_folder(self, name):
+        folder = DataFolder(self._b, name, self, self._project)
+        self._folders.append(folder)
+        return folder
+
+    def _lineage(self, name):
+        for lineage in self._files:
+            if lineage[-1]._name == name:
+                return lineage
+        return None
+
+    def _add_file(self, name, snapshot):
+        """Store a new file, or a new version if a file of that name exists."""
+        lineage = self._lineage(name)
+        if lineage is None:
+            lineage = []
+            self._files.append(lineage)
+            file_id = self._b.new_id("file")
+            self._project_data()._files_by_id[file_id] = lineage
+        else:
+            file_id = lineage[-1].id
+        data_file = DataFile(self._b, name, file_id, len(lineage) + 1, self, lineage, snapshot)
+        lineage.append(data_file)
+        return data_file
+
+    def _project_data(self):
+        return self._b.app.data
+
+
+class DataFolders(_Collection):
+    def __init__(self, backend, items, parent):
+        super().__init__(backend, items)
+        self._parent = parent
+
+    def itemByName(self, name):
+        self._call("itemByName")
+        for folder in self._items:
+            if folder._name == name:
+                return folder
+        return None
+
+    def add(self, name):
+        self._call("add")
+        return self._parent._add_folder(name)
+
+
+class DataFiles(_Collection):
+    def itemByName(self, name):
+        self._call("itemByName")
+        for data_file in self._items:
+            if data_file._name == name:
+                return data_file
+        return None
+
+
+class DataFile(Base):
+    def __init__(self, backend, name, file_id, version_number, parent, lineage, snapshot):
+        self._b = backend
+        self._name = name
+        self.id = file_id
+        self._version = version_number
+        self._parent = parent
+        self._lineage = lineage
+        self._snapshot = snapshot
+        self.fileExtension = "f3d"
+        self.dateModified = int(backend.clock)
+
+    @property
+    def name(self):
+        self._b.call("DataFile.name")
+        return self._name
+
+    @property
+    def versionNumber(self):
+        self._b.call("DataFile.versionNumber")
+        return self._version
+
+    @property
+    def latestVersionNumber(self):
+        return len(self._lineage)
+
+    @property
+    def latestVersion(self):
+        return self._lineage[-1]
+
+    @property
+    def versions(self):
+        self._b.call("DataFile.versions")
+        return DataFiles(self._b, list(self._lineage))
+
+    @property
+    def parentFolder(self):
+        self._b.call("DataFile.parentFolder")
+        return self._parent
+
+    @property
+    def parentProject(self):
+        return self._parent._project
+
+    @property
+    def isValid(self):
+        return self._lineage in self._parent._files
+
+    def move(self, targetFolder):
+        """Move every version of the file to targetFolder. The id stays the same."""
+        self._b.call("DataFile.move")
+        self._parent._files.remove(self._lineage)
+        targetFolder._files.append(self._lineage)
+        for data_file in self._lineage:
+            data_file._parent = targetFolder
+        return True
+
+    def deleteMe(self):
+        self._b.call("DataFile.deleteMe")
+        self._parent._files.remove(self._lineage)
+        self._parent._project_data()._files_by_id.pop(self.id, None)
+        return True
+
+
+########################## Documents #######################################
+
+class DocumentTypes:
+    FusionDesignDocumentType = 0
+
+
+class Documents(_Collection):
+    def __init__(self, backend, app):
+        super().__init__(backend, app._open_documents)
+        self._app = app
+
+    def open(self, data_file, visible=True):
+        self._call("open")
+        data_file = DataFile.cast(data_file)
+        if data_file is None:
+            raise RuntimeError("3 : invalid argument dataFile")
+        from . import fusion
+        return self._app._register(fusion.FusionDocument(self._b, self._app, data_file, data_file._snapshot))
+
+    def add(self, document_type=DocumentTypes.FusionDesignDocumentType, visible=True):
+        self._call("add")
+        from . import fusion
+        return self._app._register(fusion.FusionDocument(self._b, self._app, None, _Snapshot()))
+
+
+class Document(Base):
+    """Behaviour shared by all open documents. See fusion.FusionDocument."""
+
+    def __init__(self, backend, app, data_file, snapshot):
+        self._b = backend
+        self._app = app
+        self._data_file = data_file
+        self._name = data_file._name if data_file else "Untitled"
+        self._snapshot = snapshot
+        self._is_open = True
+        self.isModified = False
+
+    @property
+    def name(self):
+        self._b.call("Document.name")
+        return self._name
+
+    @property
+    def dataFile(self):
+        self._b.call("Document.dataFile")
+        return self._data_file
+
+    @property
+    def isSaved(self):
+        return self._data_file is not None and not self.isModified
+
+    @property
+    def isValid(self):
+        return self._is_open
+
+    @property
+    def isActive(self):
+        return self._app._active is self
+
+    def activate(self):
+        self._b.call("Document.activate")
+        if not self._is_open:
+            return False
+        self._app._active = self
+        return True
+
+    def close(self, saveChanges=False):
+        self._b.call("Document.close")
+        if not self._is_open:
+            return False
+        self._is_open = False
+        self._app._unregister(self)
+        return True
+
+    def saveAs(self, name, folder, description, tag):
+        """Store the document as `name` in `folder`.
+
+        Returns immediately; the upload finishes `latency.delay("upload")`
+        simulated seconds later, at which point Application.dataFileComplete
+        fires during adsk.doEvents().
+        """
+        self._b.call("Document.saveAs")
+        folder = DataFolder.cast(folder)
+        if folder is None:
+            raise RuntimeError("3 : invalid argument parentFolder")
+        self._data_file = folder._add_file(name, self._capture())
+        self._name = name
+        self.isModified = False
+        self._app._schedule_upload(self._data_file)
+        return True
+
+    def save(self, description):
+        self._b.call("Document.save")
+        if self._data_file is None:
+            raise RuntimeError("2 : document has never been saved")
+        self._data_file = self._data_file._parent._add_file(self._name, self._capture())
+        self.isModified = False
+        self._app._schedule_upload(self._data_file)
+        return True
+
+    def _capture(self):
+        return _Snapshot(self._snapshot.parameters, self._snapshot.references, self._snapshot.features)
+
+
+class FusionArchiveImportOptions(Base):
+    def __init__(self, filename):
+        self.filename = filename
+
+
+class ImportManager(Base):
+    def __init__(self, backend, app):
+        self._b = backend
+        self._app = app
+        self._archives = {}
+
+    def _register_archive(self, file_path, parameters=None, features=None):
+        """Make `file_path` importable without it existing on disk."""
+        self._archives[file_path] = _Snapshot(parameters, None, features)
+
+    def _archive(self, options):
+        return self._archives.get(options.filename) or _Snapshot()
+
+    def createFusionArchiveImportOptions(self, filename):
+        self._b.call("ImportManager.createFusionArchiveImportOptions")
+        if filename not in self._archives and not os.path.isfile(filename):
+            raise RuntimeError("3 : file does not exist: {}".format(filename))
+        return FusionArchiveImportOptions(filename)
+
+    def importToNewDocument(self, import_options):
+        self._b.call("ImportManager.importToNewDocument")
+        from . import fusion
+        snapshot = self._archive(import_options)
+        doc = fusion.FusionDocument(self._b, self._app, None, snapshot)
+        doc._name = os.path.splitext(os.path.basename(import_options.filename))[0]
+        return self._app._register(doc)
+
+    def importToTarget(self, import_options, target):
+        self._b.call("ImportManager.importToTarget")
+        from . import fusion
+        name = os.path.splitext(os.path.basename(import_options.filename))[0]
+        component = fusion.Component(self._b, name, self._archive(import_options))
+        target.occurrences._add(component)
+        return True
+
+
+########################## User interface ##################################
+
+class CommandDefinition(Base):
+    def __init__(self, app, cmd_id, name, tooltip, resources):
+        self._app = app
+        self.id = cmd_id
+        self.name = name
+        self.tooltip = tooltip
+        self.resourceFolder = resources
+        self.commandCreated = Event()
+
+    def execute(self):
+        command = Command(self)
+        self.commandCreated._fire(CommandCreatedEventArgs(command))
+        command.destroy._fire(EventArgs())
+        return True
+
+    def deleteMe(self):
+        self._app.userInterface.commandDefinitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(_Collection):
+    def addButtonDefinition(self, cmd_id, name, tooltip, resource_folder=""):
+        definition = CommandDefinition(self._b.app, cmd_id, name, tooltip, resource_folder)
+        self._items.append(definition)
+        return definition
+
+
+class Command(Base):
+    def __init__(self, definition):
+        self.parentCommandDefinition = definition
+        self.commandInputs = CommandInputs()
+        self.destroy = Event()
+        self.execute = Event()
+        self.inputChanged = Event()
+
+
+class CommandInputs(Base):
+    def __init__(self):
+        self._inputs = collections.OrderedDict()
+
+    def _add(self, input_id, **kwargs):
+        self._inputs[input_id] = collections.namedtuple("CommandInput", ["id"] + sorted(kwargs))(input_id, **kwargs)
+        return self._inputs[input_id]
+
+    def addBoolValueInput(self, input_id, name, is_check_box, resource_folder="", initial_value=False):
+        return self._add(input_id, name=name, value=initial_value)
+
+    def addTextBoxCommandInput(self, input_id, name, formatted_text, num_rows, is_read_only):
+        return self._add(input_id, name=name, text=formatted_text)
+
+    def itemById(self, input_id):
+        return self._inputs.get(input_id)
+
+
+class CommandControl(Base):
+    def __init__(self, controls, definition):
+        self._controls = controls
+        self.id = definition.id
+        self.commandDefinition = definition
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+
+class ToolbarControls(_Collection):
+    def addCommand(self, definition):
+        control = CommandControl(self, definition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, control_id):
+        for control in self._items:
+            if control.id == control_id:
+                return control
+        return None
+
+
+class ToolbarPanel(Base):
+    def __init__(self, backend, panel_id):
+        self.id = panel_id
+        self.controls = ToolbarControls(backend, [])
+
+
+class ToolbarPanels(_Collection):
+    def itemById(self, panel_id):
+        for panel in self._items:
+            if panel.id == panel_id:
+                return panel
+        panel = ToolbarPanel(self._b, panel_id)
+        self._items.append(panel)
+        return panel
+
+
+class FileDialog(Base):
+    def __init__(self):
+        self.filter = ""
+        self.initialDirectory = ""
+        self.filename = ""
+
+    def showOpen(self):
+        return DialogResults.DialogCancel
+
+
+class UserInterface(Base):
+    def __init__(self, backend):
+        self._b = backend
+        self.messages = []
+        self.commandDefinitions = CommandDefinitions(backend, [])
+        self.allToolbarPanels = ToolbarPanels(backend, [])
+
+    def messageBox(self, text, title="", buttons=0, icon=0):
+        self.messages.append(str(text))
+        return DialogResults.DialogOK
+
+    def createFileDialog(self):
+        return FileDialog()
+
+
+########################## Application #####################################
+
+class Application(Base):
+    def __init__(self, backend):
+        self._b = backend
+        self._open_documents = []
+        self._active = None
+        self._uploads = []
+        self.data = Data(backend)
+        self.userInterface = UserInterface(backend)
+        self.importManager = ImportManager(backend, self)
+        self.dataFileComplete = Event()
+
+    @staticmethod
+    def get():
+        from . import backend
+        return backend().app
+
+    @property
+    def documents(self):
+        return Documents(self._b, self)
+
+    @property
+    def activeDocument(self):
+        return self._active
+
+    @property
+    def activeProduct(self):
+        return self._active.design if self._active else None
+
+    def _register(self, doc):
+        self._open_documents.append(doc)
+        self._active = doc
+        return doc
+
+    def _unregister(self, doc):
+        self._open_documents.remove(doc)
+        if self._active is doc:
+            self._active = self._open_documents[-1] if self._open_documents else None
+
+    def _schedule_upload(self, data_file):
+        self._uploads.append((self._b.clock + self._b.latency.delay("upload"), data_file))
+
+    def _process_events(self):
+        """Fire dataFileComplete for every upload that has finished by now."""
+        finished = [u for u in self._uploads if u[0] <= self._b.clock]
+        self._uploads = [u for u in self._uploads if u[0] > self._b.clock]
+        for _, data_file in finished:
+            self.dataFileComplete._fire(DataEventArgs(data_file))
+
+
+########################## Values ##########################################
+
+class ObjectCollection(_Collection):
+    @staticmethod
+    def create():
+        from . import backend
+        return ObjectCollection(backend(), [])
+
+    def add(self, obj):
+        self._items.append(obj)
+        return True
+
+
+class ValueInput(Base):
+    def __init__(self, real=None, string=None):
+        self.realValue = real
+        self.stringValue = string
+
+    @staticmethod
+    def createByReal(value):
+        return ValueInput(real=float(value))
+
+    @staticmethod
+    def createByString(expression):
+        return ValueInput(string=expression)
+
+
+class Matrix3D(Base):
+    @staticmethod
+    def create():
+        return Matrix3D()
@@ -0,0 +1,347 @@
+"""
+Simulated `adsk.fusion`: Fusion documents, designs, parameters, components
+and the pattern features that the fgens build.
+"""
+
+import re
+import collections
+
+from .core import Base, _Collection, Document
+
+
+class FusionDocument(Document):
+    def __init__(self, backend, app, data_file, snapshot):
+        super().__init__(backend, app, data_file, snapshot)
+        self._snapshot = snapshot.__class__(snapshot.parameters, snapshot.references, snapshot.features)
+        self.design = Design(backend, self)
+
+    @property
+    def documentReferences(self):
+        self._b.call("FusionDocument.documentReferences")
+        return DocumentReferences(self._b, [DocumentReference(self._b, f) for f in self._snapshot.references])
+
+
+class DocumentReferences(_Collection):
+    pass
+
+
+class DocumentReference(Base):
+    def __init__(self, backend, data_file):
+        self._b = backend
+        self._data_file = data_file
+
+    @property
+    def dataFile(self):
+        self._b.call("DocumentReference.dataFile")
+        return self._data_file
+
+    @property
+    def name(self):
+        return self._data_file._name
+
+
+class Design(Base):
+    """The design of a FusionDocument.
+
+    Every parameter change recomputes the design, unless `isComputeDeferred`
+    is set, in which case a single compute happens when it is cleared again.
+    """
+
+    def __init__(self, backend, document):
+        self._b = backend
+        self.parentDocument = document
+        self._defer = False
+        self._pending = False
+        self._user = [Parameter(self, name, expr) for name, expr in document._snapshot.parameters.items()]
+        self.rootComponent = Component(backend, document._name, document._snapshot, self)
+
+    @staticmethod
+    def cast(obj):
+        return obj if isinstance(obj, Design) else None
+
+    @property
+    def userParameters(self):
+        return UserParameters(self._b, self._user, self)
+
+    @property
+    def allParameters(self):
+        return ParameterList(self._b, self._user)
+
+    @property
+    def isComputeDeferred(self):
+        return self._defer
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        self._defer = bool(value)
+        if not self._defer and self._pending:
+            self.computeAll()
+
+    def computeAll(self):
+        self._pending = False
+        self._b.call("Design.compute")
+        return True
+
+    def _changed(self):
+        """Called after any modelling change to the design."""
+        self.parentDocument.isModified = True
+        self.parentDocument._snapshot.parameters = collections.OrderedDict((p._name, p._expression) for p in self._user)
+        if self._defer:
+            self._pending = True
+        else:
+            self.computeAll()
+
+
+_NUMBER = re.compile(r"^\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)")
+
+
+class Parameter(Base):
+    def __init__(self, design, name, expression):
+        self._design = design
+        self._name = name
+        self._expression = str(expression)
+
+    @property
+    def name(self):
+        self._design._b.call("Parameter.name")
+        return self._name
+
+    @property
+    def expression(self):
+        self._design._b.call("Parameter.expression")
+        return self._expression
+
+    @expression.setter
+    def expression(self, value):
+        self._design._b.call("Parameter.setExpression")
+        self._expression = str(value)
+        self._design._changed()
+
+    @property
+    def value(self):
+        match = _NUMBER.match(self._expression)
+        return float(match.group(1)) if match else 0.0
+
+
+class ParameterList(_Collection):
+    def itemByName(self, name):
+        self._call("itemByName")
+        for param in self._items:
+            if param._name == name:
+                return param
+        return None
+
+
+class UserParameters(ParameterList):
+    def __init__(self, backend, items, design):
+        super().__init__(backend, items)
+        self._design = design
+
+    def add(self, name, value, units, comment):
+        self._call("add")
+        expression = value.stringValue if value.stringValue is not None else "{} {}".format(value.realValue, units)
+        param = Parameter(self._design, name, expression.strip())
+        self._items.append(param)
+        self._design._changed()
+        return param
+
+
+class Component(Base):
+    def __init__(self, backend, name, snapshot, design=None):
+        self._b = backend
+        self.name = name
+        self.parentDesign = design
+        self.features = Features(backend, self, snapshot.features)
+        self.occurrences = Occurrences(backend, self)
+        self.yConstructionAxis = ConstructionAxis("Y")
+        self.xConstructionAxis = ConstructionAxis("X")
+        self.zConstructionAxis = ConstructionAxis("Z")
+
+    def _changed(self):
+        if self.parentDesign:
+            self.parentDesign._changed()
+        else:
+            self._b.call("Design.compute")
+
+
+class ConstructionAxis(Base):
+    def __init__(self, name):
+        self.name = name
+
+
+class Occurrences(_Collection):
+    def __init__(self, backend, component):
+        super().__init__(backend, [])
+        self._component = component
+
+    def _add(self, component):
+        occurrence = Occurrence(component)
+        self._items.append(occurrence)
+        self._component._changed()
+        return occurrence
+
+    def addExistingComponent(self, component, transform):
+        self._call("addExistingComponent")
+        return self._add(component)
+
+    def addNewComponentCopy(self, component, transform):
+        self._call("addNewComponentCopy")
+        copy = Component(self._b, component.name, _snapshot_of(component))
+        return self._add(copy)
+
+
+def _snapshot_of(component):
+    from .core import _Snapshot
+    return _Snapshot(None, None, [f.name for f in component.features._named.values()])
+
+
+class Occurrence(Base):
+    def __init__(self, component):
+        self.component = component
+        self.name = component.name + ":1"
+
+
+class BRepFace(Base):
+    def __init__(self, owner, index):
+        self.owner = owner
+        self.index = index
+
+
+class Feature(Base):
+    def __init__(self, name, n_faces=8):
+        self.name = name
+        self.isSuppressed = False
+        self.faces = [BRepFace(self, i) for i in range(n_faces)]
+        self.patternElements = PatternElements(self)
+
+
+class PatternElements(Base):
+    def __init__(self, feature):
+        self._feature = feature
+
+    @property
+    def count(self):
+        return len(self._feature.faces)
+
+    def item(self, index):
+        return self._feature.faces[index] if index < len(self._feature.faces) else None
+
+
+class Features(Base):
+    def __init__(self, backend, component, names):
+        self._b = backend
+        self._component = component
+        self._named = collections.OrderedDict((name, Feature(name)) for name in names or [])
+        self.circularPatternFeatures = CircularPatternFeatures(backend, self)
+        self.rectangularPatternFeatures = RectangularPatternFeatures(backend, self)
+
+    def itemByName(self, name):
+        self._b.call("Features.itemByName")
+        return self._named.get(name)
+
+
+class CircularPatternFeatureInput(Base):
+    def __init__(self, input_entities, axis):
+        self.inputEntities = input_entities
+        self.axis = axis
+        self.quantity = None
+        self.totalAngle = None
+        self.isSymmetric = False
+
+
+class ModelParameter(Base):
+    """A parameter of a feature, such as the quantity of a pattern. Changing it edits the feature."""
+
+    def __init__(self, feature, value_input):
+        self._feature = feature
+        self._expression = value_input.stringValue if value_input.stringValue is not None \
+            else _real_expression(value_input.realValue)
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, value):
+        self._expression = str(value)
+        self._feature._edit()
+
+    @property
+    def value(self):
+        match = _NUMBER.match(self._expression)
+        return float(match.group(1)) if match else 0.0
+
+
+def _real_expression(value):
+    return str(int(value)) if value is not None and value == int(value) else str(value)
+
+
+class CircularPatternFeature(Feature):
+    def __init__(self, features, feature_input):
+        super().__init__("CircularPattern{}".format(len(features._items) + 1), 0)
+        self._features = features
+        self._input_entities = feature_input.inputEntities
+        self.axis = feature_input.axis
+        self.quantity = ModelParameter(self, feature_input.quantity)
+        self.totalAngle = ModelParameter(self, feature_input.totalAngle)
+        self.isSymmetric = feature_input.isSymmetric
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        old = getattr(self, "_name", None)
+        self._name = value
+        if old is not None and self._features._parent._named.get(old) is self:
+            del self._features._parent._named[old]
+            self._features._parent._named[value] = self
+
+    @property
+    def inputEntities(self):
+        return self._input_entities
+
+    @inputEntities.setter
+    def inputEntities(self, value):
+        self._input_entities = value
+        self._edit()
+
+    def deleteMe(self):
+        self._features._b.call("CircularPatternFeature.deleteMe")
+        self._features._items.remove(self)
+        if self._features._parent._named.get(self._name) is self:
+            del self._features._parent._named[self._name]
+        self._features._parent._component._changed()
+        return True
+
+    def _edit(self):
+        self._features._b.call("CircularPatternFeature.edit")
+        self._features._parent._component._changed()
+
+
+class CircularPatternFeatures(_Collection):
+    def __init__(self, backend, parent):
+        super().__init__(backend, [])
+        self._parent = parent
+
+    def createInput(self, input_entities, axis):
+        self._call("createInput")
+        return CircularPatternFeatureInput(input_entities, axis)
+
+    def add(self, feature_input):
+        self._call("add")
+        feature = CircularPatternFeature(self, feature_input)
+        self._items.append(feature)
+        self._parent._named[feature.name] = feature
+        self._parent._component._changed()
+        return feature
+
+
+class RectangularPatternFeatures(CircularPatternFeatures):
+    pass
+
+
+__all__ = ["FusionDocument", "DocumentReferences", "DocumentReference", "Design", "Parameter",
+           "ParameterList", "UserParameters", "Component", "Occurrences", "Occurrence", "BRepFace",
+           "Feature", "Features", "CircularPatternFeatures", "CircularPatternFeature", "ModelParameter"]
@@ -0,0 +1,134 @@
+"""
+Latency models for the simulated adsk backend.
+
+A latency model maps the name of a simulated API call (such as
+"Documents.open" or "Parameter.expression") to the number of seconds that
+call should cost. The backend asks the model once per call and either sleeps
+for that long or advances its virtual clock, depending on how it was set up.
+"""
+
+import random
+
+# Calls that need a round trip to the Autodesk servers in a live Fusion
+# session. Everything else is treated as a local property read or a local
+# modelling operation.
+SERVER_CALLS = frozenset([
+    "Data.findFileById",
+    "DataFile.move",
+    "DataFile.versions",
+    "DataFiles.count",
+    "DataFiles.item",
+    "DataFiles.itemById",
+    "DataFolders.add",
+    "DataFolders.count",
+    "DataFolders.item",
+    "DataFolders.itemById",
+    "DataFolders.itemByName",
+    "Document.save",
+    "Document.saveAs",
+    "DocumentReference.dataFile",
+    "Documents.open",
+    "ImportManager.importToNewDocument",
+    "ImportManager.importToTarget",
+])
+
+# Calls that are local, but still expensive because they make Fusion
+# recompute the timeline or build geometry.
+COMPUTE_CALLS = frozenset([
+    "Design.compute",
+    "CircularPatternFeatures.add",
+    "RectangularPatternFeatures.add",
+    "Occurrences.addExistingComponent",
+    "Occurrences.addNewComponentCopy",
+])
+
+# Not a call, but the time between saveAs returning and the upload finishing.
+UPLOAD = "upload"
+
+# Cost of a single adsk.doEvents() call, which is how the virtual clock moves
+# forward while code is polling.
+DO_EVENTS = "doEvents"
+
+
+class LatencyModel:
+    """Base class for all latency models."""
+
+    def delay(self, call_name):
+        """Return the number of seconds that `call_name` should take."""
+        raise NotImplementedError
+
+    def is_server_call(self, call_name):
+        return call_name in SERVER_CALLS
+
+
+class ZeroLatency(LatencyModel):
+    """Every call is free. Useful for counting calls only."""
+
+    def delay(self, call_name):
+        return 0.0
+
+
+class FixedLatency(LatencyModel):
+    """Every call costs the same number of seconds."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def delay(self, call_name):
+        return self.seconds
+
+
+class CloudLatency(LatencyModel):
+    """Splits calls into server, compute and local calls, each with its own cost.
+
+    Parameters
+    ----------
+    server : float
+        Seconds for every call in SERVER_CALLS. Defaults to 300 ms.
+    compute : float
+        Seconds for every call in COMPUTE_CALLS.
+    local : float
+        Seconds for every other call, such as property reads.
+    upload : float
+        Seconds between a saveAs returning and its upload finishing.
+    do_events : float
+        Seconds that a single adsk.doEvents() call moves the clock forward.
+    overrides : {str: float}, optional
+        Per-call costs that take precedence over the categories above.
+    """
+
+    def __init__(self, server=0.3, compute=0.05, local=0.0, upload=1.0, do_events=0.01, overrides=None):
+        self.server = server
+        self.compute = compute
+        self.local = local
+        self.overrides = dict(overrides or {})
+        self.overrides.setdefault(UPLOAD, upload)
+        self.overrides.setdefault(DO_EVENTS, do_events)
+
+    def delay(self, call_name):
+        if call_name in self.overrides:
+            return self.overrides[call_name]
+        if call_name in SERVER_CALLS:
+            return self.server
+        if call_name in COMPUTE_CALLS:
+            return self.compute
+        return self.local
+
+
+class JitterLatency(LatencyModel):
+    """Wraps another model and spreads every delay by up to +/- `spread`.
+
+    The random generator is seeded so that benchmark runs are repeatable.
+    """
+
+    def __init__(self, model, spread=0.25, seed=0):
+        self.model = model
+        self.spread = spread
+        self._random = random.Random(seed)
+
+    def delay(self, call_name):
+        base = self.model.delay(call_name)
+        return max(0.0, base * (1 + self._random.uniform(-self.spread, self.spread)))
+
+    def is_server_call(self, call_name):
+        return self.model.is_server_call(call_name)
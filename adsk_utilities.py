@@ -1,12 +1,16 @@
-import os, sys, inspect
+import os, sys, inspect, re
 import importlib
 import pkgutil
 import adsk
 import json
 import utilities as ut
+import tracing
+import adsk_proxy
+import draw_journal
 
 ######################## File/Folder Utilities ################################
-def find_fdoc_path(file_path: str, root_folder = None):
+@tracing.traced(category="lookup")
+def find_fdoc_path(file_path: str, root_folder = None, index = None):
     """Find a Fusion document using a file path
 
     Parameters
@@ -17,6 +21,8 @@ def find_fdoc_path(file_path: str, root_folder = None):
     root_folder : dataFolder
         The Fusion 360 dataFolder that is used for the starting point of the search. Defaults to the project root folder
         for absolute paths and the activeDocuments parent folder for relative paths.
+    index : path_index.PathIndex, optional
+        A persistent path index. When given, the path is looked up in the index first and only walked on a miss.
 
     Returns
     -------
@@ -43,46 +49,91 @@ def find_fdoc_path(file_path: str, root_folder = None):
     folder path and a specific root folder. The document object is then returned.
 
     """
-    fp_list = file_path.split("/")
+    is_absolute, folder_names, d_name, d_version = split_fdoc_path(file_path)
+    root_folder = find_root_folder(is_absolute, root_folder)
 
-    # User specified root_folder
-    if root_folder:
-        root_folder = adsk.fusion.dataFolder.cast(root_folder)
-    # root_folder assumed based on absolute path rules
-    elif fp_list[0] == '':
-        root_folder = adsk.core.Application.get().data.activeProject.rootFolder
+    if index is not None:
+        return index.resolve(root_folder, folder_names, d_name, d_version)
+
+    # dig into the final folder before hitting the document
+    for f_name in folder_names:
+        if f_name == "..":
+            root_folder = root_folder.parentFolder
+        else:
+            root_folder = find_dataFolder(root_folder, f_name)
+
+    # search through the datafiles to find the right one.
+    d = find_dataFile(root_folder, d_name)
+
+    # if no colens, open the datafile directly to the latest version.
+    # Otherwise, open to the version specified
+    if d_version:
+        d = find_version(d, d_version)
+
+    return d
+
+
+def split_fdoc_path(file_path: str):
+    """Split a dataFile path into its parts without making any server calls.
+
+    Parameters
+    ----------
+    file_path : str
+        A path as accepted by `find_fdoc_path`.
+
+    Returns
+    -------
+    (is_absolute, folder_names, d_name, d_version) : (bool, list of str, str, int or None)
+        Whether the path starts at the project root, the folder names to walk (which may include ".."), the name of
+        the dataFile and the version number, or None for the latest version.
+
+    Raises
+    ------
+    UserWarning
+        Raised when the version part of the path can't be understood.
+    """
+    fp_list = file_path.split("/")
+    is_absolute = fp_list[0] == ''
+    if is_absolute:
         fp_list = fp_list[1:]
-    # root_folder assumed based on relative path rules
-    else:
-        root_folder = adsk.core.Application.get().activeDocument.dataFile.parentFolder
 
     # Extract the final doc name and version
-    d_desired = fp_list[len(fp_list)-1].split(":")
+    d_desired = fp_list[-1].split(":")
     d_name = d_desired[0]
     d_version = None
     if len(d_desired) == 2:
-        d_version = d_desired[1]
+        d_version = parse_version(d_desired[1])
     elif len(d_desired) > 2:
         raise UserWarning("Version numbering is ambiguous, {} is not a proper "
         "version name".format(''.join(d_desired[1:])))
 
-    # dig into the final folder before hitting the document
-    if len(fp_list) > 1:
-       for f_name in fp_list[0:len(fp_list)-1]:
-           if f_name == "..":
-               root_folder = root_folder.parentFolder
-           root_folder = find_dataFolder(root_folder, f_name)
+    folder_names = [f_name for f_name in fp_list[:-1] if f_name not in ('', '.')]
+    return is_absolute, folder_names, d_name, d_version
 
-    # search through the datafiles to find the right one.
-    d = find_dataFile(root_folder, d_name)
 
-    # if no colens, open the datafile directly to the latest version.
-    # Otherwise, open to the version specified
-    if d_version:
-        d = find_version(d,d_version)
+def parse_version(version):
+    """Turn a version suffix such as "2", "v2" or "version_2" into the version number 2."""
+    match = re.match(r"^(?:v|version_?)?(\d+)$", version)
+    if not match:
+        raise UserWarning("{} is not a proper version name".format(version))
+    return int(match.group(1))
+
+
+@tracing.traced(category="lookup")
+def find_root_folder(is_absolute, root_folder=None):
+    """Return the folder that a path is relative to, following the rules of `find_fdoc_path`."""
+    # User specified root_folder
+    if root_folder:
+        return adsk.core.DataFolder.cast(root_folder)
+    app = adsk.core.Application.get()
+    # root_folder assumed based on absolute path rules
+    if is_absolute:
+        return app.data.activeProject.rootFolder
+    # root_folder assumed based on relative path rules
+    return app.activeDocument.dataFile.parentFolder
 
-    return d
 
+@tracing.traced(category="lookup")
 def find_version(data_file, version_number):
     """Find the version of a dataFile from a version number
 
@@ -104,13 +155,15 @@ def find_version(data_file, version_number):
         Raised when cannot find the version.
 
     """
-    versions = data_file.versions
+    versions = adsk_proxy.versions(data_file)
     for i in range(versions.count):
         d_potential = versions.item(i)
         if d_potential:
             if d_potential.versionNumber == version_number:
                 return d_potential
+    raise UserWarning("Version {} of the dataFile {} was not found".format(version_number, data_file.name))
 
+@tracing.traced(category="lookup")
 def find_dataFile(data_folder, data_file_name):
     """Finds the dataFile in the dataFolder. Will not search within subfolders.
 
@@ -132,14 +185,14 @@ def find_dataFile(data_folder, data_file_name):
         Raised when cannot find the dataFile.
 
     """
-    files = data_folder.dataFiles
+    files = adsk_proxy.data_files(data_folder)
     for i in range(files.count):
         df = files.item(i)
         if df.name == data_file_name:
             return df
-        else:
-            raise UserWarning("The dataFile {} was not found in the folder {}".format(data_file_name, data_folder.name))
+    raise UserWarning("The dataFile {} was not found in the folder {}".format(data_file_name, data_folder.name))
 
+@tracing.traced(category="lookup")
 def find_dataFolder(parent_dataFolder, dataFolder_name):
     """Finds a dataFolder within a dataFolder. Will not search within subfolders.
 
@@ -164,7 +217,7 @@ def find_dataFolder(parent_dataFolder, dataFolder_name):
         Raised when cannot find the dataFolder.
 
     """
-    df = parent_dataFolder.dataFolders.itemByName(dataFolder_name)
+    df = adsk_proxy.data_folders(parent_dataFolder).itemByName(dataFolder_name)
     if df:
         return df
     else:
@@ -172,7 +225,8 @@ def find_dataFolder(parent_dataFolder, dataFolder_name):
 
 
 
-def open_template(file_path:str, target_component=None):
+@tracing.traced(category="import")
+def open_template(file_path:str, target_component=None, cache=None):
     """Opens an f3d file.
 
     This will use a file_path to open a Fusion Archive file.
@@ -184,6 +238,10 @@ def open_template(file_path:str, target_component=None):
         archives folder within the repo. An absolute path is absolute to the root of the computer.
     target_component : Component, optional
         The component that the archive file will be inserted into. Defaults to a new Design
+    cache : template_cache.TemplateCache, optional
+        Import the archive only once per session. Without a target_component,
+        the cache's master document of the archive is returned, which must not
+        be changed. With one, the Occurrence added to it is returned.
 
     Returns
     -------
@@ -197,6 +255,11 @@ def open_template(file_path:str, target_component=None):
     if not fp_list[0] == '':
         file_path = ut.abs_path("archives/"+file_path)
 
+    if cache is not None:
+        if target_component:
+            return cache.import_to_target(file_path, target_component)
+        return cache.master(file_path)
+
     app = adsk.core.Application.get()
     import_manager = app.importManager
     try:
@@ -209,10 +272,23 @@ def open_template(file_path:str, target_component=None):
         return import_manager.importToNewDocument(import_options)
 
 
-def save_fdoc_online(fdoc, folder, name):
+@tracing.traced(category="save")
+def save_fdoc_online(fdoc, folder, name, coordinator=None):
     """
     Saves the fusionDocument fdoc in the specified dataFolder folder with the
     specified name and then opens the modified document and closes the fdoc template
+
+    If a save_queue.SaveCoordinator is given, the save is handed to it and a
+    SaveFuture is returned without waiting for the upload.
+
+    When a resumed draw_journal has the save as committed, nothing is saved
+    and None is returned.
     """
+    if draw_journal.saved_as(folder, name):
+        return None
+    if coordinator is not None:
+        return coordinator.submit(fdoc, folder, name)
     fdoc.saveAs(name, folder, '', '')
+    adsk_proxy.saved(folder)
     adsk.doEvents()
+    draw_journal.saved(fdoc.dataFile, folder, name)
@@ -14,7 +14,6 @@ Therefore we can only use custom libraries with relative imports.
 #ONLY FOR DEVELOPMENT! Clear all modules in memory in order to load changes.
 import sys
 import importlib
-import pickle
 import os.path
 
 import sys, os
@@ -25,12 +24,8 @@ path_list = ["tests", "fgens", ""]
 for path in path_list:
     sys.path.append(os.path.join(os.path.dirname(__file__), path))
 
-import utilities as ut
 import adsk.core, adsk.fusion, adsk.cam, traceback
-import warnings
-import aide_draw, aide_gui
-import tests
-import fgen_tests
+import aide_gui
 
 
 # Global variables:
@@ -38,11 +33,17 @@ app = None
 ui  = None
 show_trace = True
 
+# Development only: names of tests (module.function) to run when the add-in
+# starts, such as "tests.test_aide_draw" or "fgen_tests.test_lfom". When empty,
+# starting the add-in only registers the AIDE command, and the draw, test and
+# fgen modules are imported the first time they are used.
+run_on_start = []
+
 def run(context):
     """
     This function runs when the plugin is started. It's only use is to
-    import necessary files and create the button that is the entry point to the
-    aide ecosystem.
+    create the button that is the entry point to the aide ecosystem.
+    Everything else is imported when the button is first used.
     """
 
     try:
@@ -50,22 +51,11 @@ def run(context):
         #reload_modules()
         global ui
         ui = adsk.core.Application.get().userInterface
+        aide_gui.register_aide_command()
 
-        # Tests
-        #aide_gui.launch_aide_panel()
-        #aide_draw.open_fdoc("/tests/folder1/folder2/folder3/test_cube")
-        #tests.test_parametrize_fdoc_cube()
-        #tests.test_sync_folder_structure()
-        #tests.test_holding_folder_refs_in_dictionaries()
-        #tests.test_sync_dict_with_empty_dict()
-        #tests.test_sync_dict_with_one_level_dict()
-        #tests.test_parametrize_recursive_with_one_level_dict()
-        #tests.test_open_template()
-        tests.test_aide_draw()
-
-        # fgen tests
-        # fgen_tests.test_cylindrical_pattern_feature()
-        # fgen_tests.test_lfom()()
+        # Tests, see tests.py and fgen_tests.py for what is available:
+        for test_name in run_on_start:
+            run_test(test_name)
 
     except BaseException as e:
         if ui:
@@ -74,7 +64,26 @@ def run(context):
                 e = str(traceback.format_exc()) + e
             ui.messageBox(e)
 
+def stop(context):
+    """
+    This function runs when the plugin is stopped, and removes the AIDE command.
+    """
+    try:
+        aide_gui.unregister_aide_command()
+    except BaseException:
+        if ui:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+def run_test(test_name):
+    """
+    Imports the test module and runs the test given as "module.function", for
+    example "tests.test_aide_draw".
+    """
+    module_name, function_name = test_name.rsplit(".", 1)
+    getattr(importlib.import_module(module_name), function_name)()
+
 def reload_modules():
+    import pickle
     fp_name = '/Users/ethankeller/git_repos/AguaClara/AIDE/aide_draw/init_modules_file.p'
     if os.path.isfile(fp_name):
         with open(fp_name, 'rb') as fp:
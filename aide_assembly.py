@@ -1,9 +1,396 @@
-"""TODO: This defines the AideAssembly class that holds the various representations of
+"""This defines the AideAssembly class that holds the various representations of
 the current collection of components and folders that make up all the things
 that AIDE is responsible for changing.
 
+The assembly is a tree of Folder and Fdoc nodes with parent pointers, loaded
+from and saved to AIDE JSON. Names and expressions are interned, and fdocs
+with the same parameter names or fgen arguments share one copy of them, so
+the tree takes less than half the memory of the nested dicts it is loaded
+from (see benchmarks/assembly_memory.py). The assembly keeps indexes
+so that the common lookups don't walk the tree:
+
+    assembly = AideAssembly("plant.json")
+    assembly.find("plant/flocculator/baffle")      # one dict lookup per folder
+    assembly.fdocs_using_template("test_cube")     # O(k) in the number found
+    assembly.fdocs_with_fgen("lfom")
+    assembly.nodes_named("baffle")
 """
 
+import sys
+import collections
+
+import json_keys as keys
+import utilities as ut
+from json_transformations import transforms
+
+# Keys of an fdoc_dict that are stored on the Fdoc itself rather than as fgen arguments.
+_REF_KEYS = (keys.DATA_FILE_KEY, keys.DATA_FOLDER_KEY)
+# fgen keys whose arguments are stored as nodes and parameters rather than as they are.
+_OWN_KEYS = (keys.PARAMETERS_KEY, keys.FDOC_REF_KEY)
+FOLDERS_KEY = "folders"
+
+
+def _freeze(value):
+    """A hashable value that is equal for equal JSON values. Raises TypeError for anything else."""
+    if isinstance(value, dict):
+        return (dict, tuple((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    hash(value)
+    return (type(value), value)
+
+
+class Node:
+    """A folder or fdoc of the assembly."""
+
+    __slots__ = ("name", "parent")
+    type = None
+
+    def __init__(self, name, parent=None):
+        self.name = sys.intern(name)
+        self.parent = parent
+
+    @property
+    def key(self):
+        """The "name:type" key of the node in AIDE JSON."""
+        return self.name + ":" + self.type
+
+    @property
+    def path(self):
+        """The tuple of names from the root folder down to this node."""
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, "/".join(self.path))
+
+
+class Folder(Node):
+    """A folder, holding folders and fdocs in order.
+
+    Attributes
+    ----------
+    children : {name: Node}
+    data_folder : DataFolder
+        The Fusion folder, when known. It isn't saved to JSON.
+    """
+
+    __slots__ = ("children", "data_folder")
+    type = keys.FOLDER_TYPE
+
+    def __init__(self, name, parent=None):
+        super().__init__(name, parent)
+        self.children = {}
+        self.data_folder = None
+
+
+class Fdoc(Node):
+    """A Fusion document and the fgens that draw it.
+
+    Attributes
+    ----------
+    template : str
+        The name of the template the fdoc is drawn from: the "fdoc_template"
+        argument of its fgens, or else its own name.
+    fgens : tuple of str
+        The fgen keys of the fdoc_dict, in order.
+    links : list of Fdoc
+        The linked fdocs under "fdocs", or None.
+    data_file : DataFile
+        The Fusion file, when known. It isn't saved to JSON.
+    """
+
+    __slots__ = ("template", "fgens", "_param_names", "_param_values", "_args", "links", "data_file")
+    type = keys.FDOC_TYPE
+
+    def __init__(self, name, parent=None):
+        super().__init__(name, parent)
+        self.template = self.name
+        self.fgens = ()
+        self._param_names = ()
+        self._param_values = ()
+        self._args = ()
+        self.links = None
+        self.data_file = None
+
+    @property
+    def parameters(self):
+        """{parameter name: expression}, a new dict on every access."""
+        return collections.OrderedDict(zip(self._param_names, self._param_values))
+
+    def args(self, fgen_key):
+        """The arguments of the fgen, such as the parameters or the linked fdoc_dicts.
+
+        Equal arguments are shared between fdocs, so treat them as read only.
+        """
+        if fgen_key == keys.PARAMETERS_KEY:
+            return self.parameters
+        if fgen_key == keys.FDOC_REF_KEY:
+            return collections.OrderedDict((link.name, link.to_dict()) for link in self.links or ())
+        # _args holds the arguments of the other fgens, in the order of fgens.
+        i = 0
+        for key in self.fgens:
+            if key == fgen_key:
+                return self._args[i]
+            if key not in _OWN_KEYS:
+                i += 1
+        return None
+
+    def to_dict(self):
+        """The fdoc_dict of the fdoc, as in AIDE JSON."""
+        return collections.OrderedDict((fgen_key, self.args(fgen_key)) for fgen_key in self.fgens)
+
+
 class AideAssembly:
-    def __init__(self, json_path):
-        hi ="TODO!"
+    """The folders and fdocs of an AIDE JSON, with indexes.
+
+    Parameters
+    ----------
+    json_path : str, optional
+        An AIDE JSON to load. The assembly starts out empty without one.
+
+    Attributes
+    ----------
+    root : Folder
+        The folder the AIDE JSON describes. It has no name.
+    """
+
+    def __init__(self, json_path=None):
+        self.root = Folder("")
+        self._n_nodes = 0
+        # Names are mostly unique, so each maps to its node, or to a list of
+        # nodes once it is shared.
+        self._by_name = {}
+        self._by_type = {keys.FOLDER_TYPE: [], keys.FDOC_TYPE: []}
+        self._by_template = collections.defaultdict(list)
+        self._by_fgen = collections.defaultdict(list)
+        # Tuples of parameter names and fgen keys, and fgen arguments, shared between fdocs.
+        self._shared = {}
+        if json_path is not None:
+            self.load(json_path)
+
+    @classmethod
+    def from_dict(cls, folder_dict):
+        assembly = cls()
+        assembly.update(folder_dict)
+        return assembly
+
+    def __len__(self):
+        return self._n_nodes
+
+    def __iter__(self):
+        """Every node, depth first in JSON order."""
+        stack = list(reversed(list(self.root.children.values())))
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, Folder):
+                stack.extend(reversed(list(node.children.values())))
+
+    ########################## Lookups ########################################
+
+    def find(self, path):
+        """Return the node at path, as "a/b/c" or a tuple of names, or None."""
+        if isinstance(path, str):
+            path = [p for p in path.split("/") if p]
+        node = self.root
+        for name in path:
+            if not isinstance(node, Folder):
+                return None
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def nodes_named(self, name):
+        nodes = self._by_name.get(name)
+        if nodes is None:
+            return []
+        return list(nodes) if isinstance(nodes, list) else [nodes]
+
+    def folders(self):
+        return list(self._by_type[keys.FOLDER_TYPE])
+
+    def fdocs(self):
+        """Every fdoc, not counting linked fdocs."""
+        return list(self._by_type[keys.FDOC_TYPE])
+
+    def fdocs_using_template(self, template):
+        return list(self._by_template.get(template, ()))
+
+    def fdocs_with_fgen(self, fgen_key):
+        return list(self._by_fgen.get(fgen_key, ()))
+
+    ########################## Changes ########################################
+
+    def add_folder(self, parent, name):
+        """Add an empty folder to the folder parent and return it."""
+        folder = Folder(name, parent)
+        self._attach(folder)
+        return folder
+
+    def add_fdoc(self, parent, name, fdoc_dict):
+        """Add the fdoc_dict to the folder parent and return its Fdoc."""
+        fdoc = self._make_fdoc(name, fdoc_dict, parent)
+        self._attach(fdoc)
+        return fdoc
+
+    def remove(self, node):
+        """Remove the node, and everything in it, from the assembly.
+
+        The indexes are rebuilt once per call, so remove a whole folder rather
+        than each of its fdocs.
+        """
+        del node.parent.children[node.name]
+        removed = [node] + (list(self._walk(node)) if isinstance(node, Folder) else [])
+        self._n_nodes -= len(removed)
+        ids = set(map(id, removed))
+        for name in set(n.name for n in removed):
+            nodes = [x for x in self.nodes_named(name) if id(x) not in ids]
+            if not nodes:
+                self._by_name.pop(name, None)
+            else:
+                self._by_name[name] = nodes if len(nodes) > 1 else nodes[0]
+        for index in [self._by_type, self._by_template, self._by_fgen]:
+            for k in list(index):
+                index[k] = [x for x in index[k] if id(x) not in ids]
+
+    def update(self, folder_dict, parent=None):
+        """Add the contents of the AIDE-compliant folder_dict to the folder parent, the root by default.
+
+        Both "name:type" keys and the layout made by sync_folder_structure and
+        sync_dict are understood. Refs are kept on the nodes.
+        """
+        stack = [(parent or self.root, folder_dict)]
+        while stack:
+            folder, d = stack.pop()
+            for k, v in d.items():
+                if k in _REF_KEYS:
+                    folder.data_folder = v
+                    continue
+                # Not parse_key: names are mostly unique, and its cache would keep a copy of each.
+                name, _, key_type = k.partition(":")
+                if key_type == keys.FDOC_TYPE:
+                    self.add_fdoc(folder, name, v)
+                elif key_type == keys.FOLDER_TYPE:
+                    stack.append((self.add_folder(folder, name), v))
+                elif not key_type and isinstance(v, dict):
+                    child = self.add_folder(folder, name)
+                    child.data_folder = v.get(keys.DATA_FOLDER_KEY)
+                    stack.append((child, v.get(FOLDERS_KEY, {})))
+                else:
+                    raise ValueError("{} isn't a folder or an fdoc".format("/".join(folder.path + (k,))))
+
+    def _walk(self, folder):
+        stack = list(folder.children.values())
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, Folder):
+                stack.extend(node.children.values())
+
+    def _attach(self, node):
+        siblings = node.parent.children
+        if node.name in siblings:
+            raise ValueError("There is already a folder or fdoc at {}".format("/".join(node.path)))
+        siblings[node.name] = node
+        self._n_nodes += 1
+        named = self._by_name.get(node.name)
+        if named is None:
+            self._by_name[node.name] = node
+        elif isinstance(named, list):
+            named.append(node)
+        else:
+            self._by_name[node.name] = [named, node]
+        self._by_type[node.type].append(node)
+        if isinstance(node, Fdoc):
+            self._index_fdoc(node)
+
+    def _index_fdoc(self, fdoc):
+        self._by_template[fdoc.template].append(fdoc)
+        for fgen_key in self._fgens_of(fdoc):
+            self._by_fgen[fgen_key].append(fdoc)
+
+    def _fgens_of(self, fdoc):
+        """The fgen keys used by fdoc and its linked fdocs, each once."""
+        if not fdoc.links:
+            return fdoc.fgens
+        seen = set()
+        stack = [fdoc]
+        fgens = []
+        while stack:
+            f = stack.pop()
+            for fgen_key in f.fgens:
+                if fgen_key not in seen:
+                    seen.add(fgen_key)
+                    fgens.append(fgen_key)
+            stack.extend(f.links or ())
+        return fgens
+
+    def _share(self, t):
+        return self._shared.setdefault(t, t)
+
+    def _share_args(self, args):
+        """Return the first args seen that are equal to args.
+
+        Most fdocs of a plant are drawn with the same few fgen arguments, so
+        this keeps one copy of each rather than the one from every fdoc_dict.
+        """
+        try:
+            key = ("args", _freeze(args))
+        except TypeError:
+            return args
+        return self._shared.setdefault(key, args)
+
+    def _make_fdoc(self, name, fdoc_dict, parent):
+        fdoc = Fdoc(name, parent)
+        fgens = []
+        fgen_args = []
+        for fgen_key, args in fdoc_dict.items():
+            if fgen_key in _REF_KEYS:
+                fdoc.data_file = args
+                continue
+            fgens.append(sys.intern(fgen_key))
+            if fgen_key == keys.PARAMETERS_KEY:
+                fdoc._param_names = self._share(tuple(sys.intern(p) for p in args))
+                fdoc._param_values = tuple(sys.intern(v) if isinstance(v, str) else v for v in args.values())
+            elif fgen_key == keys.FDOC_REF_KEY:
+                fdoc.links = [self._make_fdoc(link_name, link_dict, fdoc) for link_name, link_dict in args.items()]
+            else:
+                args = self._share_args(args)
+                fgen_args.append(args)
+                if isinstance(args, dict) and isinstance(args.get(keys.TEMPLATE_KEY), str):
+                    fdoc.template = sys.intern(args[keys.TEMPLATE_KEY])
+        fdoc.fgens = self._share(tuple(fgens))
+        if fgen_args:
+            fdoc._args = self._shared.setdefault(("fgen args",) + tuple(map(id, fgen_args)), tuple(fgen_args))
+        return fdoc
+
+    ########################## JSON ###########################################
+
+    def to_dict(self, folder=None):
+        """The AIDE JSON of the folder, the root by default, with "name:type" keys."""
+        result = collections.OrderedDict()
+        stack = [(folder or self.root, result)]
+        while stack:
+            f, d = stack.pop()
+            for node in f.children.values():
+                if isinstance(node, Folder):
+                    d[node.key] = collections.OrderedDict()
+                    stack.append((node, d[node.key]))
+                else:
+                    d[node.key] = node.to_dict()
+        return result
+
+    def load(self, json_path):
+        """Add the AIDE JSON at json_path, reading one top level entry at a time."""
+        for key, value in ut.iter_json_entries(json_path):
+            self.update({key: value})
+
+    def save(self, json_path):
+        """Write the assembly to json_path as AIDE JSON."""
+        return transforms.save(self.to_dict(), json_path)
@@ -7,65 +7,138 @@ import adsk.core, adsk.fusion, adsk.cam, traceback
 import os, sys
 import warnings
 import json
-import aide_gui
 import importlib
 import utilities as ut
 import json_keys as keys
+import document_pool
+import run_manifest
+import fgen_manager
+import parameters
+import aide_schema
+import tracing
+import adsk_proxy
+import draw_journal
 
-try:
-    fgen_registry = json.load(open(ut.abs_path("fgen_registry.json")))
-except:
-    print(__file__)
-    raise FileNotFoundError("The fgen_registry.json is missing from the root of aide_draw.")
+_REF_KEYS = (keys.DATA_FILE_KEY, keys.DATA_FOLDER_KEY)
 
+_fgen_table = None
 
+
+def fgen_table():
+    """Returns the fgen_manager.FgenTable of every fgen in fgen_registry.json,
+    importing and checking them all the first time it is called.
+    """
+    global _fgen_table
+    if _fgen_table is None:
+        _fgen_table = fgen_manager.FgenTable.load(ut.abs_path("fgen_registry.json"))
+    return _fgen_table
+
+
+@tracing.traced(category="draw")
 def draw_fdoc(fdoc, fdoc_dict):
     """Runs through the fgens defined in the fdoc_dict and passes given args to the
-    relevant fgen
+    relevant fgen. Every fgen used is checked before any of them runs.
     """
+    table = fgen_table()
+    table.check(fdoc_dict, skip=_REF_KEYS)
     for fgen_key in fdoc_dict:
-        # Import the fgen that was called on.
-        if fgen_key in fgen_registry:
-            fgen_module = importlib.import_module(fgen_key)
-            try:
-                if fdoc:
-                    fgen_module.update_fdoc(fdoc, fdoc_dict[fgen_key])
-                else:
-                    fgen_module.generate_fdoc(fdoc_dict[fgen_key])
-            # If either the update or generate fdoc functions aren't implemented, move on.
-            except NotImplementedError:
-                continue
-        else:
-            raise KeyError("Couldn't find the fgen called {}. Make sure it is"
-                " defined correctly within the fgen_registry".format(fgen_key))
+        # Refs added by sync_dict aren't fgens.
+        if fgen_key in _REF_KEYS:
+            continue
+        table.run(fgen_key, fdoc, fdoc_dict[fgen_key])
+    draw_journal.drawn(fdoc, fdoc_dict)
     # Save the final fdocs
     # _save(fdoc_template, fdoc_target_folder, fdoc_dict['name'])
 
 
-def _save(fdoc, folder, name):
+@tracing.traced(category="save")
+def _save(fdoc, folder, name, coordinator=None):
     """
     Saves the fusionDocument fdoc in the specified dataFolder folder with the
     specified name and then opens the modified document and closes the fdoc template
+
+    If a save_queue.SaveCoordinator is given, the save is handed to it and a
+    SaveFuture is returned without waiting for the upload.
+
+    When a resumed draw_journal has the save as committed, nothing is saved
+    and None is returned.
     """
+    if draw_journal.saved_as(folder, name):
+        return None
+    if coordinator is not None:
+        return coordinator.submit(fdoc, folder, name)
     fdoc.saveAs(name, folder, '', '')
+    adsk_proxy.saved(folder)
     adsk.doEvents()
+    draw_journal.saved(fdoc.dataFile, folder, name)
 
 
-def parametrize_recursive(folder_dict_with_refs):
+def parametrize_recursive(folder_dict_with_refs, pool=None):
     """
     Takes a AIDE-compliant dictionary and opens and parametrizes all the fdocs to the
-    specified sizes.
+    specified sizes. Documents are opened through the pool, which defaults to
+    document_pool.shared_pool().
     """
-    for k,v in folder_dict_with_refs.items():
-        if k.split(":")[1] == keys.FDOC_TYPE:
-            fdoc_dict = folder_dict_with_refs[k]
-            app = adsk.core.Application.get()
-            fdoc = app.documents.open(fdoc_dict[keys.DATA_FILE_KEY])
-            parametrize_fdoc(fdoc_dict[keys.PARAMETERS_KEY], fdoc)
-        elif k.split(":")[1] == keys.DATA_FOLDER_KEY:
-            folder_dict = folder_dict_with_refs[k]
-            parametrize_recursive(folder_dict, folder_dict[keys.DATA_FOLDER_KEY])
-
+    pool = document_pool.shared_pool() if pool is None else pool
+    for k, v in folder_dict_with_refs.items():
+        if not isinstance(v, dict):
+            continue
+        key_type = k.partition(":")[2]
+        if key_type == keys.FDOC_TYPE:
+            with pool.pinned(v[keys.DATA_FILE_KEY]) as fdoc:
+                parameters.update_fdoc(fdoc, v[keys.PARAMETERS_KEY])
+        elif key_type == keys.FOLDER_TYPE:
+            parametrize_recursive(v, pool)
+        elif keys.DATA_FOLDER_KEY in v and "folders" in v:
+            # The layout made by sync_dict, where a folder's contents are under "folders"
+            parametrize_recursive(v["folders"], pool)
+
+
+
+def draw_incremental(folder_dict_with_refs, manifest, pool=None):
+    """
+    Draws only the fdocs of a synced AIDE-compliant dictionary (see
+    generate_json.sync_dict) that changed since the run recorded in the
+    run_manifest.RunManifest manifest, plus the fdocs that depend on them.
+    The dictionary is checked with aide_schema before anything is drawn.
+    Each drawn fdoc is saved as a new version and recorded in the manifest,
+    which is saved at the end. Returns the run_manifest.RunPlan, whose report()
+    lists what was drawn and skipped and why.
+
+    While a draw_journal is running, each save is journaled, and the fdocs
+    that a resumed journal has as saved with the same fdoc_dict aren't drawn
+    again; they are listed in plan.resumed.
+    """
+    pool = document_pool.shared_pool() if pool is None else pool
+    table = fgen_table()
+    aide_schema.check(folder_dict_with_refs, allow_refs=True)
+    plan = manifest.plan(folder_dict_with_refs, set(table))
+    for fdoc_dict in plan.to_draw.values():
+        table.check(fdoc_dict, skip=_REF_KEYS, recursive=True)
+    journal = draw_journal.current()
+    try:
+        for path, fdoc_dict in plan.to_draw.items():
+            if journal is not None:
+                path_str = "/".join(path)
+                fdoc_hash = run_manifest.fdoc_hash(fdoc_dict)
+                if journal.saved_fdoc(path_str, fdoc_hash):
+                    journal.skip()
+                    plan.resumed.append(path)
+                    manifest.record(path, run_manifest.fingerprint(fdoc_dict, set(table)))
+                    continue
+            with pool.pinned(fdoc_dict[keys.DATA_FILE_KEY]) as fdoc:
+                draw_fdoc(fdoc, fdoc_dict)
+                if fdoc.isModified:
+                    fdoc.save("Redrawn by AIDE: {}".format(plan.reasons[path]))
+                    adsk.doEvents()
+                    fdoc_dict[keys.DATA_FILE_KEY] = fdoc.dataFile
+                if journal is not None:
+                    journal.document_saved(fdoc.dataFile, path=path_str, fdoc_hash=fdoc_hash)
+            plan.drawn.append(path)
+            manifest.record(path, run_manifest.fingerprint(fdoc_dict, set(table)))
+    finally:
+        manifest.save()
+    return plan
 
 
 def sync_folder_structure(folder_dict, parent_folder):
@@ -103,10 +176,13 @@ def sync_folder_structure(folder_dict, parent_folder):
         for folder_name in folder_dict:
             # add the ref of the children folders, making the folder if necessary
             if keys.DATA_FOLDER_KEY not in folder_dict[folder_name]:
-                folder = parent_folder.dataFolders.itemByName(folder_name)
+                folders = adsk_proxy.data_folders(parent_folder)
+                folder = folders.itemByName(folder_name)
                 # if the folder doesn't exist, make it!
-                if not folder:
-                    folder = parent_folder.dataFolders.add(folder_name)
+                created = not folder
+                if created:
+                    folder = folders.add(folder_name)
+                draw_journal.folder(parent_folder, folder_name, folder, created)
             else:
                 raise ValueError("keyword 'ref' cannot be used within the "
                     "AIDE-JSON")
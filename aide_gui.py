@@ -3,7 +3,6 @@
 import adsk.core, adsk.fusion, adsk.cam, traceback
 import os, sys
 import warnings
-import aide_draw
 import utilities as ut
 
 _handlers = []
@@ -35,21 +34,49 @@ def select_json():
         return
     return dialog.filename
 
-def launch_aide_panel():
+def register_aide_command():
     """
-    Creates a panel in the ui.
+    Creates the AIDE command and adds its button to the add-ins panel, without
+    running anything. This is all the add-in does on startup.
     """
     ui = get_ui()
     # Get the existing command definition or create it if it doesn't already exist.
     cmdDef = ui.commandDefinitions.itemById('aideInputs')
     if not cmdDef:
-        cmdDef = ui.commandDefinitions.addButtonDefinition('aideInputs', 'AIDE Inputs', 'Select various inputs for aide here.')
+        cmdDef = ui.commandDefinitions.addButtonDefinition('aideInputs', 'AIDE Inputs',
+            'Select various inputs for aide here.', 'resources/button')
+
+        # Connect to the command created event.
+        onCommandCreated = AideCreatedHandler()
+        cmdDef.commandCreated.add(onCommandCreated)
+        _handlers.append(onCommandCreated)
+
+    panel = ui.allToolbarPanels.itemById('SolidScriptsAddinsPanel')
+    if panel and not panel.controls.itemById('aideInputs'):
+        panel.controls.addCommand(cmdDef)
+    return cmdDef
 
-    # Connect to the command created event.
-    onCommandCreated = AideCreatedHandler()
-    cmdDef.commandCreated.add(onCommandCreated)
-    _handlers.append(onCommandCreated)
-    cmdDef.execute()
+
+def unregister_aide_command():
+    """
+    Removes the button and the command created by register_aide_command.
+    """
+    ui = get_ui()
+    panel = ui.allToolbarPanels.itemById('SolidScriptsAddinsPanel')
+    control = panel.controls.itemById('aideInputs') if panel else None
+    if control:
+        control.deleteMe()
+    cmdDef = ui.commandDefinitions.itemById('aideInputs')
+    if cmdDef:
+        cmdDef.deleteMe()
+    del _handlers[:]
+
+
+def launch_aide_panel():
+    """
+    Creates a panel in the ui.
+    """
+    register_aide_command().execute()
 
 
 # Event handler that reacts to any changes the user makes to any of the command inputs.
@@ -69,7 +96,7 @@ class AideInputChangedHandler(adsk.core.InputChangedEventHandler):
                 if cmd_inp:
                     cmd_inp.text = json_path
         except:
-            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+            get_ui().messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
 # Event handler that reacts to when the command is destroyed. TODO this should
@@ -83,14 +110,26 @@ class AideDestroyHandler(adsk.core.CommandEventHandler):
     def notify(self, args):
         try:
             get_ui().messageBox('running fdoc')
+            # Imported here so that loading the add-in stays fast.
+            import aide_draw
+            import aide_schema
+            import aide_settings
             app = adsk.core.Application.get()
-            fdoc_dict = aide_draw._load_json(json_path)
-            project = app.data.activeProject
-            fdoc_target_folder = project.rootFolder.dataFolders.add(ut.str_time())
+            fdoc_dict = ut._load_json(json_path)
+            aide_schema.check(fdoc_dict, aide_draw.fgen_table(), root=aide_schema.FDOC)
             fdoc_template = app.activeDocument
-            aide_draw.draw_fdoc(fdoc_dict, fdoc_template, fdoc_target_folder)
+            trace_path = aide_settings.get_trace_path()
+            if trace_path:
+                import tracing
+                trace_path = ut.abs_path(trace_path)
+                with tracing.tracing(trace_path, memory=True) as tracer:
+                    aide_draw.draw_fdoc(fdoc_template, fdoc_dict)
+                # Fusion shows no console, so the summary goes next to the trace.
+                tracer.save_summary(os.path.splitext(trace_path)[0] + ".summary.txt")
+            else:
+                aide_draw.draw_fdoc(fdoc_template, fdoc_dict)
         except:
-            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+            get_ui().messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
 # Event handler that reacts when the command definitio is executed which
@@ -119,7 +158,7 @@ class AideCreatedHandler(adsk.core.CommandCreatedEventHandler):
                 inputs.addBoolValueInput('findJson', 'Select Json', False, 'resources/button', True)
                 inputs.addTextBoxCommandInput('jsonPath', 'Path of Json selected', 'No json selected', 2, True)
         except:
-            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+            get_ui().messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
 def stop(context):
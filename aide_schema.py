@@ -0,0 +1,217 @@
+"""
+The AIDE JSON grammar (see AIDE-JSON.md and json_keys.py) as a validator.
+
+A Schema is built once and then checks a whole tree in a single pass over
+its nodes, collecting every violation with the JSON path where it was found
+instead of stopping at the first one. Run it before drawing, so that a bad
+JSON fails before any server call is made.
+
+    violations = aide_schema.Schema(fgen_names).validate(aide_dict)
+    aide_schema.check(aide_dict)    # raises SchemaError listing the violations
+
+The grammar:
+
+* A folder maps "name:fdoc" keys to fdoc_dicts and "name:folder" keys to
+  folders. Untyped keys are folders in the layout used by
+  sync_folder_structure and sync_dict, holding their contents under "folders".
+* An fdoc_dict maps fgen names to their arguments. "parameters" is a flat
+  map of parameter names to expressions, and "fdocs" maps the names of
+  linked documents to their fdoc_dicts.
+* The data_folder and data_file keys hold live Fusion references and are
+  only allowed in synced dictionaries.
+"""
+
+import functools
+import json_keys as keys
+
+FOLDER = "folder"
+FDOC = "fdoc"
+
+ENTRY_TYPES = frozenset([keys.FDOC_TYPE, keys.FOLDER_TYPE, keys.DATAFILE_TYPE])
+REF_KEYS = frozenset([keys.DATA_FOLDER_KEY, keys.DATA_FILE_KEY])
+RESERVED_KEYS = REF_KEYS | frozenset([keys.PARAMETERS_KEY, keys.FDOC_REF_KEY])
+
+# Key used by the untyped folder layout for the folder's contents.
+FOLDERS_KEY = "folders"
+
+_EXPRESSION_TYPES = (str, int, float)
+
+
+@functools.lru_cache(maxsize=1 << 12)
+def parse_key(key):
+    """Split a "name:type" key into (name, type). The type is "" for untyped keys.
+
+    The result is cached, as the same keys come up over and over in large trees.
+    The cache is kept small, since the names of fdocs are mostly unique.
+    """
+    name, _, key_type = key.partition(":")
+    return name, key_type
+
+
+class Violation:
+    """A single place where a tree breaks the grammar.
+
+    Attributes
+    ----------
+    path : tuple of str
+        The keys leading from the root of the tree to the offending value.
+    message : str
+    """
+
+    __slots__ = ("path", "message")
+
+    def __init__(self, path, message):
+        self.path = path
+        self.message = message
+
+    @property
+    def json_path(self):
+        """The path as a JSON pointer, such as "/plant:folder/tank:fdoc/parameters"."""
+        return "".join("/" + str(k).replace("~", "~0").replace("/", "~1") for k in self.path) or "/"
+
+    def __str__(self):
+        return "{}: {}".format(self.json_path, self.message)
+
+    def __repr__(self):
+        return "Violation({!r}, {!r})".format(self.json_path, self.message)
+
+
+class SchemaError(ValueError):
+    """Raised by check, with every violation found."""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__("The AIDE JSON has {} problem(s):\n  {}".format(
+            len(violations), "\n  ".join(str(v) for v in violations)))
+
+
+class Schema:
+    """The compiled grammar.
+
+    Parameters
+    ----------
+    fgen_names : collection of str, optional
+        The fgens an fdoc_dict may use. Any key is accepted when None.
+    allow_refs : bool
+        Accept the data_folder and data_file keys, as added by sync_dict.
+    """
+
+    def __init__(self, fgen_names=None, allow_refs=False):
+        self.fgen_names = None if fgen_names is None else frozenset(fgen_names)
+        self.allow_refs = allow_refs
+        self._visit = {FOLDER: self._folder, FDOC: self._fdoc}
+
+    def validate(self, tree, root=FOLDER):
+        """Return the list of Violations in tree, depth first.
+
+        Parameters
+        ----------
+        tree : dict
+            A folder, or an fdoc_dict when root is FDOC.
+        root : str
+            FOLDER or FDOC.
+        """
+        violations = []
+        # Depth first with an explicit stack, so deep trees don't hit the recursion limit.
+        stack = [(root, tree, ())]
+        while stack:
+            kind, node, path = stack.pop()
+            if not isinstance(node, dict):
+                violations.append(Violation(path, "a {} must be an object, not {}".format(kind, _type_name(node))))
+                continue
+            children = []
+            self._visit[kind](node, path, children, violations)
+            stack.extend(reversed(children))
+        return violations
+
+    def _ref(self, key, path, violations):
+        if not self.allow_refs:
+            violations.append(Violation(path + (key,), "'{}' is reserved for Fusion references and can't be "
+                                                       "used within the AIDE-JSON".format(key)))
+
+    def _folder(self, node, path, children, violations):
+        for key, value in node.items():
+            if key in REF_KEYS:
+                self._ref(key, path, violations)
+                continue
+            name, key_type = parse_key(key)
+            child_path = path + (key,)
+            if not name:
+                violations.append(Violation(child_path, "the name is empty"))
+            elif ":" in key_type:
+                violations.append(Violation(child_path, "a key can only have one ':'"))
+            elif key_type == keys.FDOC_TYPE:
+                children.append((FDOC, value, child_path))
+            elif key_type == keys.FOLDER_TYPE:
+                children.append((FOLDER, value, child_path))
+            elif key_type == keys.DATAFILE_TYPE:
+                continue
+            elif key_type:
+                violations.append(Violation(child_path, "unknown type '{}', expected one of {}".format(
+                    key_type, ", ".join(sorted(ENTRY_TYPES)))))
+            elif key in RESERVED_KEYS:
+                violations.append(Violation(child_path, "'{}' can only be used within an fdoc".format(key)))
+            else:
+                self._untyped_folder(value, child_path, children, violations)
+
+    def _untyped_folder(self, value, path, children, violations):
+        if not isinstance(value, dict):
+            violations.append(Violation(path, "an untyped key must be a folder object, not {}".format(
+                _type_name(value))))
+            return
+        for key, contents in value.items():
+            if key == FOLDERS_KEY:
+                children.append((FOLDER, contents, path + (key,)))
+            elif key in REF_KEYS:
+                self._ref(key, path, violations)
+            else:
+                violations.append(Violation(path + (key,), "an untyped folder can only hold '{}'; use "
+                                                           "'name:fdoc' and 'name:folder' keys".format(FOLDERS_KEY)))
+
+    def _fdoc(self, node, path, children, violations):
+        fgen_names = self.fgen_names
+        for key, value in node.items():
+            child_path = path + (key,)
+            if key == keys.PARAMETERS_KEY:
+                self._parameters(value, child_path, violations)
+            elif key == keys.FDOC_REF_KEY:
+                if not isinstance(value, dict):
+                    violations.append(Violation(child_path, "must be an object of linked fdoc_dicts, not {}".format(
+                        _type_name(value))))
+                    continue
+                for child_name, child in value.items():
+                    children.append((FDOC, child, child_path + (child_name,)))
+            elif key in REF_KEYS:
+                self._ref(key, path, violations)
+            elif fgen_names is not None and key not in fgen_names:
+                violations.append(Violation(child_path, "'{}' isn't in the fgen_registry".format(key)))
+
+    def _parameters(self, value, path, violations):
+        if not isinstance(value, dict):
+            violations.append(Violation(path, "must be an object of parameter expressions, not {}".format(
+                _type_name(value))))
+            return
+        for name, expression in value.items():
+            if not name:
+                violations.append(Violation(path + (name,), "the parameter name is empty"))
+            elif not isinstance(expression, _EXPRESSION_TYPES) or isinstance(expression, bool):
+                violations.append(Violation(path + (name,), "a parameter expression must be a string or a "
+                                                            "number, not {}".format(_type_name(expression))))
+
+
+def _type_name(value):
+    if value is None:
+        return "null"
+    return {dict: "an object", list: "an array", str: "a string", bool: "a boolean"}.get(type(value), "a number")
+
+
+def validate(tree, fgen_names=None, allow_refs=False, root=FOLDER):
+    """Return the Violations of tree. See Schema."""
+    return Schema(fgen_names, allow_refs).validate(tree, root)
+
+
+def check(tree, fgen_names=None, allow_refs=False, root=FOLDER):
+    """Raise SchemaError if tree breaks the grammar. See Schema."""
+    violations = validate(tree, fgen_names, allow_refs, root)
+    if violations:
+        raise SchemaError(violations)
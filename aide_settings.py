@@ -2,9 +2,26 @@ import json
 import utilities as ut
 
 GLOBAL_FGEN_LIST_KEY = "global_fgen_list"
+TRACE_PATH_KEY = "trace_path"
 
-settings_dict = json.load(open(ut.abs_path("config.json")))
+_settings_dict = None
+
+
+def get_settings():
+    """Returns the contents of config.json, reading it the first time it is needed."""
+    global _settings_dict
+    if _settings_dict is None:
+        _settings_dict = ut._load_json(ut.abs_path("config.json"))
+    return _settings_dict
 
 
 def get_global_fgen_list():
-    return settings_dict[GLOBAL_FGEN_LIST_KEY]
+    return get_settings()[GLOBAL_FGEN_LIST_KEY]
+
+
+def get_trace_path():
+    """Where draws save a Chrome trace of their spans (see tracing), or None to not trace them.
+
+    The GUI draw writes the summary table of the spans next to it, with .summary.txt in place of its extension.
+    """
+    return get_settings().get(TRACE_PATH_KEY)
@@ -0,0 +1,303 @@
+"""
+A content-addressed cache of the remote assets that fgens download.
+
+Fgens such as lfom need files from the web: archives, images, tables. The
+AssetCache downloads each URL once and keeps its content on disk under its
+SHA-256, so that two URLs serving the same bytes share one file. Later
+fetches of a URL go back to the server only when the cached copy is older
+than max_age, and then with the ETag and Last-Modified it was served with,
+so an unchanged asset costs a 304 and no download. When the server can't be
+reached the cached copy is used anyway, and in offline mode the network
+isn't touched at all.
+
+    cache = asset_cache.shared_cache()
+    path = cache.fetch("https://example.com/tank.f3z")
+    cache.prefetch(plan.assets(aide_draw.fgen_table()))   # in parallel, before drawing
+
+An fgen declares the assets it needs with a module level ASSETS list of URLs,
+or an assets(args) function returning them for the arguments it is given.
+Once the files take more than max_bytes, the least recently used are deleted.
+Set the AIDE_OFFLINE environment variable to run offline.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import tracing
+import concurrent.futures
+
+SCHEMA_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+_CHUNK = 1 << 16
+
+
+class AssetUnavailable(OSError):
+    """Raised when an asset isn't cached and can't be downloaded."""
+
+
+def default_directory():
+    """Where the shared cache keeps its files: ~/.aide/assets"""
+    return os.path.join(os.path.expanduser("~"), ".aide", "assets")
+
+
+class AssetCache:
+    """Downloads, revalidates and evicts cached assets.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Where the files and their index are kept. Defaults to default_directory().
+    max_bytes : int
+        The size the cached files may take at most.
+    max_age : float
+        Seconds a cached asset is used without asking the server whether it changed.
+    offline : bool, optional
+        Never use the network. Defaults to whether AIDE_OFFLINE is set.
+    timeout : float
+        Seconds to wait for the server.
+
+    Attributes
+    ----------
+    hits : int
+        Fetches served from the cache without asking the server.
+    revalidated : int
+        Fetches for which the server answered that the asset didn't change.
+    downloads : int
+        Fetches that downloaded the asset.
+    stale : int
+        Fetches served from the cache because the server couldn't be reached.
+    evictions : int
+        Files deleted to stay within max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, offline=None,
+                 timeout=30):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = bool(os.environ.get("AIDE_OFFLINE")) if offline is None else offline
+        self.timeout = timeout
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.stale = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS assets (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, etag TEXT, last_modified TEXT, checked_at REAL NOT NULL, "
+                         "used_at REAL NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or int(row[0]) != SCHEMA_VERSION:
+            self._db.execute("DELETE FROM assets")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def __contains__(self, url):
+        return self._cached(url) is not None
+
+    @property
+    def size(self):
+        """The bytes taken by the cached files, counting each content once."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM "
+                                    "(SELECT DISTINCT sha256, size FROM assets)").fetchone()[0]
+
+    def stats(self):
+        return {"assets": len(self), "bytes": self.size, "hits": self.hits, "revalidated": self.revalidated,
+                "downloads": self.downloads, "stale": self.stale, "evictions": self.evictions}
+
+    def path(self, sha256):
+        """Where the content with the given hash is kept."""
+        return os.path.join(self.directory, "objects", sha256[:2], sha256)
+
+    def fetch(self, url, max_age=None):
+        """Return the path of the cached copy of url, downloading it if needed.
+
+        Parameters
+        ----------
+        max_age : float, optional
+            Overrides the cache's max_age. 0 always asks the server.
+
+        Raises
+        ------
+        AssetUnavailable
+            Raised when url isn't cached and can't be downloaded, or in
+            offline mode.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        cached = self._cached(url)
+        now = time.time()
+        if cached is not None and (self.offline or now - cached["checked_at"] < max_age):
+            self._touch(url, now)
+            with self._lock:
+                self.hits += 1
+            return self.path(cached["sha256"])
+        if self.offline:
+            raise AssetUnavailable("{} isn't cached, and AIDE is offline".format(url))
+        try:
+            return self._download(url, cached, now)
+        except OSError as e:
+            if cached is None:
+                raise AssetUnavailable("Couldn't download {}: {}".format(url, e))
+            self._touch(url, now)
+            with self._lock:
+                self.stale += 1
+            return self.path(cached["sha256"])
+
+    def prefetch(self, urls, workers=8):
+        """Fetch every url at once, in up to workers threads.
+
+        Returns
+        -------
+        results : {url: path or Exception}
+            The errors are returned rather than raised, so that a missing
+            asset only fails the fgen that needs it.
+        """
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        if not urls:
+            return results
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(urls))) as executor:
+            futures = {executor.submit(self.fetch, url): url for url in urls}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+        return results
+
+    def evict(self, keep=()):
+        """Delete the least recently used files until the cache is within max_bytes. Returns the number deleted."""
+        with self._lock:
+            rows = self._db.execute("SELECT sha256, size, MAX(used_at) FROM assets GROUP BY sha256 "
+                                    "ORDER BY MAX(used_at)").fetchall()
+            total = sum(row[1] for row in rows)
+            n_evicted = 0
+            for sha256, size, _ in rows:
+                if total <= self.max_bytes:
+                    break
+                if sha256 in keep:
+                    continue
+                self._db.execute("DELETE FROM assets WHERE sha256 = ?", (sha256,))
+                try:
+                    os.remove(self.path(sha256))
+                except OSError:
+                    pass
+                total -= size
+                n_evicted += 1
+            self._db.commit()
+            self.evictions += n_evicted
+            return n_evicted
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def _cached(self, url):
+        """The index row of url as a dict, or None if it isn't cached or its file is gone."""
+        with self._lock:
+            row = self._db.execute("SELECT sha256, size, etag, last_modified, checked_at FROM assets WHERE url = ?",
+                                   (url,)).fetchone()
+        if row is None or not os.path.isfile(self.path(row[0])):
+            return None
+        return dict(zip(("sha256", "size", "etag", "last_modified", "checked_at"), row))
+
+    def _touch(self, url, now, checked=False):
+        with self._lock:
+            if checked:
+                self._db.execute("UPDATE assets SET used_at = ?, checked_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._db.execute("UPDATE assets SET used_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def _forget_content(self, sha256):
+        """Delete the file of sha256 if no url is cached with it anymore."""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM assets WHERE sha256 = ?", (sha256,)).fetchone() is None:
+                try:
+                    os.remove(self.path(sha256))
+                except OSError:
+                    pass
+
+    @tracing.traced(category="download")
+    def _download(self, url, cached, now):
+        # Imported here as it is slow to import and only needed when downloading.
+        import urllib.request
+        import urllib.error
+
+        request = urllib.request.Request(url)
+        if cached is not None:
+            if cached["etag"]:
+                request.add_header("If-None-Match", cached["etag"])
+            if cached["last_modified"]:
+                request.add_header("If-Modified-Since", cached["last_modified"])
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                self._touch(url, now, checked=True)
+                with self._lock:
+                    self.revalidated += 1
+                return self.path(cached["sha256"])
+            raise
+
+        with response:
+            tmp_path = os.path.join(self.directory, "objects", "download-{}-{}.tmp".format(
+                os.getpid(), threading.get_ident()))
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in iter(lambda: response.read(_CHUNK), b""):
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+                sha256 = digest.hexdigest()
+                path = self.path(sha256)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (url, sha256, size, etag, last_modified, now, now))
+            self._db.commit()
+            self.downloads += 1
+            if cached is not None and cached["sha256"] != sha256:
+                self._forget_content(cached["sha256"])
+        self.evict(keep=(sha256,))
+        return path
+
+
+_shared = None
+
+
+def shared_cache():
+    """Return the cache shared by the fgens, making it on first use."""
+    global _shared
+    if _shared is None:
+        _shared = AssetCache()
+    return _shared
+
+
+def set_shared_cache(cache):
+    """Replace the shared cache, such as to change its limits or go offline. Returns the old cache."""
+    global _shared
+    old, _shared = _shared, cache
+    return old
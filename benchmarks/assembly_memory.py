@@ -0,0 +1,70 @@
+"""
+Compares the memory of an AideAssembly with that of the nested dicts it is loaded from.
+
+    python benchmarks/assembly_memory.py [--fdocs 100000] [--parameters 3]
+
+Exits with 1 when the assembly takes more memory than the dicts.
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import aide_assembly
+
+
+def make_tree(n_fdocs, n_parameters, fdocs_per_folder=100):
+    """An AIDE JSON of n_fdocs fdocs drawn from one template, fdocs_per_folder to a folder."""
+    tree = {}
+    for i in range(n_fdocs):
+        folder = tree.setdefault("folder_{}:folder".format(i // fdocs_per_folder), {})
+        parameters = {"p{}".format(p): "{} in".format(i % 100 + p) for p in range(n_parameters)}
+        folder["part_{}:fdoc".format(i)] = {"parameters": parameters, "open_template": {"fdoc_template": "cube"}}
+    return tree
+
+
+def traced(f):
+    """Return the result of f() and the memory it still holds, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    result = f()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fdocs", type=int, default=100000)
+    parser.add_argument("--parameters", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    json_path = os.path.join(tempfile.mkdtemp(), "plant.json")
+    with open(json_path, "w") as f:
+        json.dump(make_tree(args.fdocs, args.parameters), f)
+
+    def load_dict():
+        with open(json_path) as f:
+            return json.load(f)
+
+    tree, dict_size = traced(load_dict)
+    del tree
+    start = time.perf_counter()
+    assembly, assembly_size = traced(lambda: aide_assembly.AideAssembly(json_path))
+    seconds = time.perf_counter() - start
+    print("{} nodes: dicts {:.1f} MB, assembly {:.1f} MB ({:.0%}), loaded in {:.2f} s with tracing.".format(
+        len(assembly), dict_size / 1e6, assembly_size / 1e6, assembly_size / dict_size, seconds))
+    os.remove(json_path)
+    return 1 if assembly_size > dict_size else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
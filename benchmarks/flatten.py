@@ -0,0 +1,128 @@
+"""
+Times json_transformations.flatten against the vendored third_party/flatten_dict
+on a chain of folders, a deep tree and a wide tree.
+
+    python benchmarks/flatten.py [--repeat 5]
+
+The vendored version needs six, and collections.Mapping which was removed in
+Python 3.10, and its __init__ needs pkg_resources. So its flatten_dict.py is
+loaded on its own, with six.viewitems and collections.Mapping filled in for
+the import when they are missing.
+"""
+
+import os
+import sys
+import time
+import types
+import argparse
+import collections
+import collections.abc
+import importlib.util
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from json_transformations import flatten as fl
+
+
+def deep_tree(depth=200, width=3):
+    """A chain of depth folders, each also holding width fdocs."""
+    d = node = {}
+    for i in range(depth):
+        for j in range(width):
+            node["part_{}:fdoc".format(j)] = {"parameters": {"length": "{} in".format(i)}}
+        node["level_{}:folder".format(i)] = {}
+        node = node["level_{}:folder".format(i)]
+    node["leaf:fdoc"] = {"parameters": {"length": "1 in"}}
+    return d
+
+
+def chain_tree(depth=900):
+    """A chain of depth folders with a single fdoc at the bottom. Kept within the vendored version's recursion."""
+    d = node = {}
+    for i in range(depth):
+        node = node.setdefault("level_{}:folder".format(i), {})
+    node["leaf:fdoc"] = {"parameters": {"length": "1 in"}}
+    return d
+
+
+def wide_tree(n_fdocs=20000, n_parameters=5):
+    """n_fdocs fdocs, 100 to a folder."""
+    parameters = {"p{}".format(i): "{} in".format(i) for i in range(n_parameters)}
+    tree = {}
+    for i in range(n_fdocs):
+        folder = tree.setdefault("folder_{}:folder".format(i // 100), {})
+        folder["part_{}:fdoc".format(i)] = {"parameters": dict(parameters)}
+    return tree
+
+
+VENDORED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "third_party", "flatten_dict")
+
+
+def vendored_flatten():
+    """Return the vendored flatten, or None with the reason it can't be loaded."""
+    # A package of its own, so that its "from .reducer import" works without running its __init__.
+    package = types.ModuleType("_vendored_flatten_dict")
+    package.__path__ = [VENDORED_DIR]
+    stubs = {package.__name__: package}
+    try:
+        import six
+    except ImportError:
+        stubs["six"] = six = types.ModuleType("six")
+        six.viewitems = lambda d: d.items()
+    added_mapping = not hasattr(collections, "Mapping")
+    if added_mapping:
+        collections.Mapping = collections.abc.Mapping
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        spec = importlib.util.spec_from_file_location(package.__name__ + ".flatten_dict",
+                                                      os.path.join(VENDORED_DIR, "flatten_dict.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception as e:
+        return None, "{}: {}".format(type(e).__name__, e)
+    finally:
+        if added_mapping:
+            del collections.Mapping
+        for name, old in saved.items():
+            if old is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = old
+        sys.modules.pop(package.__name__ + ".reducer", None)
+    return module.flatten, None
+
+
+def best_of(f, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    vendored, reason = vendored_flatten()
+    if vendored is None:
+        print("The vendored flatten_dict can't be loaded ({}), timing the new module only.".format(reason))
+    trees = {"chain": chain_tree(), "deep": deep_tree(), "wide": wide_tree()}
+    print("{:<6} {:<8} {:>12} {:>14}".format("tree", "reducer", "new (ms)", "vendored (ms)"))
+    for tree_name, tree in trees.items():
+        for reducer in ["tuple", "path"]:
+            new = best_of(lambda: fl.flatten(tree, reducer), args.repeat)
+            old = best_of(lambda: vendored(tree, reducer), args.repeat) if vendored else None
+            print("{:<6} {:<8} {:>12.1f} {:>14}".format(
+                tree_name, reducer, new * 1000, "-" if old is None else "{:.1f}".format(old * 1000)))
+    fdoc_dicts = [fdoc_dict for folder in trees["wide"].values() for fdoc_dict in folder.values()]
+    many = best_of(lambda: fl.flatten_many(fdoc_dicts), args.repeat)
+    print("flatten_many of {} fdoc_dicts: {:.1f} ms".format(len(fdoc_dicts), many * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
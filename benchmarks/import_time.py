@@ -0,0 +1,101 @@
+"""
+Measures how long loading the AIDE add-in takes.
+
+Starts a fresh python with `-X importtime`, installs the simulated adsk API
+(see adsk_sim), then imports aide and calls aide.run the way Fusion 360 does
+when the add-in is loaded. Prints the slowest imports and exits with 1 if the
+add-in took longer than the budget, or if it imported a module that should
+only be loaded when it is first used.
+
+    python benchmarks/import_time.py [--budget-ms 40] [--top 15]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# The modules the add-in must not import on startup.
+LAZY_MODULES = ("aide_draw", "tests", "fgen_tests", "lfom", "cylindrical_pattern_feature",
+                "urllib.request", "inspect")
+
+DEFAULT_BUDGET_MS = 40
+
+_STARTUP = """
+import sys
+sys.path.insert(0, {root!r})
+import adsk_sim
+adsk_sim.install()
+import aide
+aide.run(None)
+print("LOADED " + " ".join(sorted(sys.modules)))
+"""
+
+
+def parse_importtime(stderr):
+    """Parse the `-X importtime` output into a list of (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure():
+    """Load the add-in in a fresh interpreter.
+
+    Returns
+    -------
+    aide_us : int
+        The cumulative import time of aide, in microseconds.
+    rows : list
+        Every import made by the add-in, see parse_importtime.
+    loaded : set of str
+        The modules in sys.modules after aide.run.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _STARTUP.format(root=ROOT)],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError("Loading the add-in failed:\n" + proc.stderr)
+    loaded = set()
+    for line in proc.stdout.splitlines():
+        if line.startswith("LOADED "):
+            loaded = set(line.split()[1:])
+
+    rows = parse_importtime(proc.stderr)
+    # Everything up to and including adsk_sim is the test harness, not the add-in.
+    start = max(i for i, row in enumerate(rows) if row[0] == "adsk_sim" and row[3] == 0) + 1
+    rows = rows[start:]
+    aide_us = sum(row[2] for row in rows if row[3] == 0)
+    return aide_us, rows, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="the number of slowest imports to show")
+    args = parser.parse_args(argv)
+
+    aide_us, rows, loaded = measure()
+    print("Add-in startup: {:.1f} ms (budget {:.1f} ms)".format(aide_us / 1000, args.budget_ms))
+    for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print("  {:>8.1f} ms self {:>8.1f} ms cumulative  {}".format(self_us / 1000, cumulative_us / 1000, name))
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print("Imported on startup, but should be lazy: {}".format(", ".join(eager)))
+        failed = True
+    if aide_us / 1000 > args.budget_ms:
+        print("Startup is over budget.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Times aide_schema validating a generated AIDE JSON.
+
+    python benchmarks/schema_validation.py [--fdocs 100000] [--parameters 5] [--budget 1.0]
+
+Exits with 1 when validation takes longer than the budget in seconds.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import aide_schema
+
+
+def make_tree(n_fdocs, n_parameters, fdocs_per_folder=100):
+    """An AIDE JSON of n_fdocs fdocs, fdocs_per_folder to a folder."""
+    parameters = {"p{}".format(i): "{} in".format(i) for i in range(n_parameters)}
+    tree = {}
+    for i in range(n_fdocs):
+        folder = tree.setdefault("folder_{}:folder".format(i // fdocs_per_folder), {})
+        folder["part_{}:fdoc".format(i)] = {"parameters": dict(parameters)}
+    return tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fdocs", type=int, default=100000)
+    parser.add_argument("--parameters", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    tree = make_tree(args.fdocs, args.parameters)
+    schema = aide_schema.Schema(["parameters", "fdocs"])
+    start = time.perf_counter()
+    violations = schema.validate(tree)
+    seconds = time.perf_counter() - start
+    print("Validated {} fdocs in {:.3f} s (budget {:.3f} s), {} violations.".format(
+        args.fdocs, seconds, args.budget, len(violations)))
+    return 1 if seconds > args.budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+A bounded pool of open Fusion documents.
+
+Every `app.documents.open` downloads the document and keeps it in Fusion's
+memory until it is closed. The DocumentPool opens documents on behalf of the
+draw and sync code, hands back the already-open handle when the same dataFile
+version is asked for again, and closes the least recently used documents once
+there are too many open. Documents that are active, pinned or have unsaved
+changes are never closed by the pool, and neither are documents that the pool
+didn't open itself.
+
+    pool = document_pool.shared_pool()
+    with pool.pinned(data_file) as fdoc:
+        ...
+"""
+
+import collections
+import contextlib
+import adsk.core
+import tracing
+
+# A rough figure for an average AIDE template in Fusion's memory. Pass a
+# size_estimator to DocumentPool for something better.
+DEFAULT_DOCUMENT_MB = 50
+
+
+class _Entry:
+    __slots__ = ("fdoc", "size_mb", "pins", "owned")
+
+    def __init__(self, fdoc, size_mb, owned):
+        self.fdoc = fdoc
+        self.size_mb = size_mb
+        self.pins = 0
+        self.owned = owned
+
+
+def document_key(data_file):
+    """The pool key of a dataFile: its id and version number."""
+    return (data_file.id, data_file.versionNumber)
+
+
+class DocumentPool:
+    """Opens, reuses and closes Fusion documents.
+
+    Parameters
+    ----------
+    max_open : int
+        The number of documents the pool tries to keep open at most.
+    max_memory_mb : float, optional
+        The estimated memory the open documents may use at most.
+    size_estimator : function, optional
+        Takes a dataFile and returns its estimated size in MB. Defaults to
+        DEFAULT_DOCUMENT_MB for every document.
+
+    Attributes
+    ----------
+    hits : int
+        Opens served by a handle the pool already had.
+    adopted : int
+        Opens served by a document that was already open in Fusion.
+    opens : int
+        Calls to app.documents.open.
+    closes : int
+        Documents closed to stay within the limits.
+    """
+
+    def __init__(self, max_open=32, max_memory_mb=None, size_estimator=None):
+        self.max_open = max_open
+        self.max_memory_mb = max_memory_mb
+        self.size_estimator = size_estimator or (lambda data_file: DEFAULT_DOCUMENT_MB)
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.adopted = 0
+        self.opens = 0
+        self.closes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, data_file):
+        return document_key(data_file) in self._entries
+
+    @property
+    def memory_mb(self):
+        return sum(entry.size_mb for entry in self._entries.values())
+
+    def stats(self):
+        return {"open": len(self._entries), "memory_mb": self.memory_mb, "hits": self.hits,
+                "adopted": self.adopted, "opens": self.opens, "closes": self.closes}
+
+    def open(self, data_file):
+        """Return an open FusionDocument of data_file, opening it only if necessary."""
+        key = document_key(data_file)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fdoc.isValid:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.fdoc
+
+        fdoc = self._find_open(key)
+        if fdoc is not None:
+            self.adopted += 1
+            owned = False
+        else:
+            with tracing.span("Documents.open", "adsk"):
+                fdoc = adsk.core.Application.get().documents.open(data_file)
+            self.opens += 1
+            owned = True
+        self._entries[key] = _Entry(fdoc, self.size_estimator(data_file), owned)
+        self._evict(keep=key)
+        return fdoc
+
+    def pin(self, fdoc):
+        """Keep fdoc open until it is unpinned as many times as it was pinned."""
+        self._entry_of(fdoc).pins += 1
+
+    def unpin(self, fdoc):
+        entry = self._entry_of(fdoc)
+        entry.pins = max(0, entry.pins - 1)
+        self._evict()
+
+    @contextlib.contextmanager
+    def pinned(self, data_file):
+        """Open data_file and keep it pinned for the duration of the with block."""
+        fdoc = self.open(data_file)
+        self.pin(fdoc)
+        try:
+            yield fdoc
+        finally:
+            self.unpin(fdoc)
+
+    def forget(self, fdoc):
+        """Stop tracking fdoc without closing it, such as after it was saved under a new name."""
+        for key, entry in list(self._entries.items()):
+            if entry.fdoc is fdoc:
+                del self._entries[key]
+
+    def close_all(self):
+        """Close every clean document the pool opened. Returns the number closed."""
+        closed = 0
+        for key, entry in list(self._entries.items()):
+            if self._closable(entry, ignore_pins=True):
+                entry.fdoc.close(False)
+                del self._entries[key]
+                closed += 1
+        self.closes += closed
+        return closed
+
+    def _entry_of(self, fdoc):
+        for entry in self._entries.values():
+            if entry.fdoc is fdoc:
+                return entry
+        raise KeyError("The document {} was not opened through this pool".format(fdoc.name))
+
+    def _find_open(self, key):
+        documents = adsk.core.Application.get().documents
+        for i in range(documents.count):
+            fdoc = documents.item(i)
+            data_file = fdoc.dataFile
+            if data_file is not None and document_key(data_file) == key:
+                return fdoc
+        return None
+
+    def _closable(self, entry, ignore_pins=False):
+        fdoc = entry.fdoc
+        if not fdoc.isValid:
+            return True
+        return entry.owned and (ignore_pins or entry.pins == 0) and not fdoc.isModified and not fdoc.isActive
+
+    def _over_budget(self):
+        if len(self._entries) > self.max_open:
+            return True
+        return self.max_memory_mb is not None and self.memory_mb > self.max_memory_mb
+
+    def _evict(self, keep=None):
+        """Close least recently used documents until the pool is within its limits or nothing more can be closed."""
+        for key in list(self._entries):
+            if not self._over_budget():
+                return
+            entry = self._entries[key]
+            if key == keep or not self._closable(entry):
+                continue
+            if entry.fdoc.isValid:
+                entry.fdoc.close(False)
+                self.closes += 1
+            del self._entries[key]
+
+
+_shared = None
+
+
+def shared_pool():
+    """Return the pool shared by the draw and sync functions, making it on first use."""
+    global _shared
+    if _shared is None:
+        _shared = DocumentPool()
+    return _shared
+
+
+def set_shared_pool(pool):
+    """Replace the shared pool, such as to change its limits. Returns the old pool."""
+    global _shared
+    old, _shared = _shared, pool
+    return old
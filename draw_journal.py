@@ -0,0 +1,337 @@
+"""
+An append-only journal of a draw, so that a run that dies can be resumed.
+
+A draw of hundreds of fdocs that dies part way, because Fusion crashed, the
+network dropped or a messageBox raised, would otherwise start again from the
+first fdoc. While a journal is running, the draw code appends a line to it
+for every operation that completes:
+
+* folder: a folder was found or made by sync_folder_structure,
+* drawn: draw_fdoc ran every fgen of a document,
+* saved: a save committed, with the id and version of the resulting dataFile.
+
+Starting the journal again with resume=True replays those lines, and the draw
+code skips what they say is done: draw_incremental doesn't redraw an fdoc
+saved with the same fdoc_dict, and the save helpers don't save a document
+already saved under that name in that folder. Everything else runs as usual,
+from the first operation that didn't complete.
+
+    with draw_journal.journaling("plant.journal", resume=True):
+        aide_draw.draw_incremental(folder_dict, manifest)
+
+Each line is flushed as it is written, so it survives the process dying, and
+fsynced in batches, every sync_every lines or sync_interval seconds, so it
+survives the machine going down without a disk flush per operation. A line
+that was cut short by the crash is dropped when the journal is replayed.
+
+    python draw_journal.py plant.journal
+
+prints what a resume of the journal would skip.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import collections
+
+JOURNAL_VERSION = 1
+
+BEGIN = "begin"
+FOLDER = "folder"
+DRAWN = "drawn"
+SAVED = "saved"
+
+_journal = None
+
+
+def read(file_path):
+    """Read the records of the journal at file_path.
+
+    Returns
+    -------
+    (records, length, torn) : (list of dict, int, bool)
+        The records, the bytes they take, and whether a last line that the
+        crash left incomplete was left out.
+    """
+    records = []
+    length = 0
+    with open(file_path, "rb") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete line")
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                return records, length, True
+            if record.get("op") == BEGIN and record.get("version") != JOURNAL_VERSION:
+                raise UserWarning("{} is a journal of version {}, not {}".format(
+                    file_path, record.get("version"), JOURNAL_VERSION))
+            records.append(record)
+            length += len(line)
+    return records, length, False
+
+
+class JournalState:
+    """What the records of a journal say is done.
+
+    Attributes
+    ----------
+    folders : {(parent folder id, name): folder id}
+    drawn : {document: fdoc hash}
+        The documents drawn since they were last saved.
+    saved : {key: record}
+        The committed saves, keyed by fdoc path, or by (folder id, name) for
+        the save helpers.
+    replayed : int
+        Records read back from the file.
+    torn : bool
+        Whether the last line of the file was incomplete, and left out.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.folders = {}
+        self.drawn = collections.OrderedDict()
+        self.saved = collections.OrderedDict()
+        self.replayed = 0
+        self.torn = False
+
+    @classmethod
+    def read(cls, file_path):
+        """The state of the journal at file_path, without changing the file."""
+        state = cls(file_path)
+        state._replay(*read(file_path))
+        return state
+
+    def _replay(self, records, length, torn):
+        for record in records:
+            self._apply(record)
+        self.replayed += len(records)
+        self.torn = torn
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == FOLDER:
+            self.folders[(record["parent"], record["name"])] = record["id"]
+        elif op == DRAWN:
+            self.drawn[record["document"]] = record["hash"]
+        elif op == SAVED:
+            self.drawn.pop(record["id"], None)
+            key = record["path"] if "path" in record else (record["folder"], record["name"])
+            self.saved[key] = record
+
+    def saved_fdoc(self, path, fdoc_hash):
+        """The save record of the fdoc at path, if it was saved with the same fdoc_dict, else None."""
+        record = self.saved.get(path)
+        if record is not None and record["hash"] == fdoc_hash:
+            return record
+        return None
+
+    def saved_as(self, folder, name):
+        """The save record of name in folder, or None."""
+        return self.saved.get((folder.id, name))
+
+    def report(self):
+        lines = ["{}: {} folders, {} saves committed, {} documents drawn but not saved".format(
+            self.file_path, len(self.folders), len(self.saved), len(self.drawn))]
+        for key, record in self.saved.items():
+            name = key if isinstance(key, str) else "{} in folder {}".format(key[1], key[0])
+            lines.append("  saved {:<50} {} v{}".format(name, record["id"], record["version"]))
+        for document in self.drawn:
+            lines.append("  unsaved {}".format(document))
+        if self.torn:
+            lines.append("  the last line was incomplete")
+        return "\n".join(lines)
+
+
+class Journal(JournalState):
+    """Appends completed operations to file_path. Made by start.
+
+    Parameters
+    ----------
+    file_path : str
+    resume : bool
+        Replay the journal already at file_path and append to it, rather than
+        starting a new one.
+    sync_every : int
+        Lines written between two fsyncs at most.
+    sync_interval : float
+        Seconds between two fsyncs at most, when lines are written.
+    clock : function
+        Returns the current time in seconds. Defaults to time.monotonic.
+
+    Attributes
+    ----------
+    skipped : int
+        Operations skipped because the journal had them as done.
+    records : int
+        Lines written by this run.
+    syncs : int
+        fsyncs made by this run.
+    """
+
+    def __init__(self, file_path, resume=False, sync_every=64, sync_interval=1.0, clock=None):
+        super().__init__(file_path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.clock = clock or time.monotonic
+        self.skipped = 0
+        self.records = 0
+        self.syncs = 0
+        self._unsynced = 0
+        self._last_sync = self.clock()
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        if resume and os.path.exists(file_path):
+            records, length, torn = read(file_path)
+            self._replay(records, length, torn)
+            if torn:
+                # Appending after the incomplete line would corrupt the next record.
+                with open(file_path, "r+b") as f:
+                    f.truncate(length)
+            self._file = open(file_path, "a")
+        else:
+            self._file = open(file_path, "w")
+            self._write({"op": BEGIN, "version": JOURNAL_VERSION})
+            self.sync()
+
+    def stats(self):
+        return {"folders": len(self.folders), "saved": len(self.saved), "unsaved": len(self.drawn),
+                "replayed": self.replayed, "skipped": self.skipped, "records": self.records, "syncs": self.syncs}
+
+    def folder(self, parent_folder, name, folder, created):
+        record = {"op": FOLDER, "parent": parent_folder.id, "name": name, "id": folder.id, "created": created}
+        self._apply(record)
+        self._write(record)
+
+    def document_drawn(self, document, fdoc_hash):
+        record = {"op": DRAWN, "document": document, "hash": fdoc_hash}
+        self._apply(record)
+        self._write(record)
+
+    def document_saved(self, data_file, path=None, folder=None, name=None, fdoc_hash=None):
+        """Record that data_file was saved, as the fdoc at path or as name in folder."""
+        record = {"op": SAVED, "id": data_file.id, "version": data_file.versionNumber, "hash": fdoc_hash}
+        if path is not None:
+            record["path"] = path
+        else:
+            record["folder"] = folder.id
+            record["name"] = name
+        self._apply(record)
+        self._write(record)
+
+    def skip(self):
+        self.skipped += 1
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or self.clock() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """fsync the lines written so far."""
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+            self._unsynced = 0
+        self._last_sync = self.clock()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+def current():
+    """The running Journal, or None."""
+    return _journal
+
+
+def start(file_path, resume=False, **kwargs):
+    """Start journaling to file_path and return the Journal. A journal that was already running is closed."""
+    global _journal
+    stop()
+    _journal = Journal(file_path, resume, **kwargs)
+    return _journal
+
+
+def stop():
+    """Stop journaling, closing the journal. Returns the Journal that was running, or None."""
+    global _journal
+    journal, _journal = _journal, None
+    if journal is not None:
+        journal.close()
+    return journal
+
+
+@contextlib.contextmanager
+def journaling(file_path, resume=False, **kwargs):
+    """Journal the block to file_path. Yields the Journal."""
+    journal = start(file_path, resume, **kwargs)
+    try:
+        yield journal
+    finally:
+        if _journal is journal:
+            stop()
+
+
+def folder(parent_folder, name, folder, created):
+    """Journal that folder was found, or made if created, as name in parent_folder."""
+    journal = _journal
+    if journal is not None:
+        journal.folder(parent_folder, name, folder, created)
+
+
+def drawn(fdoc, fdoc_dict):
+    """Journal that every fgen of fdoc_dict ran on fdoc."""
+    journal = _journal
+    if journal is not None:
+        # Imported here so that not journaling doesn't need it.
+        import run_manifest
+        journal.document_drawn(document_name(fdoc), run_manifest.fdoc_hash(fdoc_dict))
+
+
+def saved(data_file, folder, name):
+    """Journal that a document was saved as name in folder, giving data_file."""
+    journal = _journal
+    if journal is not None:
+        journal.document_saved(data_file, folder=folder, name=name)
+
+
+def saved_as(folder, name):
+    """Whether the running journal has name as saved in folder, in which case the save is skipped and counted."""
+    journal = _journal
+    if journal is None or journal.saved_as(folder, name) is None:
+        return False
+    journal.skip()
+    return True
+
+
+def document_name(fdoc):
+    """The document a drawn record is about: the id of fdoc's dataFile, or its name if it was never saved."""
+    data_file = fdoc.dataFile
+    return data_file.id if data_file is not None else fdoc.name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print what resuming a draw journal would skip.")
+    parser.add_argument("journal_path")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.journal_path):
+        print("{} doesn't exist".format(args.journal_path))
+        return 1
+    journal = JournalState.read(args.journal_path)
+    print(journal.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+The fgen dispatch table.
+
+Every fgen listed in fgen_registry.json is imported and checked once, when
+the table is loaded, instead of on every key of every fdoc_dict during a
+draw. The draw loop then finds the function to call with a single dict
+lookup, and fgens that are missing or broken are known before any drawing
+starts.
+"""
+
+import importlib
+import collections
+import utilities as ut
+import tracing
+
+
+class Fgen:
+    """One entry of the dispatch table.
+
+    Attributes
+    ----------
+    name : str
+        The fgen key, which is also the name of its module.
+    description : str
+        From fgen_registry.json.
+    module : module
+        The imported module, or None if it couldn't be imported.
+    generate : function
+        The module's generate_fdoc, or None if it doesn't implement one, or
+        only raises NotImplementedError.
+    update : function
+        The module's update_fdoc, or None in the same cases.
+    assets : function
+        assets(args) returns the URLs of the files the fgen downloads, see
+        asset_cache. None if the module doesn't declare any.
+    error : str
+        Why the module couldn't be imported, or None.
+    """
+
+    __slots__ = ("name", "description", "module", "generate", "update", "assets", "error")
+
+    def __init__(self, name, description, module=None, error=None):
+        self.name = name
+        self.description = description
+        self.module = module
+        self.error = error
+        self.generate = _implemented(module, "generate_fdoc")
+        self.update = _implemented(module, "update_fdoc")
+        self.assets = _assets(module)
+
+    @property
+    def available(self):
+        return self.module is not None
+
+    def __repr__(self):
+        return "Fgen({!r}, generate={}, update={}, error={!r})".format(
+            self.name, self.generate is not None, self.update is not None, self.error)
+
+
+def _stub(*args):
+    raise NotImplementedError
+
+
+def _stub_call(*args):
+    raise NotImplementedError()
+
+
+# The bytecode of a function whose body only raises NotImplementedError, whatever its arguments and docstring.
+_STUB_CODES = frozenset(stub.__code__.co_code for stub in (_stub, _stub_call))
+
+
+def _implemented(module, function_name):
+    """The module's function_name, or None if it has none, or one that only raises NotImplementedError."""
+    f = getattr(module, function_name, None)
+    if not callable(f):
+        return None
+    code = getattr(f, "__code__", None)
+    if code is not None and code.co_code in _STUB_CODES and code.co_names == ("NotImplementedError",):
+        return None
+    return f
+
+
+def _assets(module):
+    """The module's assets(args), or a function returning its ASSETS list."""
+    f = _implemented(module, "assets")
+    if f is not None:
+        return f
+    urls = getattr(module, "ASSETS", None)
+    return (lambda args: list(urls)) if urls else None
+
+
+class FgenTable:
+    """Maps fgen keys to the functions that implement them.
+
+    Parameters
+    ----------
+    registry : {str: {"description": str}}
+        The contents of fgen_registry.json.
+    """
+
+    def __init__(self, registry):
+        self.fgens = collections.OrderedDict()
+        for name, entry in registry.items():
+            try:
+                module = importlib.import_module(name)
+            except Exception as e:
+                self.fgens[name] = Fgen(name, entry.get("description"), error="{}: {}".format(type(e).__name__, e))
+            else:
+                self.fgens[name] = Fgen(name, entry.get("description"), module)
+
+    @classmethod
+    def load(cls, registry_path):
+        """Read the registry at registry_path and import every fgen in it."""
+        try:
+            registry = ut._load_json(registry_path)
+        except (IOError, OSError):
+            raise FileNotFoundError("The fgen_registry.json is missing from the root of aide_draw.")
+        return cls(registry)
+
+    def __contains__(self, name):
+        return name in self.fgens
+
+    def __iter__(self):
+        return iter(self.fgens)
+
+    @property
+    def missing(self):
+        """{fgen name: reason} for every registered fgen that can't be used."""
+        return collections.OrderedDict((name, fgen.error) for name, fgen in self.fgens.items() if not fgen.available)
+
+    def assets(self, fgen_key, args):
+        """The URLs the fgen will download when called with args."""
+        fgen = self.fgens.get(fgen_key)
+        if fgen is None or fgen.assets is None:
+            return []
+        return list(fgen.assets(args))
+
+    def check(self, fdoc_dict, skip=(), recursive=False):
+        """Make sure every fgen used in fdoc_dict is registered and importable.
+
+        Parameters
+        ----------
+        fdoc_dict : dict
+            The fdoc_dict whose keys are fgen names.
+        skip : collection of str
+            Keys that aren't fgens, such as the refs added by sync_dict.
+        recursive : bool
+            Also check the child fdoc_dicts under the "fdocs" fgen.
+
+        Raises
+        ------
+        KeyError
+            Raised listing every fgen that is used but can't be called.
+        """
+        problems = []
+        stack = [fdoc_dict]
+        while stack:
+            d = stack.pop()
+            for fgen_key, value in d.items():
+                if fgen_key in skip:
+                    continue
+                fgen = self.fgens.get(fgen_key)
+                if fgen is None:
+                    problems.append("{} isn't in the fgen_registry".format(fgen_key))
+                elif not fgen.available:
+                    problems.append("{} can't be imported ({})".format(fgen_key, fgen.error))
+                elif recursive and fgen_key == "fdocs" and isinstance(value, dict):
+                    stack.extend(v for v in value.values() if isinstance(v, dict))
+        if problems:
+            raise KeyError("Couldn't find the fgens: {}. Make sure they are defined correctly within the "
+                           "fgen_registry".format("; ".join(sorted(set(problems)))))
+
+    def run(self, fgen_key, fdoc, args):
+        """Call the fgen's update_fdoc(fdoc, args), or generate_fdoc(None, args) when there is no fdoc yet.
+
+        Fgens that don't implement the function are skipped, and so is a call
+        that raises NotImplementedError, such as for args the fgen doesn't
+        support. The table isn't changed, so later calls are made as usual.
+        Returns whatever the fgen returned.
+        """
+        fgen = self.fgens.get(fgen_key)
+        if fgen is None or not fgen.available:
+            self.check({fgen_key: args})
+        f = fgen.update if fdoc else fgen.generate
+        if f is None:
+            return None
+        try:
+            with tracing.span(fgen_key, "fgen", function=f.__name__):
+                return f(fdoc, args)
+        except NotImplementedError:
+            return None
+
+    def report(self):
+        lines = ["{:<20} {:<9} {:<9} {}".format("fgen", "generate", "update", "problem")]
+        for name, fgen in self.fgens.items():
+            lines.append("{:<20} {:<9} {:<9} {}".format(name, "yes" if fgen.generate else "no",
+                                                        "yes" if fgen.update else "no", fgen.error or ""))
+        return "\n".join(lines)
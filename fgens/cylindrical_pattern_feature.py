@@ -1,11 +1,94 @@
 """This module can take an LFOM doc, and specify the number of holes per row
 
+By default the rows are drawn in a batch: rows with the same number of holes
+share one circular pattern feature, and all the features are added or
+updated with the compute deferred, so the design is recomputed once instead
+of once per row. Features from an earlier draw are updated in place.
 """
 
+import re
+import collections
 import adsk
+import tracing
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def start(hole_list, max_holes, feature_name, seed_name, fdoc):
+# Running totals of every batch drawn this session. See PatternReport.
+stats = collections.Counter()
+
+DEFAULT_NAME_PREFIX = "cylindrical_pattern_feature"
+
+
+class PatternReport:
+    """What a single batched start call did.
+
+    Attributes
+    ----------
+    created : list of str
+        Names of the pattern features added.
+    updated : list of str
+        Names of the existing pattern features whose rows changed.
+    unchanged : list of str
+        Names of the existing pattern features that already matched.
+    deleted : list of str
+        Names of the pattern features of row sizes that are no longer used.
+    recomputes : int
+        Design recomputes caused by the changes.
+    """
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.unchanged = []
+        self.deleted = []
+        self.recomputes = 0
+
+    @property
+    def changes(self):
+        return len(self.created) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self):
+        return "PatternReport(created={}, updated={}, unchanged={}, deleted={}, recomputes={})".format(
+            len(self.created), len(self.updated), len(self.unchanged), len(self.deleted), self.recomputes)
+
+
+def pattern_groups(hole_list, max_holes):
+    """Group the rows of hole_list that need the same pattern.
+
+    Returns
+    -------
+    groups : list of (n_holes, total angle in degrees, row indexes)
+        In order of n_holes. Rows of zero or one hole need no pattern and are
+        left out.
+
+    Raises
+    ------
+    UserWarning
+        Raised when a row has more holes than max_holes.
+    """
+    if np is not None:
+        holes = np.asarray(hole_list, dtype=int).reshape(-1)
+        if holes.size and holes.max() > max_holes:
+            raise UserWarning("A row of {} holes doesn't fit in a row of at most {}".format(holes.max(), max_holes))
+        rows = np.flatnonzero(holes > 1)
+        sizes, inverse = np.unique(holes[rows], return_inverse=True)
+        angles = (sizes - 1) / max_holes * 360
+        return [(int(n), float(angle), rows[inverse == k].tolist()) for k, (n, angle) in enumerate(zip(sizes, angles))]
+
+    groups = collections.defaultdict(list)
+    for row, n_holes in enumerate(hole_list):
+        if n_holes > max_holes:
+            raise UserWarning("A row of {} holes doesn't fit in a row of at most {}".format(n_holes, max_holes))
+        if n_holes > 1:
+            groups[n_holes].append(row)
+    return [(n, (n - 1) / max_holes * 360, groups[n]) for n in sorted(groups)]
+
+
+def start(hole_list, max_holes, feature_name, seed_name, fdoc, batch=True, update=True,
+          name_prefix=DEFAULT_NAME_PREFIX):
     """Makes a number of rings of holes on a vertical cylinder
 
         Parameters
@@ -20,17 +103,30 @@ def start(hole_list, max_holes, feature_name, seed_name, fdoc):
             The name of the feature that will be copied. This can be set in the Fusion browser.
         fdoc : FusionDocument
             A FusionDocument.
+        batch : bool
+            When True (the default), rows with the same number of holes share a
+            pattern feature and the design is recomputed once. See PatternBatch.
+            When False, every row gets a feature of its own, each recomputed.
+        update : bool
+            In batch mode, update the features drawn by an earlier call with the
+            same name_prefix instead of adding new ones, and delete those that
+            are no longer needed.
+        name_prefix : str
+            In batch mode, the features are named name_prefix + "_<n>_holes".
 
         Returns
         -------
-        ids_suppressed : list of ints
-            A list of all the pattern ids that were suppressed.
+        report : PatternReport
+            In batch mode. Nothing is returned otherwise.
 
         Raises
         ------
         UserWarning
             Raised when a number of holes for a certain line is too many to fit with the proper spacing.
     """
+    if batch:
+        return PatternBatch(fdoc, feature_name, seed_name, name_prefix).draw(hole_list, max_holes, update)
+
     # ensure the fdoc passed is a Fusion Document:
     fdoc = adsk.fusion.FusionDocument.cast(fdoc)
     root_component = fdoc.design.rootComponent
@@ -71,3 +167,129 @@ def start(hole_list, max_holes, feature_name, seed_name, fdoc):
         new_feature_input.isSymmetric = True
         new_feature = circle_features.add(new_feature_input)
         new_feature.name = "cylindrical_pattern_feature_" + str(i+1)
+
+
+class PatternBatch:
+    """Draws the pattern features of a hole_list with a single recompute.
+
+    Parameters
+    ----------
+    fdoc : FusionDocument
+    feature_name : str
+        The feature whose faces are patterned for the first row.
+    seed_name : str
+        The feature whose faces are patterned for the other rows.
+    name_prefix : str
+        Names the features, name_prefix + "_<n>_holes" for rows of n holes.
+    """
+
+    def __init__(self, fdoc, feature_name, seed_name, name_prefix=DEFAULT_NAME_PREFIX):
+        self.design = adsk.fusion.FusionDocument.cast(fdoc).design
+        root_component = self.design.rootComponent
+        self.features = root_component.features
+        self.circle_features = self.features.circularPatternFeatures
+        self.y_axis = root_component.yConstructionAxis
+        self.faces = self.features.itemByName(feature_name)
+        self.seed_feature = self.features.itemByName(seed_name)
+        self.name_prefix = name_prefix
+
+    def feature_name(self, n_holes):
+        return "{}_{}_holes".format(self.name_prefix, n_holes)
+
+    @tracing.traced(category="fgen")
+    def draw(self, hole_list, max_holes, update=True):
+        """Add, update and delete pattern features so that they match hole_list.
+
+        Returns
+        -------
+        report : PatternReport
+        """
+        report = PatternReport()
+        groups = pattern_groups(hole_list, max_holes)
+        wanted = set(self.feature_name(n) for n, _, _ in groups)
+        deferred = self._defer_compute(True)
+        try:
+            for n_holes, angle, rows in groups:
+                name = self.feature_name(n_holes)
+                entities = [self._row_entity(row) for row in rows]
+                existing = self.features.itemByName(name) if update else None
+                if existing is None:
+                    self._add(name, n_holes, angle, entities)
+                    report.created.append(name)
+                elif self._update(existing, angle, entities):
+                    report.updated.append(name)
+                else:
+                    report.unchanged.append(name)
+            if update:
+                for feature in self._drawn():
+                    if feature.name not in wanted:
+                        report.deleted.append(feature.name)
+                        feature.deleteMe()
+        finally:
+            if deferred:
+                self._defer_compute(False)
+        report.recomputes = (1 if report.changes else 0) if deferred else report.changes
+
+        stats["features_created"] += len(report.created)
+        stats["features_updated"] += len(report.updated)
+        stats["features_deleted"] += len(report.deleted)
+        stats["recomputes"] += report.recomputes
+        return report
+
+    def _row_entity(self, row):
+        # The first row uses the original hole, the others the faces of the seed.
+        if row == 0:
+            return self.faces
+        return adsk.fusion.BRepFace.cast(self.seed_feature.faces[row - 1])
+
+    def _add(self, name, n_holes, angle, entities):
+        feature_input = self.circle_features.createInput(_collection(entities), self.y_axis)
+        feature_input.quantity = adsk.core.ValueInput.createByReal(n_holes)
+        feature_input.totalAngle = adsk.core.ValueInput.createByString(_angle_expression(angle))
+        feature_input.isSymmetric = True
+        feature = self.circle_features.add(feature_input)
+        feature.name = name
+        return feature
+
+    def _update(self, feature, angle, entities):
+        """Change what differs in feature. Returns whether anything did."""
+        changed = False
+        if _entities(feature.inputEntities) != entities:
+            feature.inputEntities = _collection(entities)
+            changed = True
+        expression = _angle_expression(angle)
+        if feature.totalAngle.expression != expression:
+            feature.totalAngle.expression = expression
+            changed = True
+        return changed
+
+    def _drawn(self):
+        """The pattern features named by this batch."""
+        # Exactly name_prefix + "_<n>_holes", so that a batch whose prefix starts with this one, such as the even
+        # rows of lfom under "seed_even" next to the odd rows under "seed", keeps its features.
+        pattern = re.compile(re.escape(self.name_prefix) + "_[0-9]+_holes")
+        features = [self.circle_features.item(i) for i in range(self.circle_features.count)]
+        return [f for f in features if pattern.fullmatch(f.name)]
+
+    def _defer_compute(self, defer):
+        """Turn deferred compute on or off. Returns False if the design doesn't support it."""
+        try:
+            self.design.isComputeDeferred = defer
+        except AttributeError:
+            return False
+        return True
+
+
+def _angle_expression(angle):
+    return "{:.10g} deg".format(angle)
+
+
+def _collection(entities):
+    collection = adsk.core.ObjectCollection.create()
+    for entity in entities:
+        collection.add(entity)
+    return collection
+
+
+def _entities(collection):
+    return [collection.item(i) for i in range(collection.count)]
@@ -1,6 +1,8 @@
 import adsk.core, adsk.fusion, adsk.cam
 import json_keys as keys
 import aide_draw
+import document_pool
+import adsk_proxy
 
 def generate_fdoc(fdoc, fdoc_dict):
     """Calls update_fdoc. Refer to there for documentation.
@@ -42,7 +44,7 @@ def update_fdoc(fdoc, fdoc_dict):
     """
     # Open all documents linked to this document if there are any
     try:
-        doc_refs = fdoc.documentReferences
+        doc_refs = adsk_proxy.document_references(fdoc)
     except:
         doc_refs = None
 
@@ -58,6 +60,7 @@ def update_fdoc(fdoc, fdoc_dict):
         # Go through all the referenced children
         for i in range(doc_refs.count):
             doc_ref = doc_refs.item(i)
+            child_fdoc = None
             child_fdoc_name = doc_ref.dataFile.name
             # A Rogue document is linked! What should we do with it? Other option is just delete it with a confirmation.
             if child_fdoc_name not in fdoc_dict:
@@ -71,15 +74,14 @@ def update_fdoc(fdoc, fdoc_dict):
                 if not child_fdoc.activate():
                     child_fdoc = None
             # If the dict ref doesn't work, open the file from the doc_ref. This is our last choice because it uses a
-            # server call
-            if not child_fdoc:
-                app = adsk.core.Application.get()
-                child_fdoc = app.documents.open(doc_ref.dataFile)
-
+            # server call, unless the document pool still has the document open.
             if child_fdoc:
                 aide_draw.draw_fdoc(child_fdoc, fdoc_dict[child_fdoc_name])
             else:
-                raise RuntimeError("Couldn't open the fdoc: {}".format(child_fdoc_name))
+                with document_pool.shared_pool().pinned(doc_ref.dataFile) as child_fdoc:
+                    if not child_fdoc:
+                        raise RuntimeError("Couldn't open the fdoc: {}".format(child_fdoc_name))
+                    aide_draw.draw_fdoc(child_fdoc, fdoc_dict[child_fdoc_name])
 
             # child_fdoc has been processed.
             child_fdoc_dicts_left_keys.remove(child_fdoc_name)
@@ -8,15 +8,23 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(__file__ ,"../..")))
 import adsk_utilities as a_ut
 import utilities as ut
-import urllib.request
+import template_cache
+import asset_cache
 
-def start(hole_list, max_holes, feature_name_odd, feature_name_even, seed_name_odd, seed_name_even, fdoc):
+IMAGE_URL = 'http://i3.ytimg.com/vi/J---aiyznGQ/mqdefault.jpg'
+
+# Downloaded ahead of the draw by planner.execute, see asset_cache.
+ASSETS = [IMAGE_URL]
 
-    print('Beginning file download with urllib2...')
-    url = 'http://i3.ytimg.com/vi/J---aiyznGQ/mqdefault.jpg'
-    urllib.request.urlretrieve(url, '/Users/ethankeller/Downloads/cat.jpg')
 
-    a_ut.open_template(ut.abs_path("archives/constant_head_tank.f3z"))
-    # split the list into odd and even
-    cylindrical_pattern_feature.start(hole_list[::2], max_holes, feature_name_odd, seed_name_odd, fdoc)
-    cylindrical_pattern_feature.start(hole_list[1::2], max_holes, feature_name_even, seed_name_even, fdoc)
+def start(hole_list, max_holes, feature_name_odd, feature_name_even, seed_name_odd, seed_name_even, fdoc):
+    # Served from the cache, which only asks the server once the copy is a day old.
+    asset_cache.shared_cache().fetch(IMAGE_URL)
+
+    # The tank is imported once per session and reused by every later call.
+    a_ut.open_template(ut.abs_path("archives/constant_head_tank.f3z"), cache=template_cache.shared_cache())
+    # split the list into odd and even, each with features of their own
+    cylindrical_pattern_feature.start(hole_list[::2], max_holes, feature_name_odd, seed_name_odd, fdoc,
+                                      name_prefix=seed_name_odd)
+    cylindrical_pattern_feature.start(hole_list[1::2], max_holes, feature_name_even, seed_name_even, fdoc,
+                                      name_prefix=seed_name_even)
@@ -1,10 +1,20 @@
+import re
+import collections
 import adsk
+import tracing
+
+# Running totals of every batch applied this session. See ParameterBatch.apply.
+stats = collections.Counter()
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"(?<![A-Za-z_\d.])(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
 
 def generate_fdoc(fdoc, fdoc_dict):
     raise UserWarning("The parameters fgen can only update fdocs, not generate them")
 
 
-def update_fdoc(fdoc, params_desired):
+def update_fdoc(fdoc, params_desired, batch=True):
     """Adjusts the fusion document's parameters to the desired expressions
 
     Parameters
@@ -14,6 +24,10 @@ def update_fdoc(fdoc, params_desired):
     params_desired : flat dictionary
         A dictionary without any nesting that has parameter_name:expression key
         -value pairs.
+    batch : bool
+        When True (the default), unchanged expressions are skipped and all the
+        writes share a single recompute. See ParameterBatch. When False, every
+        parameter is written one at a time.
 
     Returns
     -------
@@ -27,6 +41,9 @@ def update_fdoc(fdoc, params_desired):
         Raised when the parameter specified in 'params_desired' is not available
         in the userParameters of the FusionDocument
     """
+    if batch:
+        return ParameterBatch(fdoc).apply(params_desired).changed
+
     params = adsk.fusion.FusionDocument.cast(fdoc).design.allParameters
     params_changed = []
     # Loop through the parameters  dictionary in a single component
@@ -40,3 +57,125 @@ def update_fdoc(fdoc, params_desired):
             raise UserWarning(param_name + " is in the json, but not in the"
                 " model. All other values were changed.")
     return params_changed
+
+
+def normalize_expression(expression):
+    """Return a canonical form of a Fusion expression for comparisons.
+
+    Whitespace is dropped and numbers are rewritten in a single format, so that
+    "1 in", "1in" and "1.0 in" all compare equal.
+    """
+    expression = _WHITESPACE.sub("", str(expression))
+    return _NUMBER.sub(lambda m: repr(float(m.group(0))), expression)
+
+
+class ParameterReport:
+    """What a single ParameterBatch.apply call did.
+
+    Attributes
+    ----------
+    changed : list of str
+        Names of the parameters whose expression was written.
+    unchanged : list of str
+        Names of the parameters that already had the desired expression.
+    recomputes : int
+        Model recomputes triggered by the writes.
+    recomputes_avoided : int
+        Recomputes that writing every parameter one at a time would have cost on top of `recomputes`.
+    """
+
+    def __init__(self):
+        self.changed = []
+        self.unchanged = []
+        self.recomputes = 0
+        self.recomputes_avoided = 0
+
+    @property
+    def writes_avoided(self):
+        return len(self.unchanged)
+
+    def __repr__(self):
+        return "ParameterReport(changed={}, writes_avoided={}, recomputes={}, recomputes_avoided={})".format(
+            len(self.changed), self.writes_avoided, self.recomputes, self.recomputes_avoided)
+
+
+class ParameterBatch:
+    """Applies parameter dictionaries to one FusionDocument with as few writes and recomputes as possible.
+
+    The name to parameter map and the current expressions are read once, when
+    the batch is made. Keep the batch around to apply several dictionaries to
+    the same document, such as when generating variants of a template.
+    """
+
+    def __init__(self, fdoc):
+        self.design = adsk.fusion.FusionDocument.cast(fdoc).design
+        params = self.design.allParameters
+        self.params = {}
+        self.expressions = {}
+        for i in range(params.count):
+            param = params.item(i)
+            name = param.name
+            self.params[name] = param
+            self.expressions[name] = normalize_expression(param.expression)
+
+    @tracing.traced(category="parameters")
+    def apply(self, params_desired):
+        """Write every expression in params_desired that differs from the current one.
+
+        All writes happen with the compute deferred, so the model is recomputed
+        once at the end instead of after every write.
+
+        Returns
+        -------
+        report : ParameterReport
+
+        Raises
+        ------
+        UserWarning
+            Raised, after all the other parameters were applied, when names in
+            params_desired are not parameters of the document.
+        """
+        report = ParameterReport()
+        missing = []
+        writes = []
+        for param_name in params_desired:
+            if param_name not in self.params:
+                missing.append(param_name)
+                continue
+            expression = str(params_desired[param_name])
+            normalized = normalize_expression(expression)
+            if self.expressions[param_name] == normalized:
+                report.unchanged.append(param_name)
+            else:
+                writes.append((param_name, expression, normalized))
+
+        if writes:
+            deferred = self._defer_compute(True)
+            try:
+                for param_name, expression, normalized in writes:
+                    self.params[param_name].expression = expression
+                    self.expressions[param_name] = normalized
+                    report.changed.append(param_name)
+            finally:
+                if deferred:
+                    self._defer_compute(False)
+            report.recomputes = 1 if deferred else len(writes)
+        report.recomputes_avoided = len(params_desired) - len(missing) - report.recomputes
+
+        stats["writes"] += len(report.changed)
+        stats["writes_avoided"] += report.writes_avoided
+        stats["recomputes"] += report.recomputes
+        stats["recomputes_avoided"] += report.recomputes_avoided
+
+        if missing:
+            raise UserWarning(", ".join(missing) + " are in the json, but not in the"
+                " model. All other values were changed.")
+        return report
+
+    def _defer_compute(self, defer):
+        """Turn deferred compute on or off. Returns False if the design doesn't support it."""
+        try:
+            self.design.isComputeDeferred = defer
+        except AttributeError:
+            return False
+        return True
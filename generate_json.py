@@ -5,8 +5,10 @@ json tree from all the various document references.
 import adsk
 import json_keys as keys
 import utilities as ut
+import document_pool
+import adsk_proxy
 
-def sync_dict(folder_dict, parent_folder):
+def sync_dict(folder_dict, parent_folder, store=None):
     """
     This modifies the folder_dict, and DOES NOT TOUCH THE FUSION folders.
 
@@ -20,7 +22,19 @@ def sync_dict(folder_dict, parent_folder):
             }
         }
     }
+
+    If a parameter_snapshots.SnapshotStore store is given, the parameters of
+    files that haven't changed since they were last read come from the store,
+    and their documents aren't opened.
+
+    The folders and files are read in an adsk_proxy transaction, joining the
+    caller's if there is one, so each folder's listing is read once.
     """
+    with adsk_proxy.transaction():
+        return _sync_dict(folder_dict, parent_folder, store)
+
+
+def _sync_dict(folder_dict, parent_folder, store):
     # make sure parent_folder is a dataFolder
     try:
         parent_folder = adsk.core.DataFolder.cast(parent_folder)
@@ -29,20 +43,22 @@ def sync_dict(folder_dict, parent_folder):
             "type: dataFolder".format(parent_folder.classType()))
 
     # Add all files in the current folder if there are any:
-    file_count = parent_folder.dataFiles.count
+    files = adsk_proxy.data_files(parent_folder)
+    file_count = files.count
     if file_count >  0:
         for i in range(file_count):
-            data_file = parent_folder.dataFiles.item(i)
+            data_file = files.item(i)
             if not data_file.name + ":" + keys.FDOC_TYPE in folder_dict:
                 folder_dict[data_file.name + ":" + keys.FDOC_TYPE] = {}
-            folder_dict[data_file.name + ":" + keys.FDOC_TYPE] = sync_fdoc_dict(data_file, folder_dict[data_file.name + ":" + keys.FDOC_TYPE])
+            folder_dict[data_file.name + ":" + keys.FDOC_TYPE] = sync_fdoc_dict(data_file, folder_dict[data_file.name + ":" + keys.FDOC_TYPE], store)
 
     # Are there no folders in parent_folder?
-    folder_count = parent_folder.dataFolders.count
+    folders = adsk_proxy.data_folders(parent_folder)
+    folder_count = folders.count
     if  folder_count >  0:
         for i in range(folder_count):
             # Add the folder_dict if necessary
-            folder = parent_folder.dataFolders.item(i)
+            folder = folders.item(i)
             if folder.name not in folder_dict:
                 folder_dict[folder.name] = {}
             # Add the ref if necessary
@@ -52,17 +68,17 @@ def sync_dict(folder_dict, parent_folder):
                 raise ValueError("keyword 'ref' cannot be used within the "
                     "AIDE-JSON")
 
-            # If there are children folders, call recursively
-            if folder.dataFolders.count > 0:
+            # If there are children folders or files, call recursively
+            if adsk_proxy.data_folders(folder).count > 0 or adsk_proxy.data_files(folder).count > 0:
                 if "folders" not in folder_dict[folder.name]:
                     folder_dict[folder.name]["folders"] = {}
                 child_folder_dict = folder_dict[folder.name]["folders"]
-                folder_dict[folder.name]["folders"].update(sync_dict(child_folder_dict, folder))
+                folder_dict[folder.name]["folders"].update(_sync_dict(child_folder_dict, folder, store))
 
     return folder_dict
 
 
-def sync_fdoc_dict(data_file, fdoc_dict):
+def sync_fdoc_dict(data_file, fdoc_dict, store=None):
     # Add the file_dict if necessary
     if keys.DATA_FILE_KEY not in fdoc_dict:
         fdoc_dict[keys.DATA_FILE_KEY] = data_file
@@ -71,17 +87,25 @@ def sync_fdoc_dict(data_file, fdoc_dict):
                          "AIDE-JSON")
     # Add the parameters if necessary
     if not "parameters" in fdoc_dict:
-        fdoc_dict[keys.PARAMETERS_KEY]= get_parameter_dictionary(data_file)
+        fdoc_dict[keys.PARAMETERS_KEY]= get_parameter_dictionary(data_file, store=store)
     return fdoc_dict
 
 
-def get_parameter_dictionary(data_file):
+def get_parameter_dictionary(data_file, pool=None, store=None):
     """
     Opens the dataFile if necessary and returns a dictionary with all the
-    parameters filled in.
+    parameters filled in. The document is opened through the pool, which
+    defaults to document_pool.shared_pool(), so it is reused if already open
+    and closed again once too many documents are open. When a
+    parameter_snapshots.SnapshotStore store has a snapshot of this version of
+    the dataFile, the document isn't opened at all.
     """
-    app = adsk.core.Application.get()
-    fdoc = app.documents.open(data_file)
+    if store is not None:
+        param_d = store.get(data_file)
+        if param_d is not None:
+            return param_d
+    pool = document_pool.shared_pool() if pool is None else pool
+    fdoc = pool.open(data_file)
     params = adsk.fusion.FusionDocument.cast(fdoc).design.userParameters
     param_d = {}
     if params:
@@ -90,4 +114,6 @@ def get_parameter_dictionary(data_file):
             for i in range(param_count):
                 param = params.item(i)
                 param_d[param.name] = param.expression
+    if store is not None:
+        store.put(data_file, param_d)
     return param_d
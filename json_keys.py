@@ -9,3 +9,6 @@ FDOC_REF_KEY = "fdocs"
 FDOC_TYPE = "fdoc"
 FOLDER_TYPE = "folder"
 DATAFILE_TYPE = "data_file"
+
+# The argument of an fgen that names the template the fdoc is drawn from.
+TEMPLATE_KEY = "fdoc_template"
@@ -0,0 +1,704 @@
+"""
+Resolving inter-referenced expressions before anything is sent to Fusion.
+
+Parameters in an AIDE JSON may refer to the parameters of other fdocs with
+dotted names, following python scoping rules:
+
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "2 m", "wall": "5 mm"}},
+        "pipe:fdoc": {"parameters": {"length": "tank.height + 2 * tank.wall"}}
+    }
+
+A dotted name "a.b.param" is looked up from the fdoc that uses it outwards:
+first among the fdoc's own children, then in its folder, then the folder
+above that, and so on up to the root. A bare name refers to a parameter of the
+same fdoc. Names that can't be found (such as Fusion model parameters like
+"d12") are left for Fusion to evaluate.
+
+The ExpressionResolver builds a dependency DAG over every parameter of the
+JSON, orders it topologically, refuses cycles up front, and evaluates each
+expression to a concrete value with units. Changing one expression later only
+re-evaluates the parameters that depend on it.
+"""
+
+import re
+import math
+import functools
+import collections
+
+import json_keys as keys
+
+######################## Units ################################################
+
+# Dimensions are (length, angle, mass, time) exponents. Values are stored in
+# Fusion's internal units: cm, radians, kg and seconds.
+_DIMENSIONLESS = (0, 0, 0, 0)
+_LENGTH = (1, 0, 0, 0)
+_ANGLE = (0, 1, 0, 0)
+_MASS = (0, 0, 1, 0)
+_TIME = (0, 0, 0, 1)
+
+UNITS = {
+    "um": (1e-4, _LENGTH), "mm": (0.1, _LENGTH), "cm": (1.0, _LENGTH), "m": (100.0, _LENGTH),
+    "km": (1e5, _LENGTH), "in": (2.54, _LENGTH), "ft": (30.48, _LENGTH), "yd": (91.44, _LENGTH),
+    "mi": (160934.4, _LENGTH),
+    "deg": (math.pi / 180, _ANGLE), "rad": (1.0, _ANGLE),
+    "g": (1e-3, _MASS), "kg": (1.0, _MASS), "lb": (0.45359237, _MASS),
+    "s": (1.0, _TIME), "min": (60.0, _TIME), "hr": (3600.0, _TIME),
+}
+
+_FUNCTIONS = {
+    "sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan, "asin": math.asin,
+    "acos": math.acos, "atan": math.atan, "abs": abs, "floor": math.floor, "ceil": math.ceil,
+    "round": round, "ln": math.log, "log": math.log10, "exp": math.exp,
+}
+
+_CONSTANTS = {"pi": math.pi, "PI": math.pi}
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression can't be parsed or its units don't add up."""
+
+
+class CycleError(ValueError):
+    """Raised when parameters depend on each other in a loop.
+
+    Attributes
+    ----------
+    cycle : list of str
+        The names of the parameters in the loop, starting and ending with the same one.
+    """
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("The parameters reference each other in a cycle: {}".format(" -> ".join(cycle)))
+
+
+class Quantity:
+    """A value in Fusion's internal units with its dimension and the unit to show it in."""
+
+    __slots__ = ("value", "dims", "unit")
+
+    def __init__(self, value, dims=_DIMENSIONLESS, unit=None):
+        self.value = value
+        self.dims = dims
+        self.unit = unit
+
+    def __eq__(self, other):
+        return isinstance(other, Quantity) and self.value == other.value and self.dims == other.dims
+
+    def __repr__(self):
+        return "Quantity({!r}, {!r}, {!r})".format(self.value, self.dims, self.unit)
+
+    def to_expression(self):
+        """Format as a Fusion expression, such as "12.7 mm"."""
+        unit = self.unit
+        if unit is None or UNITS[unit][1] != self.dims:
+            unit = _DEFAULT_UNIT.get(self.dims)
+        if self.dims != _DIMENSIONLESS and unit is None:
+            raise ExpressionError("Can't express a value with dimensions {} in Fusion".format(self.dims))
+        if unit is None:
+            return _format_number(self.value)
+        return "{} {}".format(_format_number(self.value / UNITS[unit][0]), unit)
+
+
+_DEFAULT_UNIT = {_LENGTH: "cm", _ANGLE: "deg", _MASS: "kg", _TIME: "s"}
+
+
+def _format_number(x):
+    text = "{:.12g}".format(x)
+    return "0" if text == "-0" else text
+
+
+######################## Parsing ##############################################
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)"
+                    r"|([A-Za-z_][A-Za-z_0-9]*(?:\.[A-Za-z_][A-Za-z_0-9]*)*)|(\S))")
+
+# Nodes are tuples: ("num", Quantity), ("ref", name, (start, end)), ("neg", a),
+# ("+", a, b) and the other binary operators, and ("call", name, args).
+_BINARY = {"+": (10, False), "-": (10, False), "*": (20, False), "/": (20, False), "^": (40, True)}
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(("num", number, match.start(1), match.end(1)))
+        elif name is not None:
+            tokens.append(("name", name, match.start(2), match.end(2)))
+        else:
+            tokens.append(("op", op, match.start(3), match.end(3)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def parse(self):
+        node = self.expression(0)
+        if self.i != len(self.tokens):
+            raise ExpressionError("Unexpected '{}' in '{}'".format(self.tokens[self.i][1], self.text))
+        return node
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None, None, None)
+
+    def take(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ExpressionError("Unexpected end of '{}'".format(self.text))
+        self.i += 1
+        return token
+
+    def expression(self, min_power):
+        left = self.unary()
+        while True:
+            kind, value = self.peek()[:2]
+            if kind != "op" or value not in _BINARY:
+                return left
+            power, right_assoc = _BINARY[value]
+            if power < min_power:
+                return left
+            self.take()
+            right = self.expression(power if right_assoc else power + 1)
+            left = (value, left, right)
+
+    def unary(self):
+        kind, value = self.peek()[:2]
+        if kind == "op" and value == "-":
+            self.take()
+            return ("neg", self.expression(30))
+        if kind == "op" and value == "+":
+            self.take()
+            return self.expression(30)
+        return self.atom()
+
+    def atom(self):
+        kind, value, start, end = self.take()
+        if kind == "num":
+            number = float(value)
+            unit_kind, unit = self.peek()[:2]
+            if unit_kind == "name" and unit in UNITS:
+                self.take()
+                scale, dims = UNITS[unit]
+                return ("num", Quantity(number * scale, dims, unit))
+            return ("num", Quantity(number))
+        if kind == "name":
+            if self.peek()[1] == "(" and value in _FUNCTIONS:
+                self.take()
+                args = [self.expression(0)]
+                while self.peek()[1] == ",":
+                    self.take()
+                    args.append(self.expression(0))
+                self.expect(")")
+                return ("call", value, tuple(args))
+            if value in _CONSTANTS:
+                return ("num", Quantity(_CONSTANTS[value]))
+            return ("ref", value, (start, end))
+        if value == "(":
+            node = self.expression(0)
+            self.expect(")")
+            return node
+        raise ExpressionError("Unexpected '{}' in '{}'".format(value, self.text))
+
+    def expect(self, op):
+        if self.take()[1] != op:
+            raise ExpressionError("Expected '{}' in '{}'".format(op, self.text))
+
+
+# The number of expression texts whose parse is kept.
+PARSE_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(text):
+    """Parse an expression into a tuple tree. A text parsed recently isn't parsed again."""
+    return _Parser(text).parse()
+
+
+######################## Evaluation ###########################################
+
+def _add(a, b, sign):
+    if a.dims != b.dims:
+        # Fusion reads a bare number next to a length in the document units; we can't know those here.
+        raise ExpressionError("Can't add values with dimensions {} and {}".format(a.dims, b.dims))
+    return Quantity(a.value + sign * b.value, a.dims, a.unit or b.unit)
+
+
+def _combine(a, b, sign):
+    return tuple(x + sign * y for x, y in zip(a, b))
+
+
+def _apply(op, a, b=None):
+    if op == "neg":
+        return Quantity(-a.value, a.dims, a.unit)
+    if op == "+":
+        return _add(a, b, 1)
+    if op == "-":
+        return _add(a, b, -1)
+    if op == "*":
+        return Quantity(a.value * b.value, _combine(a.dims, b.dims, 1), a.unit or b.unit)
+    if op == "/":
+        if b.value == 0:
+            raise ExpressionError("Division by zero")
+        return Quantity(a.value / b.value, _combine(a.dims, b.dims, -1), a.unit or b.unit)
+    if op == "^":
+        if b.dims != _DIMENSIONLESS:
+            raise ExpressionError("Exponents must be unitless")
+        if a.dims != _DIMENSIONLESS and b.value != int(b.value):
+            raise ExpressionError("Values with units can only be raised to whole powers")
+        return Quantity(a.value ** b.value, tuple(int(d * b.value) for d in a.dims), a.unit)
+    raise ExpressionError("Unknown operator {}".format(op))
+
+
+def _call(name, args):
+    if name in ("sin", "cos", "tan"):
+        if args[0].dims not in (_ANGLE, _DIMENSIONLESS):
+            raise ExpressionError("{} needs an angle".format(name))
+        return Quantity(_FUNCTIONS[name](args[0].value))
+    if name in ("asin", "acos", "atan"):
+        return Quantity(_FUNCTIONS[name](args[0].value), _ANGLE, "deg")
+    if name == "sqrt":
+        if any(d % 2 for d in args[0].dims):
+            raise ExpressionError("Can't take the square root of {}".format(args[0].dims))
+        return Quantity(math.sqrt(args[0].value), tuple(d // 2 for d in args[0].dims), args[0].unit)
+    if name in ("abs", "floor", "ceil", "round"):
+        return Quantity(_FUNCTIONS[name](args[0].value), args[0].dims, args[0].unit)
+    return Quantity(_FUNCTIONS[name](args[0].value))
+
+
+######################## The resolver #########################################
+
+class _Scope:
+    """A folder or an fdoc in the AIDE tree."""
+
+    __slots__ = ("name", "parent", "children", "params")
+
+    def __init__(self, name, parent, params=None):
+        self.name = name
+        self.parent = parent
+        self.children = {}
+        self.params = params
+
+    def path(self):
+        names = []
+        scope = self
+        while scope.parent is not None:
+            names.append(scope.name)
+            scope = scope.parent
+        return tuple(reversed(names))
+
+
+class _Compiled:
+    """A parsed expression whose references have been bound to parameter ids."""
+
+    __slots__ = ("text", "node", "refs", "external")
+
+    def __init__(self, text, node, refs, external):
+        self.text = text
+        self.node = node
+        self.refs = refs
+        self.external = external
+
+
+def param_name(param_id):
+    """Format a parameter id, a (fdoc_path, name) tuple, as "folder/fdoc.param"."""
+    return "/".join(param_id[0]) + "." + param_id[1]
+
+
+class ExpressionResolver:
+    """Evaluates every parameter expression of an AIDE dictionary without Fusion.
+
+    Parameters
+    ----------
+    aide_dict : dict
+        An AIDE-compliant dictionary, as loaded from the JSON.
+
+    Attributes
+    ----------
+    expressions : {param_id: str}
+        The expression of every parameter. A param_id is a (fdoc_path, name)
+        tuple, where fdoc_path is a tuple of the folder and fdoc names.
+    order : list of param_id
+        Every parameter in an order where dependencies come first.
+    evaluations : int
+        The number of expressions evaluated so far.
+    memo_hits : int
+        The number of subexpression evaluations served from the memo.
+
+    Raises
+    ------
+    CycleError
+        Raised when parameters reference each other in a loop.
+    """
+
+    def __init__(self, aide_dict):
+        self.expressions = collections.OrderedDict()
+        self._scopes = {}
+        self._compiled = {}
+        self._deps = {}
+        self._dependents = collections.defaultdict(set)
+        self._values = {}
+        self._errors = {}
+        self._generation = collections.defaultdict(int)
+        # {memo key: (Quantity, params whose current value used it)}, and {param_id: memo keys it used}.
+        self._memo = {}
+        self._memo_used = {}
+        self.evaluations = 0
+        self.memo_hits = 0
+        self._order = None
+
+        self._root = _Scope("", None)
+        self._collect_folder(aide_dict, self._root)
+        for param_id, text in self.expressions.items():
+            self._compile(param_id, text)
+        self._order = self._toposort()
+        for param_id in self._order:
+            self._evaluate(param_id)
+
+    ########################## Building the tree ##############################
+
+    def _collect_folder(self, folder_dict, scope):
+        for k, v in folder_dict.items():
+            if not isinstance(v, dict):
+                continue
+            name, _, key_type = k.partition(":")
+            if key_type == keys.FDOC_TYPE:
+                self._collect_fdoc(v, self._child(scope, name, v))
+            elif key_type == keys.FOLDER_TYPE:
+                self._collect_folder(v, self._child(scope, name))
+            elif k == keys.FDOC_REF_KEY:
+                for child_name, child_dict in v.items():
+                    self._collect_fdoc(child_dict, self._child(scope, child_name.partition(":")[0], child_dict))
+            elif not key_type and "folders" in v:
+                # The layout made by generate_json.sync_dict
+                self._collect_folder(v["folders"], self._child(scope, name))
+
+    def _collect_fdoc(self, fdoc_dict, scope):
+        for k, v in fdoc_dict.items():
+            if not isinstance(v, dict):
+                continue
+            if k == keys.FDOC_REF_KEY:
+                for child_name, child_dict in v.items():
+                    self._collect_fdoc(child_dict, self._child(scope, child_name.partition(":")[0], child_dict))
+            elif k.partition(":")[2] == keys.FDOC_TYPE:
+                self._collect_fdoc(v, self._child(scope, k.partition(":")[0], v))
+
+    def _child(self, scope, name, fdoc_dict=None):
+        params = None
+        if fdoc_dict is not None:
+            params = fdoc_dict.get(keys.PARAMETERS_KEY)
+            params = params if isinstance(params, dict) else {}
+        child = _Scope(name, scope, params)
+        scope.children[name] = child
+        if params is not None:
+            path = child.path()
+            self._scopes[path] = child
+            for param, text in params.items():
+                self.expressions[(path, param)] = str(text)
+        return child
+
+    ########################## Binding references #############################
+
+    def _lookup(self, scope, name):
+        """Bind a name used in the fdoc `scope` to a param_id, or None if it isn't an AIDE parameter."""
+        parts = name.split(".")
+        if len(parts) == 1:
+            return (scope.path(), name) if name in scope.params else None
+        outer = scope
+        while outer is not None:
+            target = outer
+            for part in parts[:-1]:
+                target = target.children.get(part)
+                if target is None:
+                    break
+            if target is not None and target.params is not None and parts[-1] in target.params:
+                return (target.path(), parts[-1])
+            outer = outer.parent
+        return None
+
+    def _compile(self, param_id, text):
+        scope = self._scopes[param_id[0]]
+        try:
+            node = parse(text)
+        except ExpressionError as e:
+            self._compiled[param_id] = _Compiled(text, None, {}, True)
+            self._errors[param_id] = e
+            self._set_deps(param_id, set())
+            return
+        refs = {}
+        external = False
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n[0] == "ref":
+                target = self._lookup(scope, n[1])
+                if target is None:
+                    external = True
+                else:
+                    refs[n[1]] = target
+            elif n[0] == "call":
+                stack.extend(n[2])
+            elif n[0] != "num":
+                stack.extend(n[1:])
+        self._compiled[param_id] = _Compiled(text, node, refs, external)
+        self._set_deps(param_id, set(refs.values()))
+
+    def _set_deps(self, param_id, deps):
+        for old in self._deps.get(param_id, ()):
+            self._dependents[old].discard(param_id)
+        self._deps[param_id] = deps
+        for dep in deps:
+            self._dependents[dep].add(param_id)
+
+    ########################## Ordering #######################################
+
+    @property
+    def order(self):
+        if self._order is None:
+            self._order = self._toposort()
+        return self._order
+
+    def _toposort(self):
+        """Kahn's algorithm over every parameter. Raises CycleError if any are left over."""
+        remaining = {p: len(self._deps[p]) for p in self.expressions}
+        ready = collections.deque(p for p, n in remaining.items() if n == 0)
+        order = []
+        while ready:
+            p = ready.popleft()
+            order.append(p)
+            for dependent in self._dependents[p]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.expressions):
+            raise CycleError(self._find_cycle(set(p for p, n in remaining.items() if n > 0)))
+        return order
+
+    def _find_cycle(self, candidates):
+        start = next(iter(sorted(candidates)))
+        seen = []
+        p = start
+        while p not in seen:
+            seen.append(p)
+            p = next(d for d in sorted(self._deps[p]) if d in candidates)
+        cycle = seen[seen.index(p):] + [p]
+        return [param_name(c) for c in cycle]
+
+    ########################## Evaluation #####################################
+
+    def _evaluate(self, param_id):
+        compiled = self._compiled[param_id]
+        self.evaluations += 1
+        self._generation[param_id] += 1
+        self._values.pop(param_id, None)
+        used = set()
+        try:
+            if compiled.node is None or compiled.external:
+                return
+            for dep in compiled.refs.values():
+                if dep not in self._values:
+                    self._errors[param_id] = ExpressionError("{} depends on {}, which can't be resolved".format(
+                        param_name(param_id), param_name(dep)))
+                    return
+            try:
+                value = self._eval_node(compiled.node, compiled.refs, used)[0]
+                value.to_expression()
+                self._values[param_id] = value
+                self._errors.pop(param_id, None)
+            except (ExpressionError, ArithmeticError, ValueError) as e:
+                self._errors[param_id] = e
+        finally:
+            self._keep_memo(param_id, used)
+
+    def _keep_memo(self, param_id, used):
+        """Record that param_id's value used the memo keys used, and drop the keys nothing uses any more.
+
+        A key holds the generations of the parameters it read. Every parameter
+        reading an older generation is re-evaluated with it, so the memo only
+        keeps the subexpressions of the current values.
+        """
+        for key in used:
+            self._memo[key][1].add(param_id)
+        old = self._memo_used.get(param_id, ())
+        self._memo_used[param_id] = used
+        for key in old:
+            if key not in used:
+                users = self._memo[key][1]
+                users.discard(param_id)
+                if not users:
+                    del self._memo[key]
+
+    def _eval_node(self, node, refs, used):
+        """Evaluate node, adding the memo keys it used to used.
+
+        Returns (Quantity, memo_key) where the key identifies the subexpression and its inputs.
+        """
+        kind = node[0]
+        if kind == "num":
+            q = node[1]
+            return q, (q.value, q.dims, q.unit)
+        if kind == "ref":
+            target = refs[node[1]]
+            return self._values[target], (target, self._generation[target])
+        if kind == "call":
+            results = [self._eval_node(arg, refs, used) for arg in node[2]]
+            key = (kind, node[1]) + tuple(r[1] for r in results)
+            args = [r[0] for r in results]
+        elif kind == "neg":
+            result = self._eval_node(node[1], refs, used)
+            key = (kind, result[1])
+            args = [result[0]]
+        else:
+            left = self._eval_node(node[1], refs, used)
+            right = self._eval_node(node[2], refs, used)
+            key = (kind, left[1], right[1])
+            args = [left[0], right[0]]
+        entry = self._memo.get(key)
+        if entry is not None:
+            self.memo_hits += 1
+            used.add(key)
+            return entry[0], key
+        value = _call(node[1], args) if kind == "call" else _apply(kind, *args)
+        self._memo[key] = (value, set())
+        used.add(key)
+        return value, key
+
+    ########################## Results ########################################
+
+    def value(self, param_id):
+        """Return the Quantity of a parameter, or None if Fusion has to evaluate it."""
+        return self._values.get(param_id)
+
+    def error(self, param_id):
+        """Return why a parameter couldn't be resolved, or None."""
+        return self._errors.get(param_id)
+
+    def concrete(self, param_id):
+        """Return the expression to hand to Fusion for a parameter.
+
+        This is the concrete value when it could be resolved. Otherwise it is the
+        original expression with every reference to another fdoc's parameter
+        replaced by that parameter's concrete value, so Fusion can evaluate the rest.
+        """
+        if param_id in self._values:
+            return self._values[param_id].to_expression()
+        compiled = self._compiled[param_id]
+        if compiled.node is None:
+            return compiled.text
+        spans = []
+        stack = [compiled.node]
+        while stack:
+            n = stack.pop()
+            if n[0] == "ref":
+                target = compiled.refs.get(n[1])
+                if target is not None and target[0] != param_id[0]:
+                    spans.append((n[2], self.concrete(target)))
+            elif n[0] == "call":
+                stack.extend(n[2])
+            elif n[0] != "num":
+                stack.extend(n[1:])
+        text = compiled.text
+        for (start, end), replacement in sorted(spans, reverse=True):
+            text = text[:start] + "(" + replacement + ")" + text[end:]
+        return text
+
+    def dependencies(self, param_id):
+        """Return the param_ids that param_id references directly."""
+        return set(self._deps[param_id])
+
+    def fdoc_dependencies(self):
+        """Return {fdoc_path: set of other fdoc_paths whose parameters it references}."""
+        fdoc_deps = collections.defaultdict(set)
+        for param_id, deps in self._deps.items():
+            fdoc_deps[param_id[0]]
+            for dep in deps:
+                if dep[0] != param_id[0]:
+                    fdoc_deps[param_id[0]].add(dep[0])
+        return dict(fdoc_deps)
+
+    def resolve(self):
+        """Return {param_id: concrete expression} for every parameter."""
+        return collections.OrderedDict((p, self.concrete(p)) for p in self.expressions)
+
+    def set_expression(self, param_id, text):
+        """Change one expression and re-evaluate only the parameters downstream of it.
+
+        Returns
+        -------
+        affected : list of param_id
+            The parameters that were re-evaluated, in dependency order.
+
+        Raises
+        ------
+        CycleError
+            Raised, leaving the old expression in place, when the change would add a cycle.
+        """
+        if param_id not in self.expressions:
+            raise KeyError(param_name(param_id))
+        old_text = self.expressions[param_id]
+        self.expressions[param_id] = str(text)
+        self._compile(param_id, str(text))
+
+        cone = set()
+        queue = collections.deque([param_id])
+        while queue:
+            p = queue.popleft()
+            if p in cone:
+                continue
+            cone.add(p)
+            queue.extend(self._dependents[p])
+        try:
+            ordered = self._order_cone(cone)
+        except CycleError:
+            self.expressions[param_id] = old_text
+            self._compile(param_id, old_text)
+            raise
+        for p in ordered:
+            self._evaluate(p)
+        return ordered
+
+    def _order_cone(self, cone):
+        remaining = {p: len([d for d in self._deps[p] if d in cone]) for p in cone}
+        ready = collections.deque(p for p, n in remaining.items() if n == 0)
+        order = []
+        while ready:
+            p = ready.popleft()
+            order.append(p)
+            for dependent in self._dependents[p]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(cone):
+            raise CycleError(self._find_cycle(set(p for p, n in remaining.items() if n > 0)))
+        # The edges changed, so the global order is rebuilt the next time it is asked for.
+        self._order = None
+        return order
+
+    def apply(self, aide_dict):
+        """Write the concrete expressions back into the parameters of aide_dict, which must be the dict this
+        resolver was built from. Returns aide_dict."""
+        resolved = self.resolve()
+        for (path, name), text in resolved.items():
+            self._scopes[path].params[name] = text
+        return aide_dict
+
+
+def resolve_expressions(aide_dict):
+    """Replace every resolvable parameter expression in aide_dict with a concrete value. Returns aide_dict.
+
+    Raises
+    ------
+    CycleError
+        Raised when parameters reference each other in a loop.
+    """
+    return ExpressionResolver(aide_dict).apply(aide_dict)
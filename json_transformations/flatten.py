@@ -0,0 +1,305 @@
+"""
+Flatten nested dictionaries, such as AIDE JSONs, into {key path: value} and back.
+
+Unlike third_party/flatten_dict, the walk uses an explicit stack instead of
+recursion, and doesn't need six or collections.Mapping. The keys of the
+branch being walked are kept in one list, so each flat key is built once, at
+its leaf, instead of every prefix being rebuilt at every level.
+
+    flat = flatten({"plant:folder": {"tank:fdoc": {"parameters": {"height": "1 m"}}}})
+    # {("plant:folder", "tank:fdoc", "parameters", "height"): "1 m"}
+    flatten(d, reducer="aide")
+    # {("plant", "tank", "parameters", "height"): "1 m"}
+    unflatten(flat) == d
+
+Reducers decide what the flat keys look like:
+
+* "tuple": a tuple of the keys.
+* "path": the keys joined with "/".
+* "aide": a tuple of the keys with their ":type" dropped. This matches the
+  paths used by utilities.iter_fdocs and json_transformations.expressions.
+  Types can't be recovered from it, so it can't be unflattened.
+
+A reducer can also be any function f(prefix, key), where prefix is None at
+the top level. It is called once per dictionary and key.
+
+Empty dictionaries are kept as values, so unflatten(flatten(d)) == d.
+flatten_many flattens many dictionaries at once and shares equal key tuples
+between them. fdoc_parameters uses it to flatten the parameters of many
+fdocs, which run_manifest compares with diff to say which parameters of an
+fdoc changed since the last run.
+"""
+
+import sys
+import collections
+from collections.abc import Mapping
+
+from aide_schema import parse_key
+
+PATH_SEPARATOR = "/"
+
+
+def tuple_reducer(prefix, key):
+    if prefix is None:
+        return (key,)
+    return prefix + (key,)
+
+
+def path_reducer(prefix, key):
+    if prefix is None:
+        return sys.intern(key)
+    return sys.intern(prefix + PATH_SEPARATOR + key)
+
+
+def aide_reducer(prefix, key):
+    name = parse_key(key)[0] if isinstance(key, str) else key
+    if prefix is None:
+        return (name,)
+    return prefix + (name,)
+
+
+REDUCERS = {
+    "tuple": tuple_reducer,
+    "path": path_reducer,
+    "aide": aide_reducer,
+}
+
+
+def _join_path(keys):
+    return sys.intern(PATH_SEPARATOR.join(keys))
+
+
+def _name(key):
+    return parse_key(key)[0] if isinstance(key, str) else key
+
+
+# What flatten does with the keys of a named reducer, to build each flat key once, at its leaf:
+# {reducer: (the part a key adds, or None for the key itself, a function of the list of parts)}.
+_LEAF_REDUCERS = {
+    "tuple": (None, tuple),
+    "path": (None, _join_path),
+    "aide": (_name, tuple),
+}
+
+
+def _splitter(reducer):
+    if reducer == "tuple":
+        return lambda key: key
+    if reducer == "path":
+        return lambda key: key.split(PATH_SEPARATOR)
+    if callable(reducer):
+        return reducer
+    raise ValueError("Can't unflatten keys made by the '{}' reducer".format(reducer))
+
+
+def _is_mapping(value):
+    return type(value) is dict or isinstance(value, Mapping)
+
+
+def flatten(d, reducer="tuple", inverse=False, _shared=None):
+    """Flatten the dict-like object d.
+
+    Parameters
+    ----------
+    d : dict-like object
+        The dict that will be flattened.
+    reducer : {"tuple", "path", "aide", function}
+        How the keys are joined. See the module docstring.
+    inverse : bool
+        Return {value: flat key} instead. The values must then be unique.
+
+    Returns
+    -------
+    flat_dict : dict
+
+    Raises
+    ------
+    ValueError
+        Raised when inverse is True and a value occurs twice.
+    """
+    if not isinstance(reducer, str):
+        return _flatten_folded(d, reducer, inverse)
+    part_of, join = _LEAF_REDUCERS[reducer]
+    flat = {}
+    # The parts of the keys of the dictionaries being walked, one per level below the top.
+    parts = []
+    stack = [iter(d.items())]
+    while stack:
+        for key, value in stack[-1]:
+            parts.append(key if part_of is None else part_of(key))
+            if value and _is_mapping(value):
+                # Descend, and come back to the rest of the items afterwards.
+                stack.append(iter(value.items()))
+                break
+            flat_key = join(parts)
+            parts.pop()
+            if _shared is not None:
+                flat_key = _shared.setdefault(flat_key, flat_key)
+            if inverse:
+                _put_inverse(flat, flat_key, value)
+            else:
+                flat[flat_key] = value
+        else:
+            stack.pop()
+            if parts:
+                parts.pop()
+    return flat
+
+
+def _flatten_folded(d, reduce, inverse):
+    """flatten with a reducer function, folding each key into the flat key of its dictionary."""
+    flat = {}
+    stack = [(None, iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for key, value in items:
+            flat_key = reduce(prefix, key)
+            if value and _is_mapping(value):
+                stack.append((flat_key, iter(value.items())))
+                break
+            if inverse:
+                _put_inverse(flat, flat_key, value)
+            else:
+                flat[flat_key] = value
+        else:
+            stack.pop()
+    return flat
+
+
+def _put_inverse(flat, flat_key, value):
+    if value in flat:
+        raise ValueError("duplicated key '{}'".format(value))
+    flat[value] = flat_key
+
+
+def unflatten(flat, splitter="tuple", inverse=False):
+    """Rebuild the nested dictionary from a flat one made by flatten.
+
+    Parameters
+    ----------
+    flat : dict
+    splitter : {"tuple", "path", function}
+        The reducer that made the flat keys, or a function that splits a flat
+        key into a sequence of keys.
+    inverse : bool
+        Whether flat maps values to flat keys, as made by flatten(..., inverse=True).
+
+    Raises
+    ------
+    ValueError
+        Raised when a key is both a value and the prefix of other keys.
+    """
+    split = _splitter(splitter)
+    d = {}
+    items = ((v, k) for k, v in flat.items()) if inverse else flat.items()
+    for flat_key, value in items:
+        keys = split(flat_key)
+        node = d
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if not isinstance(child, dict):
+                raise ValueError("{!r} is both a value and a prefix".format(flat_key))
+            node = child
+        if keys[-1] in node and isinstance(node[keys[-1]], dict) and node[keys[-1]]:
+            raise ValueError("{!r} is both a value and a prefix".format(flat_key))
+        node[keys[-1]] = value
+    return d
+
+
+def flatten_many(dicts, reducer="tuple"):
+    """Flatten every dictionary in dicts, sharing the key tuples they have in common.
+
+    When flattening the fdoc_dicts of a plant, the same key paths, such as
+    ("parameters", "length"), come up in thousands of dictionaries. Here
+    each is built and stored once.
+
+    Parameters
+    ----------
+    dicts : iterable of dict, or dict of dicts
+        When a dict is given, a dict of the flattened values is returned
+        under the same keys.
+
+    Returns
+    -------
+    flat_dicts : list of dict, or dict of dicts
+    """
+    shared = {}
+    if isinstance(dicts, dict):
+        return {k: flatten(d, reducer, _shared=shared) for k, d in dicts.items()}
+    return [flatten(d, reducer, _shared=shared) for d in dicts]
+
+
+class FlatDiff:
+    """The difference between two flat dictionaries.
+
+    Attributes
+    ----------
+    added : dict
+        {key: new value} of keys only in the new dictionary.
+    removed : dict
+        {key: old value} of keys only in the old dictionary.
+    changed : dict
+        {key: (old value, new value)} of keys whose value changed.
+    """
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return "FlatDiff(added={}, removed={}, changed={})".format(
+            len(self.added), len(self.removed), len(self.changed))
+
+
+def diff(old, new):
+    """Compare the flat dictionaries old and new. Returns a FlatDiff."""
+    added = {k: v for k, v in new.items() if k not in old}
+    removed = {k: v for k, v in old.items() if k not in new}
+    changed = {k: (old[k], v) for k, v in new.items() if k in old and old[k] != v}
+    return FlatDiff(added, removed, changed)
+
+
+def fdoc_parameters(fdoc_dicts):
+    """The parameters of many fdoc_dicts, flattened with flatten_many.
+
+    Parameters
+    ----------
+    fdoc_dicts : {fdoc_path: fdoc_dict}
+
+    Returns
+    -------
+    parameters : {fdoc_path: {(linked fdoc names..., parameter name): value}}
+        Parameters of linked fdocs under "fdocs" are included, keyed by the
+        names of the linked fdocs followed by the parameter name.
+    """
+    parameters = {}
+    for path, fdoc_flat in flatten_many(fdoc_dicts, "aide").items():
+        flat = parameters[path] = {}
+        for key, value in fdoc_flat.items():
+            # Keys look like ("parameters", name), with any ("fdocs", child name) pairs in front.
+            n = len(key) - 2
+            if n >= 0 and n % 2 == 0 and key[n] == "parameters" and \
+                    all(key[i] == "fdocs" for i in range(0, n, 2)):
+                flat[key[1:n:2] + (key[-1],)] = value
+    return parameters
+
+
+def parameter_diff(old_tree, new_tree):
+    """Which parameters differ between two AIDE-compliant folder dictionaries.
+
+    Returns a FlatDiff keyed by (fdoc_path, parameter name), where fdoc_path
+    is the tuple of names given by utilities.iter_fdocs. Parameters of linked
+    fdocs under "fdocs" are included, with the linked names added to the path.
+    """
+    import utilities as ut
+
+    def parameters(tree):
+        fdoc_dicts = collections.OrderedDict(ut.iter_fdocs(tree))
+        return {(path + key[:-1], key[-1]): value
+                for path, flat in fdoc_parameters(fdoc_dicts).items() for key, value in flat.items()}
+
+    return diff(parameters(old_tree), parameters(new_tree))
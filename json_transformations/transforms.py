@@ -0,0 +1,174 @@
+"""
+Transforms of nested dictionaries, fused into a single pass over the tree.
+
+A transform decides which keys to keep and what each leaf value becomes.
+Several transforms given together run in one traversal:
+
+    clean = apply(synced_dict, strip_refs(), strip_type("data_file"), map_values(f))
+    dump(synced_dict, f, strip_refs())      # written straight to a file object
+    save(synced_dict, "plant.json", strip_refs())
+
+apply shares every subtree that the transforms leave unchanged with the
+input instead of copying it, so stripping the refs of a synced tree only
+copies the dictionaries that held refs and the dictionaries above them. dump
+and save don't build the result at all; they write it as it is walked.
+
+Only dictionaries are walked. Everything else, lists included, is a leaf.
+Both walks use an explicit stack, so deep trees don't hit the recursion limit.
+"""
+
+import os
+import json
+
+import json_keys as keys
+from aide_schema import parse_key
+
+# The keys that hold live Fusion objects. "ref" is the key used by utilities.add_ref.
+REF_KEYS = frozenset([keys.DATA_FOLDER_KEY, keys.DATA_FILE_KEY, "ref"])
+
+
+class Transform:
+    """A single transform.
+
+    Parameters
+    ----------
+    keep : function, optional
+        keep(key) returns False for the keys to remove, along with their values.
+    leaf : function, optional
+        leaf(key, value) returns the new value of a leaf.
+    """
+
+    __slots__ = ("keep", "leaf")
+
+    def __init__(self, keep=None, leaf=None):
+        self.keep = keep
+        self.leaf = leaf
+
+
+def strip_keys(predicate):
+    """Remove every key for which predicate(key) is True."""
+    return Transform(keep=lambda k: not predicate(k))
+
+
+def strip_type(*types):
+    """Remove every "name:type" key whose type is one of types."""
+    types = frozenset(types)
+    return Transform(keep=lambda k: not (isinstance(k, str) and parse_key(k)[1] in types))
+
+
+def strip_refs():
+    """Remove the keys holding Fusion objects, such as those added by sync_dict."""
+    return Transform(keep=lambda k: k not in REF_KEYS)
+
+
+def map_values(f):
+    """Replace the value of every leaf with f(key, value)."""
+    return Transform(leaf=f)
+
+
+class _Fused:
+    """Several transforms as one."""
+
+    def __init__(self, transforms):
+        self.keeps = [t.keep for t in transforms if t.keep is not None]
+        self.leaves = [t.leaf for t in transforms if t.leaf is not None]
+
+    def keep(self, key):
+        for keep in self.keeps:
+            if not keep(key):
+                return False
+        return True
+
+    def leaf(self, key, value):
+        for leaf in self.leaves:
+            value = leaf(key, value)
+        return value
+
+
+def apply(d, *transforms):
+    """Return d with the transforms applied, sharing the unchanged subtrees of d."""
+    fused = _Fused(transforms)
+    # Frames are [dict, items iterator, new items, changed]; a finished frame hands its result to its parent.
+    stack = [[d, iter(d.items()), [], False]]
+    while True:
+        frame = stack[-1]
+        descended = False
+        for key, value in frame[1]:
+            if not fused.keep(key):
+                frame[3] = True
+                continue
+            if isinstance(value, dict):
+                frame[2].append([key, value])
+                stack.append([value, iter(value.items()), [], False])
+                descended = True
+                break
+            new_value = fused.leaf(key, value) if fused.leaves else value
+            frame[3] = frame[3] or new_value is not value
+            frame[2].append([key, new_value])
+        if descended:
+            continue
+        stack.pop()
+        result = dict(frame[2]) if frame[3] else frame[0]
+        if not stack:
+            return result
+        parent = stack[-1]
+        parent[2][-1][1] = result
+        parent[3] = parent[3] or result is not frame[0]
+
+
+def iter_json(d, *transforms, indent=None):
+    """Yield the JSON text of d with the transforms applied, a piece at a time."""
+    fused = _Fused(transforms)
+    newline = "\n" if indent is not None else ""
+    pad = " " * indent if indent is not None else ""
+    item_separator = "," if indent is not None else ", "
+    stack = [(iter(d.items()), 1)]
+    first = True
+    yield "{"
+    while stack:
+        items, depth = stack[-1]
+        for key, value in items:
+            if not fused.keep(key):
+                continue
+            if not isinstance(key, str):
+                key = str(key)
+            yield ("" if first else item_separator) + newline + pad * depth + json.dumps(key) + ": "
+            if isinstance(value, dict):
+                stack.append((iter(value.items()), depth + 1))
+                first = True
+                yield "{"
+                break
+            first = False
+            text = json.dumps(fused.leaf(key, value) if fused.leaves else value, indent=indent)
+            # Lists are indented as json.dumps would, from the depth they are at.
+            yield text.replace("\n", newline + pad * depth) if indent is not None else text
+        else:
+            stack.pop()
+            yield ("" if first else newline + pad * (depth - 1)) + "}"
+            first = False
+
+
+def dump(d, f, *transforms, indent=2):
+    """Write d with the transforms applied to the file object f, without building it in memory."""
+    for chunk in iter_json(d, *transforms, indent=indent):
+        f.write(chunk)
+
+
+def save(d, file_path, *transforms, indent=2):
+    """Write d with the transforms applied to file_path, creating its folder if needed.
+
+    The JSON is written next to file_path first and moved into place when
+    complete, so an interrupted save never leaves a half written file.
+    """
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    tmp_path = file_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            dump(d, f, *transforms, indent=indent)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return file_path
@@ -0,0 +1,142 @@
+"""
+A persistent store of the user parameters of every dataFile version seen.
+
+generate_json.sync_dict needs the parameter names and expressions of every
+file in the folder tree, and the only way to read them is to open (download)
+the document. A version of a dataFile never changes once it is saved, so the
+parameters read from it can be kept for good. The SnapshotStore keeps them in
+a SQLite database keyed by dataFile id, together with the version number they
+were read from, and the document is only opened again when the file has a
+newer version.
+
+    store = parameter_snapshots.SnapshotStore.for_project()
+    folder_dict = generate_json.sync_dict({}, root_folder, store=store)
+    store.prune()
+    store.close()
+"""
+
+import os
+import json
+import sqlite3
+import adsk
+
+SCHEMA_VERSION = 1
+
+
+def default_store_path(project):
+    """Return where the store of `project` lives on disk: ~/.aide/parameter_snapshots/<project id>.sqlite"""
+    safe_id = "".join(c if c.isalnum() else "_" for c in project.id)
+    return os.path.join(os.path.expanduser("~"), ".aide", "parameter_snapshots", safe_id + ".sqlite")
+
+
+class SnapshotStore:
+    """Maps dataFile ids to the parameters of the last version read.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        The SQLite database the snapshots are kept in. When None, they are
+        only kept in memory for the life of the store.
+
+    Attributes
+    ----------
+    hits : int
+        Lookups served by a snapshot of the same version.
+    misses : int
+        Lookups of files that had no snapshot.
+    outdated : int
+        Lookups of files whose snapshot was of an older version.
+    pruned : int
+        Snapshots deleted by prune.
+    seen : set of str
+        The ids of the files looked up or stored since the store was made.
+    """
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        if file_path:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+        self._db = sqlite3.connect(file_path or ":memory:")
+        self._db.execute("CREATE TABLE IF NOT EXISTS snapshots "
+                         "(file_id TEXT PRIMARY KEY, version INTEGER NOT NULL, parameters TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or int(row[0]) != SCHEMA_VERSION:
+            self._db.execute("DELETE FROM snapshots")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.outdated = 0
+        self.pruned = 0
+        self.seen = set()
+
+    @classmethod
+    def for_project(cls, project=None):
+        """Return the on-disk store of `project`, defaulting to the active project."""
+        if project is None:
+            project = adsk.core.Application.get().data.activeProject
+        return cls(default_store_path(project))
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def stats(self):
+        return {"snapshots": len(self), "hits": self.hits, "misses": self.misses, "outdated": self.outdated,
+                "pruned": self.pruned}
+
+    def get(self, data_file):
+        """Return {name: expression} of data_file's parameters, or None if this version has no snapshot."""
+        file_id = data_file.id
+        self.seen.add(file_id)
+        row = self._db.execute("SELECT version, parameters FROM snapshots WHERE file_id = ?",
+                               (file_id,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if row[0] != data_file.versionNumber:
+            self.outdated += 1
+            return None
+        self.hits += 1
+        return json.loads(row[1])
+
+    def put(self, data_file, parameters):
+        """Remember the parameters read from data_file, replacing the snapshot of any older version.
+
+        Snapshots are written to disk by commit, prune and close.
+        """
+        file_id = data_file.id
+        self.seen.add(file_id)
+        self._db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                         (file_id, data_file.versionNumber, json.dumps(parameters)))
+
+    def prune(self, keep=None):
+        """Delete the snapshots of files that no longer exist.
+
+        Parameters
+        ----------
+        keep : collection of str, optional
+            The ids of the files that still exist. Defaults to `seen`, which
+            is right after syncing the whole project, but not after syncing a
+            single folder.
+
+        Returns
+        -------
+        n_pruned : int
+        """
+        keep = self.seen if keep is None else set(keep)
+        stored = [row[0] for row in self._db.execute("SELECT file_id FROM snapshots")]
+        gone = [(file_id,) for file_id in stored if file_id not in keep]
+        self._db.executemany("DELETE FROM snapshots WHERE file_id = ?", gone)
+        self._db.commit()
+        self.pruned += len(gone)
+        return len(gone)
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
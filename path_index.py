@@ -0,0 +1,205 @@
+"""
+A persistent, project-scoped index from dataFile paths to Fusion ids.
+
+Resolving "/plant/flocculator/baffle" the slow way costs one server call per
+folder segment plus a scan over every dataFile in the final folder. The
+PathIndex remembers where each path led to, keyed by the id of the folder the
+path starts from, and stores that on disk so the next session can reuse it.
+A hit costs a dict lookup plus one `Data.findFileById` call to make sure the
+file is still there and to pick up new versions.
+"""
+
+import os
+import json
+import collections
+import adsk
+import adsk_utilities as a_ut
+
+INDEX_VERSION = 2
+
+
+def default_index_path(project):
+    """Return where the index of `project` lives on disk: ~/.aide/path_index/<project id>.json"""
+    safe_id = "".join(c if c.isalnum() else "_" for c in project.id)
+    return os.path.join(os.path.expanduser("~"), ".aide", "path_index", safe_id + ".json")
+
+
+class PathIndex:
+    """Maps dataFile paths to the id and version they resolved to.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Where the index is persisted. Nothing is read or written when None.
+    max_entries : int
+        The number of paths remembered. The least recently used path is
+        evicted first.
+
+    Attributes
+    ----------
+    hits : int
+        Resolves served from the index.
+    misses : int
+        Resolves that had to walk the folders.
+    stale : int
+        Index entries that were found to point at a moved or deleted file.
+    refreshed : int
+        Hits where the file had a newer version than the index remembered.
+    evictions : int
+        Entries dropped to stay within max_entries.
+    """
+
+    def __init__(self, file_path=None, max_entries=4096):
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        # Live references for this session only. These can't be persisted.
+        self._folders = {}
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshed = 0
+        self.evictions = 0
+        if file_path:
+            self.load()
+
+    @classmethod
+    def for_project(cls, project=None, max_entries=4096):
+        """Return the on-disk index of `project`, defaulting to the active project."""
+        if project is None:
+            project = adsk.core.Application.get().data.activeProject
+        return cls(default_index_path(project), max_entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "stale": self.stale,
+                "refreshed": self.refreshed, "evictions": self.evictions}
+
+    ########################## Lookups ########################################
+
+    def resolve(self, root_folder, folder_names, d_name, d_version=None):
+        """Return the dataFile at folder_names/d_name under root_folder.
+
+        This is what `adsk_utilities.find_fdoc_path` calls when given an index;
+        the arguments are the parts returned by `adsk_utilities.split_fdoc_path`.
+        """
+        key = self._key(root_folder, folder_names, d_name, d_version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            d = self._verify(key, entry, d_name, d_version)
+            if d is not None:
+                self.hits += 1
+                return d
+            self.stale += 1
+            self.invalidate(key)
+
+        self.misses += 1
+        folder = self._walk(root_folder, folder_names)
+        d = a_ut.find_dataFile(folder, d_name)
+        if d_version:
+            d = a_ut.find_version(d, d_version)
+            self._versions[key] = d
+        self._put(key, {"id": d.id, "folder": folder.id, "version": d.versionNumber,
+                        "modified": getattr(d, "dateModified", None)})
+        return d
+
+    def invalidate(self, key=None):
+        """Forget one key, or everything when no key is given."""
+        if key is None:
+            self._entries.clear()
+            self._folders.clear()
+            self._versions.clear()
+        else:
+            self._entries.pop(key, None)
+            self._versions.pop(key, None)
+
+    def invalidate_prefix(self, root_folder, folder_names):
+        """Forget every path under root_folder/folder_names, e.g. after a folder was moved."""
+        prefix = self._key(root_folder, folder_names, "", None).rsplit("/", 1)[0] + "/"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self.invalidate(key)
+        for key in [k for k in self._folders if (k + "/").startswith(prefix)]:
+            del self._folders[key]
+
+    def _key(self, root_folder, folder_names, d_name, d_version):
+        parts = []
+        for f_name in folder_names:
+            if f_name == ".." and parts and parts[-1] != "..":
+                parts.pop()
+            else:
+                parts.append(f_name)
+        key = root_folder.id + "/" + "/".join(parts + [d_name])
+        if d_version:
+            key += ":" + str(d_version)
+        return key
+
+    def _verify(self, key, entry, d_name, d_version):
+        """Check an entry with a single server call. Returns the dataFile, or None if the entry is stale."""
+        if d_version and key in self._versions:
+            return self._versions[key]
+        d = adsk.core.Application.get().data.findFileById(entry["id"])
+        # A file moved to another folder keeps its id and may keep its name.
+        if d is None or d.name != d_name or d.parentFolder.id != entry["folder"]:
+            return None
+        if d_version:
+            d = a_ut.find_version(d, d_version)
+            self._versions[key] = d
+        elif d.versionNumber != entry["version"] or getattr(d, "dateModified", None) != entry["modified"]:
+            self.refreshed += 1
+            entry["version"] = d.versionNumber
+            entry["modified"] = getattr(d, "dateModified", None)
+        self._entries.move_to_end(key)
+        return d
+
+    def _walk(self, root_folder, folder_names):
+        """Walk to the folder, starting from the deepest folder already seen this session."""
+        folder = root_folder
+        path = root_folder.id
+        for f_name in folder_names:
+            path += "/" + f_name
+            if path in self._folders:
+                folder = self._folders[path]
+                continue
+            if f_name == "..":
+                folder = folder.parentFolder
+            else:
+                folder = a_ut.find_dataFolder(folder, f_name)
+            self._folders[path] = folder
+        return folder
+
+    def _put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._versions.pop(evicted, None)
+            self.evictions += 1
+
+    ########################## Persistence ####################################
+
+    def load(self):
+        """Read the index from file_path. A missing or unreadable file gives an empty index."""
+        try:
+            with open(self.file_path) as f:
+                d = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if d.get("version") != INDEX_VERSION:
+            return
+        for key, entry in d.get("entries", []):
+            self._put(key, entry)
+
+    def save(self):
+        """Write the index to file_path, replacing the old file atomically."""
+        if not self.file_path:
+            return
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "entries": list(self._entries.items())}, f)
+        os.replace(tmp_path, self.file_path)
@@ -0,0 +1,185 @@
+"""
+Resolve every dataFile path of an AIDE JSON at once.
+
+An AIDE JSON references hundreds of files under a few shared folders, such as
+"/plant/flocculator/...". Resolving each path with
+adsk_utilities.find_fdoc_path walks from the root every time, repeating the
+lookups of the shared folders. Here the paths are put in a prefix trie first,
+so that each distinct folder is looked up once, each folder's files are
+listed at most once, and the versions of a file are read once for all the
+versions asked for:
+
+    data_files = path_resolver.resolve_tree(folder_dict, root_folder)
+    baffle = data_files["plant/flocculator/baffle"]
+
+The number of server calls grows with the number of distinct folders and
+files, not with the number of references to them.
+"""
+
+import collections
+import adsk_utilities as a_ut
+import adsk_proxy
+import aide_schema
+import json_keys as keys
+import tracing
+
+
+class _Node:
+    """A folder of the trie."""
+
+    __slots__ = ("children", "files")
+
+    def __init__(self):
+        self.children = collections.OrderedDict()
+        # {dataFile name: {version or None: [paths]}}
+        self.files = collections.OrderedDict()
+
+
+def normalize_folders(folder_names):
+    """Drop the folders that a later ".." leaves again. Leading ".." segments are kept."""
+    parts = []
+    for f_name in folder_names:
+        if f_name == ".." and parts and parts[-1] != "..":
+            parts.pop()
+        else:
+            parts.append(f_name)
+    return parts
+
+
+def collect_paths(folder_dict, path_keys=(keys.TEMPLATE_KEY,)):
+    """Return the dataFile paths of folder_dict, each once, in the order they appear.
+
+    Parameters
+    ----------
+    folder_dict : dict
+        An AIDE-compliant folder dictionary. Every "name:fdoc" key gives the
+        path of its dataFile, relative to the folder the dictionary describes.
+    path_keys : collection of str
+        Fgen arguments whose string values are dataFile paths, as accepted by
+        find_fdoc_path. They are collected as they are written.
+
+    Returns
+    -------
+    paths : list of str
+    """
+    paths = collections.OrderedDict()
+    _collect(folder_dict, (), frozenset(path_keys), paths)
+    return list(paths)
+
+
+def _collect(folder_dict, folders, path_keys, paths):
+    for k, v in folder_dict.items():
+        if not isinstance(v, dict) or k in (keys.DATA_FOLDER_KEY, keys.DATA_FILE_KEY):
+            continue
+        name, key_type = aide_schema.parse_key(k)
+        if key_type == keys.FOLDER_TYPE:
+            _collect(v, folders + (name,), path_keys, paths)
+        elif key_type == keys.FDOC_TYPE:
+            paths["/".join(folders + (name,))] = None
+            _collect_args(v, path_keys, paths)
+
+
+def _collect_args(fdoc_dict, path_keys, paths):
+    for args in fdoc_dict.values():
+        if not isinstance(args, dict):
+            continue
+        for arg_name, value in args.items():
+            if arg_name in path_keys and isinstance(value, str):
+                paths[value] = None
+            elif isinstance(value, dict):
+                # The linked fdocs under "fdocs" have fgens of their own.
+                _collect_args(value, path_keys, paths)
+
+
+@tracing.traced(category="lookup")
+def resolve_paths(file_paths, root_folder=None):
+    """Find the dataFiles of many paths, walking each distinct folder once.
+
+    Parameters
+    ----------
+    file_paths : iterable of str
+        Paths as accepted by adsk_utilities.find_fdoc_path, with ".."
+        segments and ":version" suffixes.
+    root_folder : dataFolder, optional
+        The folder relative paths start from, as in find_fdoc_path.
+
+    Returns
+    -------
+    data_files : {path: dataFile}
+
+    Raises
+    ------
+    UserWarning
+        Raised when a path can't be understood, or a folder, dataFile or
+        version it names isn't found.
+    """
+    # {is_absolute: folder} and {id of the folder: (folder, trie)}. Absolute and relative paths start from
+    # different folders, unless root_folder is given.
+    roots = {}
+    tries = collections.OrderedDict()
+    for file_path in file_paths:
+        is_absolute, folder_names, d_name, d_version = a_ut.split_fdoc_path(file_path)
+        if is_absolute not in roots:
+            roots[is_absolute] = a_ut.find_root_folder(is_absolute, root_folder)
+        root = roots[is_absolute]
+        node = tries.setdefault(root.id, (root, _Node()))[1]
+        for f_name in normalize_folders(folder_names):
+            node = node.children.setdefault(f_name, _Node())
+        node.files.setdefault(d_name, collections.OrderedDict()).setdefault(d_version, []).append(file_path)
+
+    data_files = {}
+    for root, trie in tries.values():
+        _resolve(trie, root, data_files)
+    return data_files
+
+
+def _resolve(node, folder, data_files):
+    if node.files:
+        found = _find_files(folder, node.files)
+        for d_name, versions in node.files.items():
+            d = found[d_name]
+            wanted = [v for v in versions if v]
+            by_number = _find_versions(d, wanted) if wanted else {}
+            for d_version, file_paths in versions.items():
+                for file_path in file_paths:
+                    data_files[file_path] = by_number[d_version] if d_version else d
+    for f_name, child in node.children.items():
+        if f_name == "..":
+            child_folder = folder.parentFolder
+        else:
+            child_folder = a_ut.find_dataFolder(folder, f_name)
+        _resolve(child, child_folder, data_files)
+
+
+def _find_files(folder, names):
+    """{name: dataFile} of names in folder, listing the folder once and stopping when all are found."""
+    found = {}
+    files = adsk_proxy.data_files(folder)
+    for i in range(files.count):
+        d = files.item(i)
+        d_name = d.name
+        if d_name in names and d_name not in found:
+            found[d_name] = d
+            if len(found) == len(names):
+                return found
+    missing = next(n for n in names if n not in found)
+    raise UserWarning("The dataFile {} was not found in the folder {}".format(missing, folder.name))
+
+
+def _find_versions(data_file, version_numbers):
+    """{version number: dataFile} of version_numbers, reading the versions of data_file once."""
+    found = {}
+    versions = adsk_proxy.versions(data_file)
+    for i in range(versions.count):
+        d = versions.item(i)
+        if d and d.versionNumber in version_numbers:
+            found[d.versionNumber] = d
+    for version_number in version_numbers:
+        if version_number not in found:
+            raise UserWarning("Version {} of the dataFile {} was not found".format(version_number, data_file.name))
+    return found
+
+
+def resolve_tree(folder_dict, root_folder=None, path_keys=(keys.TEMPLATE_KEY,)):
+    """resolve_paths of collect_paths(folder_dict). Returns {path: dataFile}."""
+    return resolve_paths(collect_paths(folder_dict, path_keys), root_folder)
@@ -0,0 +1,491 @@
+"""
+The execution planner compiles an AIDE JSON into a flat list of primitive
+operations before anything in Fusion is touched.
+
+The walk follows the semantics of the draw code:
+
+* every folder is looked up and made if missing (sync_folder_structure),
+* every fdoc is found in its folder and opened (parametrize_recursive),
+* the fgens of the fdoc_dict run in order (draw_fdoc): "parameters" becomes
+  one set_parameter per parameter, the pattern fgens become pattern_feature
+  operations and the linked documents under "fdocs" are opened through the
+  references of their parent (fgens/fdocs.update_fdoc),
+* every document that was opened is saved at the end.
+
+Repeated opens of the same document, repeated folder lookups and repeated
+writes of the same parameter are merged, so adding several JSONs to one Plan
+gives the operations of the combined run. Plan.estimate prices the plan with
+an adsk_sim latency model and execute runs it with the operations batched per
+document.
+
+    python planner.py plant.json --server 0.3 --upload 1.0
+"""
+
+import sys
+import argparse
+import collections
+
+import json_keys as keys
+import utilities as ut
+import aide_schema
+import tracing
+import adsk_proxy
+from adsk_sim import latency as sim_latency
+
+RESOLVE_PATH = "resolve_path"
+CREATE_FOLDER = "create_folder"
+OPEN_DOCUMENT = "open_document"
+SET_PARAMETER = "set_parameter"
+PATTERN_FEATURE = "pattern_feature"
+RUN_FGEN = "run_fgen"
+SAVE = "save"
+
+# Fgens that add pattern features, with the name of the argument holding the
+# number of holes in each row. A row of one hole doesn't need a pattern, and
+# rows of the same number of holes share one.
+PATTERN_FGENS = {"cylindrical_pattern_feature": "hole_list", "lfom": "hole_list"}
+
+_REF_KEYS = (keys.DATA_FILE_KEY, keys.DATA_FOLDER_KEY)
+
+
+class Operation:
+    """A single primitive operation of a plan.
+
+    Attributes
+    ----------
+    kind : str
+        One of RESOLVE_PATH, CREATE_FOLDER, OPEN_DOCUMENT, SET_PARAMETER,
+        PATTERN_FEATURE, RUN_FGEN or SAVE.
+    target : tuple of str
+        The folder names and file name the operation acts on. The target of
+        an operation on a document is the document's path.
+    document : str
+        The document the operation needs open, or None for folder operations.
+    args : dict
+        What the operation needs to run, depending on its kind.
+    """
+
+    __slots__ = ("kind", "target", "document", "args")
+
+    def __init__(self, kind, target, document=None, args=None):
+        self.kind = kind
+        self.target = target
+        self.document = document
+        self.args = args if args is not None else {}
+
+    def __repr__(self):
+        return "Operation({}, {}, {})".format(self.kind, "/".join(self.target), self.args)
+
+
+def document_key(path):
+    """The key of the document stored at path, a tuple of folder names and the file name."""
+    return "/".join(path)
+
+
+def reference_key(name):
+    """The key of a document opened through a reference of another document.
+
+    fgens/fdocs.update_fdoc matches references by file name only, so every
+    reference to a file of the same name is the same document.
+    """
+    return "ref:" + name
+
+
+class Cost:
+    """The estimated cost of a plan.
+
+    Attributes
+    ----------
+    calls : collections.Counter
+        Number of API calls of each name.
+    round_trips : int
+        The calls that go to the Autodesk servers.
+    seconds : float
+        The estimated wall time when every call is made one after the other.
+    """
+
+    def __init__(self, calls, latency):
+        self.calls = calls
+        self.round_trips = sum(n for name, n in calls.items() if latency.is_server_call(name))
+        self.seconds = sum(n * latency.delay(name) for name, n in calls.items())
+
+    def __repr__(self):
+        return "Cost(round_trips={}, seconds={:.1f})".format(self.round_trips, self.seconds)
+
+
+class Plan:
+    """An ordered, deduplicated list of operations.
+
+    Attributes
+    ----------
+    operations : list of Operation
+    merged : collections.Counter
+        Operations that were left out, by kind, because the plan already had them.
+    """
+
+    def __init__(self):
+        self.operations = []
+        self.merged = collections.Counter()
+        self._index = {}
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __iter__(self):
+        return iter(self.operations)
+
+    def _add(self, key, operation):
+        """Add operation unless an operation with the same key was added. Returns the operation in the plan."""
+        existing = self._index.get(key)
+        if existing is not None:
+            self.merged[operation.kind] += 1
+            return existing
+        self._index[key] = operation
+        self.operations.append(operation)
+        return operation
+
+    def add_json(self, folder_dict, fgen_names=None):
+        """Add the operations of an AIDE-compliant folder_dict to the plan. Returns the plan.
+
+        Parameters
+        ----------
+        folder_dict : dict
+            An AIDE-compliant folder dictionary, with "name:folder" and
+            "name:fdoc" keys. Refs added by sync_dict are ignored.
+        fgen_names : collection of str, optional
+            The fgens that exist. Other keys of an fdoc_dict are ignored.
+            Defaults to accepting every key.
+        """
+        self._add_folder(folder_dict, (), fgen_names)
+        self._add_saves()
+        return self
+
+    def add_json_file(self, json_path, fgen_names=None, schema=None):
+        """Add the operations of the AIDE JSON at json_path, reading one top level entry at a time.
+
+        The file is streamed with utilities.iter_json_entries, so only the
+        largest entry is ever held in memory. Each entry is checked against the
+        aide_schema.Schema schema first, when one is given. Returns the plan.
+
+        Raises
+        ------
+        aide_schema.SchemaError
+            Raised by the first entry that breaks the schema.
+        """
+        for key, value in ut.iter_json_entries(json_path):
+            if schema is not None:
+                violations = schema.validate({key: value})
+                if violations:
+                    raise aide_schema.SchemaError(violations)
+            self._add_folder({key: value}, (), fgen_names)
+        self._add_saves()
+        return self
+
+    def _add_folder(self, folder_dict, path, fgen_names):
+        for k, v in folder_dict.items():
+            if k in _REF_KEYS or not isinstance(v, dict):
+                continue
+            name, key_type = aide_schema.parse_key(k)
+            if key_type == keys.FDOC_TYPE:
+                self._add_fdoc(v, path + (name,), fgen_names)
+            elif key_type == keys.FOLDER_TYPE:
+                self._add(("folder",) + path + (name,), Operation(CREATE_FOLDER, path + (name,)))
+                self._add_folder(v, path + (name,), fgen_names)
+
+    def _add_fdoc(self, fdoc_dict, path, fgen_names):
+        folder = path[:-1]
+        if folder:
+            self._add(("folder",) + folder, Operation(RESOLVE_PATH, folder, args={"folder": True}))
+        document = document_key(path)
+        self._add(("file",) + path, Operation(RESOLVE_PATH, path, args={"folder": False}))
+        self._add(("open", document), Operation(OPEN_DOCUMENT, path, document, {"file": path}))
+        self._add_fgens(fdoc_dict, path, document, fgen_names)
+
+    def _add_fgens(self, fdoc_dict, path, document, fgen_names):
+        for fgen_key, args in fdoc_dict.items():
+            if fgen_key in _REF_KEYS or (fgen_names is not None and fgen_key not in fgen_names):
+                continue
+            if fgen_key == keys.PARAMETERS_KEY:
+                for param_name, expression in args.items():
+                    operation = self._add(("parameter", document, param_name),
+                                          Operation(SET_PARAMETER, path, document, {"name": param_name}))
+                    # The last expression written wins, as it would when drawing.
+                    operation.args["expression"] = str(expression)
+            elif fgen_key == keys.FDOC_REF_KEY:
+                for child_name, child_dict in args.items():
+                    if not isinstance(child_dict, dict):
+                        continue
+                    child_path = path + (child_name,)
+                    child = reference_key(child_name)
+                    self._add(("open", child), Operation(OPEN_DOCUMENT, child_path, child,
+                                                         {"reference": child_name, "parent": document}))
+                    self._add_fgens(child_dict, child_path, child, fgen_names)
+            elif fgen_key in PATTERN_FGENS:
+                self._add(("fgen", document, fgen_key), Operation(PATTERN_FEATURE, path, document,
+                                                                  {"fgen": fgen_key, "args": args}))
+            else:
+                self._add(("fgen", document, fgen_key), Operation(RUN_FGEN, path, document,
+                                                                  {"fgen": fgen_key, "args": args}))
+
+    def _add_saves(self):
+        """Move the saves to the end, children before the documents that reference them."""
+        opens = [op for op in self.operations if op.kind == OPEN_DOCUMENT]
+        self.operations = [op for op in self.operations if op.kind != SAVE]
+        for op in reversed(opens):
+            self.operations.append(self._index.setdefault(("save", op.document),
+                                                          Operation(SAVE, op.target, op.document)))
+
+    def documents(self):
+        """{document: [operations]} of every document, in the order they are first opened."""
+        by_document = collections.OrderedDict()
+        for op in self.operations:
+            if op.document is not None and op.kind != SAVE:
+                by_document.setdefault(op.document, []).append(op)
+        return by_document
+
+    def assets(self, table):
+        """The URLs of the assets that the fgens of the plan declare, each once.
+
+        Parameters
+        ----------
+        table : fgen_manager.FgenTable
+        """
+        urls = []
+        for op in self.operations:
+            if op.kind in (PATTERN_FEATURE, RUN_FGEN):
+                urls.extend(table.assets(op.args["fgen"], op.args["args"]))
+        return list(collections.OrderedDict.fromkeys(urls))
+
+    def calls(self):
+        """The API calls the plan is expected to make, as a collections.Counter."""
+        calls = collections.Counter()
+        listed = collections.Counter(op.target[:-1] for op in self.operations
+                                     if op.kind == RESOLVE_PATH and not op.args["folder"])
+        for op in self.operations:
+            if op.kind == CREATE_FOLDER:
+                calls["DataFolders.itemByName"] += 1
+                calls["DataFolders.add"] += 1
+            elif op.kind == RESOLVE_PATH and op.args["folder"]:
+                calls["DataFolders.itemByName"] += 1
+            elif op.kind == OPEN_DOCUMENT:
+                if "reference" in op.args:
+                    calls["DocumentReference.dataFile"] += 1
+                calls["Documents.open"] += 1
+            elif op.kind == SET_PARAMETER:
+                calls["Parameter.setExpression"] += 1
+            elif op.kind == PATTERN_FEATURE:
+                rows = op.args["args"].get(PATTERN_FGENS[op.args["fgen"]], [None]) \
+                    if isinstance(op.args["args"], dict) else [None]
+                # Rows with the same number of holes share a feature, see cylindrical_pattern_feature.
+                calls["CircularPatternFeatures.add"] += len(set(n for n in rows if n != 1))
+            elif op.kind == SAVE:
+                calls["Document.save"] += 1
+                calls[sim_latency.UPLOAD] += 1
+        # Each folder's files are listed once, when the first of them is resolved.
+        for folder, n_files in listed.items():
+            calls["DataFiles.count"] += 1
+            calls["DataFiles.item"] += n_files
+        # The parameters of a document are written in one batch with one recompute.
+        calls["Design.compute"] += sum(1 for ops in self.documents().values()
+                                       if any(op.kind == SET_PARAMETER for op in ops))
+        return calls
+
+    def estimate(self, latency=None):
+        """Price the plan with latency, an adsk_sim latency model. Defaults to adsk_sim.CloudLatency().
+
+        CREATE_FOLDER is priced as making the folder, so the estimate is an
+        upper bound when the folders already exist. Uploads are priced as if
+        every save waited for its upload to finish.
+        """
+        return Cost(self.calls(), latency or sim_latency.CloudLatency())
+
+    def report(self, latency=None, verbose=True):
+        cost = self.estimate(latency)
+        kinds = collections.Counter(op.kind for op in self.operations)
+        lines = ["{} operations on {} documents, {} merged.".format(
+            len(self.operations), len(self.documents()), sum(self.merged.values()))]
+        lines.extend("  {:<16} {:>6}".format(kind, n) for kind, n in sorted(kinds.items()))
+        lines.append("Estimated {} server round trips and {:.1f} s.".format(cost.round_trips, cost.seconds))
+        if verbose:
+            lines.append("")
+            for op in self.operations:
+                detail = "" if op.kind in (CREATE_FOLDER, OPEN_DOCUMENT, SAVE, RESOLVE_PATH) else \
+                    " ".join("{}={}".format(k, v) for k, v in sorted(op.args.items()) if k != "args")
+                lines.append("  {:<16} {:<50} {}".format(op.kind, "/".join(op.target), detail))
+        return "\n".join(lines)
+
+
+def plan_json(folder_dict, fgen_names=None):
+    """Return the Plan of a single AIDE-compliant folder_dict. See Plan.add_json."""
+    return Plan().add_json(folder_dict, fgen_names)
+
+
+class ExecutionReport:
+    """What execute did.
+
+    Attributes
+    ----------
+    done : collections.Counter
+        Operations run, by kind.
+    saved : list of str
+        The documents saved, in order.
+    parameter_reports : {str: parameters.ParameterReport}
+        The parameter batch applied to each document.
+    """
+
+    def __init__(self):
+        self.done = collections.Counter()
+        self.saved = []
+        self.parameter_reports = {}
+
+
+@tracing.traced(category="draw")
+def execute(plan, root_folder, pool=None, progress=None):
+    """Run plan against the Fusion folders under root_folder.
+
+    The assets the fgens declare are downloaded in parallel, and the folder
+    operations run, first. Then each document is opened once, all
+    its parameters are written in one parameters.ParameterBatch and its fgens
+    run, before moving on to the next document. Documents are saved at the
+    end, children first, and only if they changed.
+
+    If given, progress is called as progress(OPEN_DOCUMENT, document) once
+    each document is drawn, and as progress(SAVE, document) once it is saved.
+
+    Returns
+    -------
+    report : ExecutionReport
+    """
+    # Imported here so that planning doesn't need Fusion.
+    import adsk.core
+    import document_pool
+    import parameters
+    import aide_draw
+    import asset_cache
+
+    pool = document_pool.shared_pool() if pool is None else pool
+    table = aide_draw.fgen_table()
+    report = ExecutionReport()
+    urls = plan.assets(table)
+    if urls:
+        # Failures are left for the fgen that needs the asset to raise.
+        asset_cache.shared_cache().prefetch(urls)
+    folders = {(): root_folder}
+    listings = {}
+    data_files = {}
+    fdocs = {}
+
+    for op in plan:
+        if op.kind == CREATE_FOLDER:
+            parent = folders[op.target[:-1]]
+            children = adsk_proxy.data_folders(parent)
+            folders[op.target] = children.itemByName(op.target[-1]) or children.add(op.target[-1])
+        elif op.kind == RESOLVE_PATH and op.args["folder"]:
+            if op.target not in folders:
+                folder = adsk_proxy.data_folders(folders[op.target[:-1]]).itemByName(op.target[-1])
+                if not folder:
+                    raise ValueError("The folder {} doesn't exist.".format("/".join(op.target)))
+                folders[op.target] = folder
+        elif op.kind == RESOLVE_PATH:
+            listing = _listing(listings, folders[op.target[:-1]], op.target[:-1])
+            if op.target[-1] not in listing:
+                raise ValueError("The file {} doesn't exist.".format("/".join(op.target)))
+            data_files[document_key(op.target)] = listing[op.target[-1]]
+        else:
+            continue
+        report.done[op.kind] += 1
+
+    try:
+        for document, ops in plan.documents().items():
+            data_file = data_files.get(document)
+            if data_file is None:
+                raise ValueError("The document {} isn't referenced by the documents drawn "
+                                 "before it.".format(document))
+            # Kept pinned until the saves are done.
+            fdoc = pool.open(data_file)
+            pool.pin(fdoc)
+            fdocs[document] = fdoc
+            _run_document(fdoc, ops, table, parameters, report)
+            _add_references(fdoc, data_files)
+            if progress is not None:
+                progress(OPEN_DOCUMENT, document)
+        for op in plan:
+            if op.kind != SAVE or op.document not in fdocs:
+                continue
+            fdoc = fdocs[op.document]
+            if fdoc.isModified:
+                fdoc.save("Drawn by AIDE")
+                adsk.doEvents()
+                report.saved.append(op.document)
+                if progress is not None:
+                    progress(SAVE, op.document)
+            report.done[SAVE] += 1
+    finally:
+        for fdoc in fdocs.values():
+            pool.unpin(fdoc)
+    return report
+
+
+def _listing(listings, folder, path):
+    """{name: dataFile} of the files in folder, read once per folder."""
+    if path not in listings:
+        files = adsk_proxy.data_files(folder)
+        listing = {}
+        for i in range(files.count):
+            data_file = files.item(i)
+            listing[data_file.name] = data_file
+        listings[path] = listing
+    return listings[path]
+
+
+def _add_references(fdoc, data_files):
+    """Remember the dataFiles that fdoc references, so they can be opened without a search."""
+    try:
+        doc_refs = adsk_proxy.document_references(fdoc)
+    except AttributeError:
+        return
+    for i in range(doc_refs.count):
+        data_file = doc_refs.item(i).dataFile
+        data_files.setdefault(reference_key(data_file.name), data_file)
+
+
+def _run_document(fdoc, ops, table, parameters, report):
+    params = collections.OrderedDict()
+    for op in ops:
+        if op.kind == OPEN_DOCUMENT:
+            report.done[OPEN_DOCUMENT] += 1
+        elif op.kind == SET_PARAMETER:
+            params[op.args["name"]] = op.args["expression"]
+    if params:
+        report.parameter_reports[ops[0].document] = parameters.ParameterBatch(fdoc).apply(params)
+        report.done[SET_PARAMETER] += len(params)
+    for op in ops:
+        if op.kind in (PATTERN_FEATURE, RUN_FGEN):
+            table.run(op.args["fgen"], fdoc, op.args["args"])
+            report.done[op.kind] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the operations an AIDE JSON compiles to and their cost.")
+    parser.add_argument("json_paths", nargs="+", help="AIDE JSONs, planned as a single run")
+    parser.add_argument("--server", type=float, default=0.3, help="seconds per server round trip")
+    parser.add_argument("--compute", type=float, default=0.05, help="seconds per recompute or pattern feature")
+    parser.add_argument("--upload", type=float, default=1.0, help="seconds per upload")
+    parser.add_argument("--latency-table", help="a JSON of {call name: seconds} that overrides the above")
+    parser.add_argument("--summary", action="store_true", help="don't list every operation")
+    args = parser.parse_args(argv)
+
+    overrides = ut._load_json(args.latency_table) if args.latency_table else None
+    latency = sim_latency.CloudLatency(server=args.server, compute=args.compute, upload=args.upload,
+                                       overrides=overrides)
+    fgen_names = set(ut._load_json(ut.abs_path("fgen_registry.json"))) | set(PATTERN_FGENS)
+    schema = aide_schema.Schema(fgen_names)
+    plan = Plan()
+    for json_path in args.json_paths:
+        plan.add_json_file(json_path, fgen_names, schema)
+    print(plan.report(latency, verbose=not args.summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+The run manifest remembers what each fdoc looked like the last time it was
+drawn, so that a re-run only redraws what changed.
+
+For every fdoc the manifest stores a fingerprint made of:
+
+* a content hash of the fdoc_dict subtree (ignoring live Fusion references),
+* its parameters, flattened with json_transformations.flatten, so that the
+  reason an fdoc is redrawn names the parameters that changed,
+* the id and version of the dataFile it was drawn into, and
+* a hash of the source of every fgen the fdoc_dict uses.
+
+RunManifest.plan compares the current JSON against the stored fingerprints
+and returns a RunPlan listing the fdocs to draw, with the reason for each, and
+the fdocs that are skipped. Fdocs whose parameters reference a changed fdoc
+(see json_transformations.expressions) are redrawn as well.
+"""
+
+import os
+import json
+import hashlib
+import collections
+import importlib.util
+
+import json_keys as keys
+import utilities as ut
+from json_transformations import flatten as fl
+
+MANIFEST_VERSION = 1
+
+# Keys that hold live Fusion objects rather than JSON.
+_REF_KEYS = (keys.DATA_FILE_KEY, keys.DATA_FOLDER_KEY)
+
+_fgen_hashes = {}
+
+
+def manifest_path(json_path):
+    """The manifest of an AIDE JSON lives next to it: plant.json -> plant.manifest.json"""
+    root, _ = os.path.splitext(json_path)
+    return root + ".manifest.json"
+
+
+def _jsonable(d):
+    """Return d without the keys that hold Fusion objects."""
+    if isinstance(d, dict):
+        return {k: _jsonable(v) for k, v in d.items() if k not in _REF_KEYS}
+    if isinstance(d, list):
+        return [_jsonable(v) for v in d]
+    return d
+
+
+def fdoc_hash(fdoc_dict):
+    """A content hash of fdoc_dict that doesn't depend on key order or live references."""
+    text = json.dumps(_jsonable(fdoc_dict), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def fgen_version(fgen_name):
+    """A hash of the fgen module's source file, found without importing it.
+
+    Returns None when the fgen can't be found.
+    """
+    if fgen_name not in _fgen_hashes:
+        version = None
+        try:
+            spec = importlib.util.find_spec(fgen_name)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.origin and os.path.isfile(spec.origin):
+            with open(spec.origin, "rb") as f:
+                version = hashlib.sha1(f.read()).hexdigest()
+        _fgen_hashes[fgen_name] = version
+    return _fgen_hashes[fgen_name]
+
+
+def fingerprint(fdoc_dict, fgen_names, parameters=None):
+    """Return the fingerprint of one fdoc as stored in the manifest.
+
+    parameters are the fdoc's flattened parameters, as given by
+    json_transformations.flatten.fdoc_parameters, when already at hand.
+    """
+    template = None
+    data_file = fdoc_dict.get(keys.DATA_FILE_KEY)
+    if data_file is not None:
+        template = [data_file.id, data_file.versionNumber]
+    fgens = {k: fgen_version(k) for k in sorted(fdoc_dict) if k in fgen_names}
+    if parameters is None:
+        parameters = fl.fdoc_parameters({(): fdoc_dict})[()]
+    return {"hash": fdoc_hash(fdoc_dict), "template": template, "fgens": fgens,
+            "parameters": {"/".join(key): value for key, value in parameters.items()}}
+
+
+def _path_str(path):
+    return "/".join(path)
+
+
+class RunPlan:
+    """What an incremental run is going to do, and afterwards, what it did.
+
+    Attributes
+    ----------
+    to_draw : OrderedDict {fdoc_path: fdoc_dict}
+        The fdocs that need drawing, in JSON order.
+    reasons : {fdoc_path: str}
+        Why each fdoc in to_draw is drawn.
+    skipped : OrderedDict {fdoc_path: str}
+        The fdocs that are skipped, with the reason.
+    fingerprints : {fdoc_path: dict}
+        The current fingerprint of every fdoc.
+    drawn : list of fdoc_path
+        Filled in by the engine with the fdocs actually drawn.
+    resumed : list of fdoc_path
+        Filled in by the engine with the fdocs of to_draw that a resumed
+        draw_journal had as saved already, and weren't drawn again.
+    """
+
+    def __init__(self):
+        self.to_draw = collections.OrderedDict()
+        self.reasons = {}
+        self.skipped = collections.OrderedDict()
+        self.fingerprints = {}
+        self.drawn = []
+        self.resumed = []
+
+    def report(self):
+        lines = ["Drawing {} fdocs, skipping {}.".format(len(self.to_draw), len(self.skipped))]
+        for path in self.to_draw:
+            if path in self.resumed:
+                lines.append("  done {:<50} saved before the run was interrupted".format(_path_str(path)))
+                continue
+            lines.append("  draw {:<50} {}".format(_path_str(path), self.reasons[path]))
+        for path, reason in self.skipped.items():
+            lines.append("  skip {:<50} {}".format(_path_str(path), reason))
+        return "\n".join(lines)
+
+
+class RunManifest:
+    """The fingerprints of the last run, persisted as JSON.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Where the manifest is stored. See manifest_path. Nothing is read or
+        written when None.
+    """
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.entries = {}
+        if file_path and os.path.isfile(file_path):
+            self.load()
+
+    @classmethod
+    def for_json(cls, json_path):
+        return cls(manifest_path(json_path))
+
+    def plan(self, folder_dict, fgen_names=None):
+        """Decide which fdocs of folder_dict have to be drawn.
+
+        Parameters
+        ----------
+        folder_dict : dict
+            An AIDE-compliant folder dictionary, optionally with refs from sync_dict.
+        fgen_names : collection of str, optional
+            The names of the fgens. Defaults to every fgen in fgen_registry.json.
+
+        Returns
+        -------
+        plan : RunPlan
+        """
+        if fgen_names is None:
+            fgen_names = set(ut._load_json(ut.abs_path("fgen_registry.json")))
+        plan = RunPlan()
+        changed = collections.OrderedDict()
+        fdocs = collections.OrderedDict(ut.iter_fdocs(folder_dict))
+        # Flattened together, so the parameter keys the fdocs have in common are built once.
+        parameters = fl.fdoc_parameters(fdocs)
+        for path, fdoc_dict in fdocs.items():
+            current = fingerprint(fdoc_dict, fgen_names, parameters[path])
+            plan.fingerprints[path] = current
+            reason = self._change(self.entries.get(_path_str(path)), current)
+            if reason:
+                changed[path] = reason
+
+        for path, reason in changed.items():
+            plan.reasons[path] = reason
+        for path, via in self._dependents(folder_dict, changed, fdocs).items():
+            plan.reasons.setdefault(path, "depends on {}".format(_path_str(via)))
+
+        for path, fdoc_dict in fdocs.items():
+            if path in plan.reasons:
+                plan.to_draw[path] = fdoc_dict
+            else:
+                plan.skipped[path] = "unchanged since the last run"
+        return plan
+
+    def _change(self, old, current):
+        if old is None:
+            return "new"
+        if old["hash"] != current["hash"]:
+            # Manifests written before parameters were stored have none to compare.
+            if old.get("parameters") is not None:
+                change = fl.diff(old["parameters"], current["parameters"])
+                if change:
+                    return "parameters changed: {}".format(
+                        ", ".join(sorted(set(change.added) | set(change.removed) | set(change.changed))))
+            return "fdoc_dict changed"
+        if old["template"] != current["template"]:
+            return "template version changed ({} -> {})".format(
+                old["template"][1] if old["template"] else None,
+                current["template"][1] if current["template"] else None)
+        for name in sorted(set(old["fgens"]) | set(current["fgens"])):
+            if old["fgens"].get(name) != current["fgens"].get(name):
+                return "fgen {} changed".format(name)
+        return None
+
+    def _dependents(self, folder_dict, changed, fdocs):
+        """Every fdoc that references the parameters of a changed fdoc, directly or not.
+
+        Returns {fdoc_path: the changed fdoc_path it was reached from}.
+        """
+        if not changed:
+            return {}
+        # Only parse the expressions when something changed.
+        from json_transformations import expressions
+        try:
+            fdoc_deps = expressions.ExpressionResolver(folder_dict).fdoc_dependencies()
+        except expressions.CycleError:
+            return {path: path for path in fdocs}
+        dependents = collections.defaultdict(set)
+        for path, deps in fdoc_deps.items():
+            for dep in deps:
+                dependents[dep].add(path)
+        found = collections.OrderedDict()
+        queue = collections.deque(changed)
+        seen = set(changed)
+        while queue:
+            path = queue.popleft()
+            for dependent in sorted(dependents[path]):
+                if dependent not in seen and dependent in fdocs:
+                    seen.add(dependent)
+                    found[dependent] = path
+                    queue.append(dependent)
+        return found
+
+    def record(self, path, fdoc_fingerprint):
+        """Remember that the fdoc at path was drawn with fdoc_fingerprint."""
+        self.entries[_path_str(path)] = fdoc_fingerprint
+
+    def load(self):
+        with open(self.file_path) as f:
+            d = json.load(f)
+        if d.get("version") == MANIFEST_VERSION:
+            self.entries = d["fdocs"]
+
+    def save(self):
+        if not self.file_path:
+            return
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "fdocs": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.file_path)
@@ -0,0 +1,197 @@
+"""
+Pipelined saving of Fusion documents.
+
+`fdoc.saveAs` hands the document to Fusion's uploader and returns; the upload
+itself finishes later, when Fusion fires `Application.dataFileComplete`. The
+SaveCoordinator keeps track of those uploads so the caller can carry on
+parametrizing the next fdoc while the previous ones upload, caps how many
+uploads may be in flight at once, and offers a barrier at the end of a run
+that waits for everything and reports how long each save took.
+
+    coordinator = SaveCoordinator(max_in_flight=4)
+    for fdoc, folder, name in work:
+        parametrize(fdoc)
+        coordinator.submit(fdoc, folder, name)
+    report = coordinator.barrier()
+"""
+
+import time
+import collections
+import adsk.core
+import tracing
+import adsk_proxy
+import draw_journal
+
+
+class SaveFuture:
+    """A save that has been handed to Fusion.
+
+    Attributes
+    ----------
+    name : str
+        The name the fdoc was saved as.
+    submitted_at : float
+        When submit was called.
+    started_at : float
+        When saveAs was called, after waiting for a free upload slot.
+    completed_at : float
+        When the upload finished, or None while it is in flight.
+    data_file : dataFile
+        The uploaded dataFile once the upload finished.
+    error : Exception
+        Set when the save failed.
+    """
+
+    def __init__(self, name, folder, submitted_at):
+        self.name = name
+        self.folder = folder
+        self.submitted_at = submitted_at
+        self.started_at = None
+        self.completed_at = None
+        self.data_file = None
+        self.error = None
+
+    def done(self):
+        return self.completed_at is not None
+
+    @property
+    def latency(self):
+        """Seconds from submit until the upload finished."""
+        if not self.done():
+            return None
+        return self.completed_at - self.submitted_at
+
+    def result(self):
+        if self.error:
+            raise self.error
+        return self.data_file
+
+    def __repr__(self):
+        return "SaveFuture({!r}, done={})".format(self.name, self.done())
+
+
+class SaveReport:
+    """Returned by SaveCoordinator.barrier."""
+
+    def __init__(self, futures):
+        self.futures = futures
+
+    @property
+    def latencies(self):
+        """{(folder id, name): [seconds of each save]}, in the order of the first save of each.
+
+        Keyed like the coordinator's saves, so that saves of the same name into
+        different folders, or of the same document twice, are all kept.
+        """
+        latencies = collections.OrderedDict()
+        for f in self.futures:
+            latencies.setdefault((f.folder.id, f.name), []).append(f.latency)
+        return latencies
+
+    @property
+    def failed(self):
+        return [f for f in self.futures if f.error]
+
+    def __str__(self):
+        lines = ["{:<40} {:>10}".format("save", "seconds")]
+        for f in self.futures:
+            lines.append("{:<40} {:>10}".format(f.name, "failed" if f.error else "{:.2f}".format(f.latency)))
+        return "\n".join(lines)
+
+
+class _UploadCompleteHandler(adsk.core.DataEventHandler):
+    def __init__(self, coordinator):
+        super().__init__()
+        self.coordinator = coordinator
+
+    def notify(self, args):
+        self.coordinator._complete(args.file)
+
+
+class SaveCoordinator:
+    """Issues saveAs calls without waiting for their uploads, up to a limit.
+
+    Parameters
+    ----------
+    max_in_flight : int
+        How many uploads may be running at once. submit blocks, processing
+        Fusion events, until a slot is free.
+    poll_interval : float
+        Seconds to sleep between event polls while blocked.
+    timeout : float
+        Seconds to wait for a free slot or for the barrier before giving up.
+    clock : function
+        Returns the current time in seconds. Defaults to time.perf_counter.
+    """
+
+    def __init__(self, max_in_flight=4, poll_interval=0.05, timeout=600, clock=None):
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.clock = clock or time.perf_counter
+        self.futures = []
+        self._in_flight = collections.OrderedDict()
+        self._handler = _UploadCompleteHandler(self)
+        self._app = adsk.core.Application.get()
+        self._app.dataFileComplete.add(self._handler)
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def submit(self, fdoc, folder, name, description='', tag=''):
+        """Save fdoc as name in folder and return a SaveFuture without waiting for the upload."""
+        future = SaveFuture(name, folder, self.clock())
+        self.futures.append(future)
+        self._wait(lambda: len(self._in_flight) < self.max_in_flight, "a free upload slot")
+        future.started_at = self.clock()
+        try:
+            with tracing.span("Document.saveAs", "adsk"):
+                saved = fdoc.saveAs(name, folder, description, tag)
+            if not saved:
+                raise RuntimeError("Fusion refused to save {}".format(name))
+            adsk_proxy.saved(folder)
+        except Exception as e:
+            future.error = e
+            future.completed_at = self.clock()
+            return future
+        self._in_flight.setdefault(self._key(folder.id, name), collections.deque()).append(future)
+        return future
+
+    def poll(self):
+        """Let Fusion process events, completing any finished uploads. Returns the number still in flight."""
+        adsk.doEvents()
+        return self.in_flight
+
+    @tracing.traced(category="save")
+    def barrier(self):
+        """Wait for every submitted save to finish and return a SaveReport."""
+        self._wait(lambda: not self._in_flight, "all uploads to finish")
+        return SaveReport(list(self.futures))
+
+    def close(self):
+        self._app.dataFileComplete.remove(self._handler)
+
+    def _key(self, folder_id, name):
+        return (folder_id, name)
+
+    def _wait(self, condition, what):
+        deadline = self.clock() + self.timeout
+        while not condition():
+            if self.poll_interval:
+                time.sleep(self.poll_interval)
+            self.poll()
+            if self.clock() > deadline:
+                raise TimeoutError("Timed out after {} seconds waiting for {}".format(self.timeout, what))
+
+    def _complete(self, data_file):
+        key = self._key(data_file.parentFolder.id, data_file.name)
+        waiting = self._in_flight.get(key)
+        if not waiting:
+            return
+        future = waiting.popleft()
+        if not waiting:
+            del self._in_flight[key]
+        future.data_file = data_file
+        future.completed_at = self.clock()
+        draw_journal.saved(data_file, future.folder, future.name)
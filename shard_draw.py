@@ -0,0 +1,552 @@
+"""
+Draw the independent parts of a large AIDE JSON in several processes at once.
+
+Drawing through draw_fdoc is sequential, but a large plant splits into parts
+that don't know about each other. shard splits an AIDE JSON into shards: sets
+of fdocs that are drawn together because one references the parameters of
+another, or because they link to the same document. Every other pair of fdocs
+is independent, so a folder holding a hundred unrelated fdocs gives a hundred
+shards, and one huge subtree doesn't end up in a single worker.
+
+draw_sharded makes the folders first, in one worker so that no two workers
+race to make the same folder, then draws the shards in N worker processes:
+
+    def connect():
+        ...  # attach this process to its own Fusion instance
+    report = shard_draw.draw_sharded(folder_dict, workers=4, initializer=connect)
+    print(report)
+
+Each worker needs a Fusion of its own, which the initializer sets up when the
+worker starts; tests install adsk_sim there instead. The workers draw each
+shard with planner.execute and stream their progress back to the coordinator,
+which merges what they did into one ShardReport. The shards are spread over
+the workers largest first. A worker that runs out takes the shards at the
+back of the longest queue of another worker, so that the workers finish at
+about the same time. A shard that fails, or whose worker dies, is retried on
+another worker, up to retries more times.
+"""
+
+import os
+import sys
+import time
+import queue
+import collections
+import traceback
+import multiprocessing
+
+import json_keys as keys
+import aide_schema
+import planner
+
+STARTED = "started"
+PROGRESS = "progress"
+DONE = "done"
+FAILED = "failed"
+
+_REF_KEYS = (keys.DATA_FILE_KEY, keys.DATA_FOLDER_KEY)
+
+# The index of the worker running in this process, or None in the coordinator.
+_worker_index = None
+# The state a forked worker dropped. It is kept referenced so that the worker never finalizes it.
+_inherited = []
+
+
+def current_worker():
+    """The index of the worker process this runs in, or None outside of one."""
+    return _worker_index
+
+
+class Shard:
+    """fdocs that are drawn together, by one worker.
+
+    Attributes
+    ----------
+    id : int
+    folder_dict : dict
+        The AIDE JSON of the shard: its fdocs under the folders they are in.
+    paths : list of tuple
+        The paths of the fdocs, as (folder names..., fdoc name).
+    weight : int
+        The number of operations of the shard's plan, used to balance the workers.
+    attempts : int
+    failed_on : set of int
+        The workers the shard failed on.
+    worker : int
+        The worker that drew it, or last tried to.
+    error : str
+        The traceback of the last failure, or None.
+    done : collections.Counter
+        The operations the worker ran, by kind, once drawn.
+    saved : list of str
+        The documents the worker saved.
+    seconds : float
+        How long the successful attempt took.
+    """
+
+    __slots__ = ("id", "folder_dict", "paths", "weight", "attempts", "failed_on", "worker", "error", "done",
+                 "saved", "seconds", "_started")
+
+    def __init__(self, shard_id, folder_dict, paths, weight):
+        self.id = shard_id
+        self.folder_dict = folder_dict
+        self.paths = paths
+        self.weight = weight
+        self.attempts = 0
+        self.failed_on = set()
+        self.worker = None
+        self.error = None
+        self.done = None
+        self.saved = []
+        self.seconds = 0.0
+        self._started = None
+
+    def __repr__(self):
+        return "Shard({}, {} fdocs, weight {})".format(self.id, len(self.paths), self.weight)
+
+
+def _walk_fdocs(folder_dict, path=()):
+    """Yield (key_path, fdoc_dict), where key_path is the tuple of the keys, such as ("plant:folder", "tank:fdoc")."""
+    for k, v in folder_dict.items():
+        if k in _REF_KEYS or not isinstance(v, dict):
+            continue
+        key_type = aide_schema.parse_key(k)[1]
+        if key_type == keys.FDOC_TYPE:
+            yield path + (k,), v
+        elif key_type == keys.FOLDER_TYPE:
+            for item in _walk_fdocs(v, path + (k,)):
+                yield item
+
+
+def _names(key_path):
+    return tuple(aide_schema.parse_key(k)[0] for k in key_path)
+
+
+def _nest(items):
+    """The folder_dict holding the (key_path, value) items, in order."""
+    folder_dict = collections.OrderedDict()
+    for key_path, value in items:
+        d = folder_dict
+        for k in key_path[:-1]:
+            d = d.setdefault(k, collections.OrderedDict())
+        d[key_path[-1]] = value
+    return folder_dict
+
+
+def folders(folder_dict):
+    """The folders of folder_dict, without any fdocs, as an AIDE JSON."""
+    skeleton = collections.OrderedDict()
+    for k, v in folder_dict.items():
+        if k not in _REF_KEYS and isinstance(v, dict) and aide_schema.parse_key(k)[1] == keys.FOLDER_TYPE:
+            skeleton[k] = folders(v)
+    return skeleton
+
+
+def shard(folder_dict, fgen_names=None):
+    """Split folder_dict into the shards that can be drawn independently.
+
+    Two fdocs go in the same shard when one's parameter expressions reference
+    the other's parameters, or when both link to a document of the same name
+    under "fdocs". Within a shard the fdocs keep the order of folder_dict.
+
+    Parameters
+    ----------
+    folder_dict : dict
+        An AIDE-compliant folder dictionary, as loaded from the JSON.
+    fgen_names : collection of str, optional
+        The fgens that exist, as for planner.Plan.add_json.
+
+    Returns
+    -------
+    shards : list of Shard
+        In the order of their first fdoc.
+    """
+    fdocs = collections.OrderedDict((_names(key_path), (key_path, fdoc_dict))
+                                    for key_path, fdoc_dict in _walk_fdocs(folder_dict))
+    parents = {path: path for path in fdocs}
+
+    def find(path):
+        while parents[path] != path:
+            parents[path] = parents[parents[path]]
+            path = parents[path]
+        return path
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parents[b] = a
+
+    # Imported here as only sharding needs the expression parser.
+    from json_transformations import expressions
+    try:
+        dependencies = expressions.ExpressionResolver(folder_dict).fdoc_dependencies()
+    except expressions.CycleError:
+        # The dependencies can't be trusted, so everything is drawn in one shard, as it would be without sharding.
+        dependencies = {path: set(fdocs) for path in fdocs}
+    for path, deps in dependencies.items():
+        for dep in deps:
+            if path in parents and dep in parents:
+                union(path, dep)
+    linked = {}
+    for path, (_, fdoc_dict) in fdocs.items():
+        children = fdoc_dict.get(keys.FDOC_REF_KEY)
+        if isinstance(children, dict):
+            for child_name in children:
+                union(linked.setdefault(child_name, path), path)
+
+    groups = collections.OrderedDict()
+    for path in fdocs:
+        groups.setdefault(find(path), []).append(path)
+    shards = []
+    for paths in groups.values():
+        shard_dict = _nest(fdocs[path] for path in paths)
+        weight = len(planner.plan_json(shard_dict, fgen_names))
+        shards.append(Shard(len(shards), shard_dict, paths, weight))
+    return shards
+
+
+class Scheduler:
+    """Hands the shards out to the workers, with work stealing.
+
+    The shards are dealt largest first, each to the worker with the least
+    work queued. A worker takes from the front of its own queue; once it is
+    empty, it steals from the back of the queue with the most work left.
+    Shards are kept from a worker they failed on while another worker can
+    take them.
+
+    Attributes
+    ----------
+    steals : int
+        Shards taken from the queue of another worker.
+    """
+
+    def __init__(self, shards, n_workers):
+        self.n_workers = n_workers
+        self.queues = [collections.deque() for _ in range(n_workers)]
+        self.steals = 0
+        for s in sorted(shards, key=lambda s: -s.weight):
+            self._least_loaded().append(s)
+
+    def __len__(self):
+        return sum(len(q) for q in self.queues)
+
+    def _load(self, q):
+        return sum(s.weight for s in q)
+
+    def _least_loaded(self, exclude=()):
+        candidates = [q for i, q in enumerate(self.queues) if i not in exclude] or self.queues
+        return min(candidates, key=self._load)
+
+    def _allowed(self, s, worker):
+        return worker not in s.failed_on or len(s.failed_on) >= self.n_workers
+
+    def next(self, worker):
+        """The next shard for worker to draw, or None if there is nothing it may take."""
+        own = self.queues[worker]
+        for s in own:
+            if self._allowed(s, worker):
+                own.remove(s)
+                return s
+        victims = sorted((q for i, q in enumerate(self.queues) if i != worker), key=self._load, reverse=True)
+        for q in victims:
+            for s in reversed(q):
+                if self._allowed(s, worker):
+                    q.remove(s)
+                    self.steals += 1
+                    return s
+        return None
+
+    def retry(self, s):
+        """Queue a shard that failed again, first in line for a worker it didn't fail on."""
+        self._least_loaded(exclude=s.failed_on).appendleft(s)
+
+
+class ShardReport:
+    """What draw_sharded did.
+
+    Attributes
+    ----------
+    shards : list of Shard
+    done : collections.Counter
+        The operations run by all the workers, by kind.
+    saved : list of str
+        The documents saved, in the order the workers reported them.
+    retries : int
+        Attempts made after a shard failed.
+    steals : int
+        Shards a worker took from the queue of another.
+    restarts : int
+        Worker processes started again after one died.
+    seconds : float
+    """
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.done = collections.Counter()
+        self.saved = []
+        self.retries = 0
+        self.steals = 0
+        self.restarts = 0
+        self.seconds = 0.0
+
+    @property
+    def failed(self):
+        """The shards that failed every attempt."""
+        return [s for s in self.shards if s.done is None]
+
+    def by_worker(self):
+        """{worker: number of shards it drew}"""
+        return collections.Counter(s.worker for s in self.shards if s.done is not None)
+
+    def __str__(self):
+        lines = ["{} shards in {:.2f} s: {} drawn, {} failed, {} documents saved, {} retries, {} steals".format(
+            len(self.shards), self.seconds, len(self.shards) - len(self.failed), len(self.failed), len(self.saved),
+            self.retries, self.steals)]
+        for s in self.failed:
+            lines.append("  shard {} ({}) failed:\n{}".format(s.id, ", ".join("/".join(p) for p in s.paths),
+                                                             s.error))
+        return "\n".join(lines)
+
+
+def _reset_inherited():
+    """Drop the module state a forked worker inherits from the coordinator. Returns what was dropped.
+
+    The open documents, templates and adsk_proxy transaction belong to the
+    coordinator's Fusion, the asset cache's SQLite connection must not be used
+    across fork, and the running trace and journal would get the worker's
+    spans and records mixed in. Only the modules already imported hold any.
+    """
+    modules = sys.modules
+    dropped = []
+    if "document_pool" in modules:
+        dropped.append(modules["document_pool"].set_shared_pool(None))
+    if "template_cache" in modules:
+        dropped.append(modules["template_cache"].set_shared_cache(None))
+    if "asset_cache" in modules:
+        dropped.append(modules["asset_cache"].set_shared_cache(None))
+    if "adsk_proxy" in modules:
+        dropped.append(modules["adsk_proxy"]._transaction)
+        modules["adsk_proxy"]._transaction = None
+    if "tracing" in modules:
+        dropped.append(modules["tracing"].stop())
+    if "draw_journal" in modules:
+        # Not stopped, as closing it would sync the coordinator's file.
+        dropped.append(modules["draw_journal"]._journal)
+        modules["draw_journal"]._journal = None
+    return [d for d in dropped if d is not None]
+
+
+def _work(index, tasks, results, initializer, initargs):
+    """The loop of a worker process: draw each shard sent on tasks until None is sent."""
+    global _worker_index
+    _worker_index = index
+    try:
+        # Before the initializer, which may set up caches of its own.
+        _inherited.extend(_reset_inherited())
+        if initializer is not None:
+            initializer(*initargs)
+        import adsk.core
+        root_folder = adsk.core.Application.get().data.activeProject.rootFolder
+    except Exception:
+        results.put((index, FAILED, None, traceback.format_exc()))
+        return
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        shard_id, folder_dict = task
+        results.put((index, STARTED, shard_id, None))
+
+        def progress(kind, document):
+            results.put((index, PROGRESS, shard_id, (kind, document)))
+        try:
+            report = planner.execute(planner.plan_json(folder_dict), root_folder, progress=progress)
+        except Exception:
+            results.put((index, FAILED, shard_id, traceback.format_exc()))
+        else:
+            results.put((index, DONE, shard_id, (dict(report.done), list(report.saved))))
+
+
+class _Worker:
+    __slots__ = ("index", "process", "tasks", "shard")
+
+    def __init__(self, index, process, tasks):
+        self.index = index
+        self.process = process
+        self.tasks = tasks
+        # The Shard it is drawing, or None when idle.
+        self.shard = None
+
+
+class _Coordinator:
+    def __init__(self, n_workers, initializer, initargs, retries, progress, context, poll_interval, clock):
+        self.n_workers = n_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.retries = retries
+        self.progress = progress
+        self.context = context
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.results = context.Queue()
+        self.workers = []
+        self.restarts = 0
+
+    def start(self):
+        self.workers = [self._spawn(i) for i in range(self.n_workers)]
+
+    def _spawn(self, index):
+        tasks = self.context.Queue()
+        process = self.context.Process(target=_work, args=(index, tasks, self.results, self.initializer,
+                                                           self.initargs), daemon=True)
+        process.start()
+        return _Worker(index, process, tasks)
+
+    def stop(self):
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.tasks.put(None)
+        for worker in self.workers:
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def run(self, scheduler, report):
+        """Draw every shard of the scheduler, retrying failures."""
+        remaining = len(scheduler)
+        while remaining:
+            for worker in self.workers:
+                if worker.shard is None:
+                    s = scheduler.next(worker.index)
+                    if s is not None:
+                        self._assign(worker, s)
+            if not any(worker.shard for worker in self.workers):
+                # Every shard left is kept from the idle workers; can't happen with live workers.
+                raise RuntimeError("No worker can take the {} shards left".format(len(scheduler)))
+            finished = self._wait()
+            if finished is None:
+                continue
+            s, ok = finished
+            if ok:
+                remaining -= 1
+            elif s.attempts <= self.retries:
+                report.retries += 1
+                scheduler.retry(s)
+            else:
+                remaining -= 1
+        report.steals += scheduler.steals
+
+    def _assign(self, worker, s):
+        worker.shard = s
+        s.worker = worker.index
+        s.attempts += 1
+        s._started = self.clock()
+        worker.tasks.put((s.id, s.folder_dict))
+
+    def _wait(self):
+        """Handle the next message from the workers. Returns (shard, succeeded) when a shard finished."""
+        try:
+            index, kind, shard_id, detail = self.results.get(timeout=self.poll_interval)
+        except queue.Empty:
+            return self._check_alive()
+        if kind == FAILED and shard_id is None:
+            raise RuntimeError("Worker {} couldn't start:\n{}".format(index, detail))
+        worker = self.workers[index]
+        s = worker.shard
+        if s is None or s.id != shard_id:
+            return None
+        if self.progress is not None:
+            self.progress(s, kind, detail)
+        if kind == DONE:
+            worker.shard = None
+            s.done = collections.Counter(detail[0])
+            s.saved = detail[1]
+            s.error = None
+            s.seconds = self.clock() - s._started
+            return s, True
+        if kind == FAILED:
+            worker.shard = None
+            s.failed_on.add(index)
+            s.error = detail
+            return s, False
+        return None
+
+    def _check_alive(self):
+        """Replace a worker that died, failing the shard it was drawing."""
+        for i, worker in enumerate(self.workers):
+            if worker.process.is_alive():
+                continue
+            s = worker.shard
+            self.workers[i] = self._spawn(worker.index)
+            self.restarts += 1
+            if s is not None:
+                s.failed_on.add(worker.index)
+                s.error = "The worker process exited with code {}".format(worker.process.exitcode)
+                if self.progress is not None:
+                    self.progress(s, FAILED, s.error)
+                return s, False
+        return None
+
+
+def draw_sharded(folder_dict, workers=None, initializer=None, initargs=(), retries=2, progress=None,
+                 fgen_names=None, context=None, poll_interval=0.1, clock=None):
+    """Draw folder_dict in worker processes, each shard in one worker.
+
+    Parameters
+    ----------
+    folder_dict : dict
+        An AIDE-compliant folder dictionary, as loaded from the JSON.
+    workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs, but
+        no more than the number of shards.
+    initializer : function, optional
+        Called with initargs in each worker process before it draws anything.
+        It connects the process to the Fusion instance it draws in.
+    retries : int
+        How many more times a failed shard is tried, on another worker when
+        there is one.
+    progress : function, optional
+        Called in this process as progress(shard, kind, detail) for every
+        message of the workers: STARTED, PROGRESS with (operation kind,
+        document) as the detail, DONE and FAILED with the traceback.
+    fgen_names : collection of str, optional
+        The fgens that exist, as for shard.
+    context : multiprocessing context, optional
+        Defaults to multiprocessing.get_context().
+    poll_interval : float
+        Seconds to wait for a message before checking that the workers are alive.
+    clock : function
+        Returns the current time in seconds. Defaults to time.perf_counter.
+
+    Returns
+    -------
+    report : ShardReport
+    """
+    clock = clock or time.perf_counter
+    start = clock()
+    shards = shard(folder_dict, fgen_names)
+    report = ShardReport(shards)
+    if not shards:
+        return report
+    n_workers = min(workers or os.cpu_count() or 1, len(shards))
+    coordinator = _Coordinator(n_workers, initializer, initargs, retries, progress,
+                               context or multiprocessing.get_context(), poll_interval, clock)
+    coordinator.start()
+    try:
+        skeleton = folders(folder_dict)
+        if skeleton:
+            # Made by one worker before any shard, so that no two workers make the same folder.
+            folder_shard = Shard(-1, skeleton, [], len(planner.plan_json(skeleton, fgen_names)))
+            coordinator.run(Scheduler([folder_shard], n_workers), report)
+            if folder_shard.done is None:
+                raise RuntimeError("Couldn't make the folders:\n{}".format(folder_shard.error))
+            report.done.update(folder_shard.done)
+        coordinator.run(Scheduler(shards, n_workers), report)
+    finally:
+        coordinator.stop()
+    for s in shards:
+        if s.done is not None:
+            report.done.update(s.done)
+            report.saved.extend(s.saved)
+    report.restarts = coordinator.restarts
+    report.seconds = clock() - start
+    return report
@@ -0,0 +1,176 @@
+"""
+A bounded cache of imported .f3d/.f3z archives.
+
+Importing a Fusion archive is one of the slowest things AIDE does, and the
+same few templates are imported over and over: fgens/lfom imports its tank
+on every call. The TemplateCache imports each archive once per session into
+a master document that it keeps open, and serves later imports from it:
+
+* importing into a target component of a design that already has the
+  archive adds another occurrence of the component imported there (or an
+  independent copy of it, with copy=True),
+* importing into any other design copies the root component of the master,
+* asking for the template with no target returns the master itself.
+
+Archives are keyed by the hash of their content, so the same archive under
+two paths is imported once, and an archive that changed on disk is imported
+again. When more than max_entries archives are cached, the least recently
+used master is closed.
+
+    cache = template_cache.shared_cache()
+    component = adsk_utilities.open_template("constant_head_tank.f3z", fdoc.design.rootComponent, cache=cache)
+"""
+
+import os
+import hashlib
+import collections
+import adsk.core
+import tracing
+
+_CHUNK = 1 << 20
+
+
+class _Entry:
+    __slots__ = ("master", "components")
+
+    def __init__(self, master):
+        self.master = master
+        # [(design, component)] of the designs the archive was imported into.
+        self.components = []
+
+
+class TemplateCache:
+    """Imports archives once and reuses what was imported.
+
+    Parameters
+    ----------
+    max_entries : int
+        The number of archives whose master documents are kept open at most.
+
+    Attributes
+    ----------
+    hits : int
+        Imports served without importing the archive.
+    misses : int
+        Imports of an archive into a master document.
+    evictions : int
+        Master documents closed to stay within max_entries.
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        # {absolute path: (size, modification time, hash)}, so unchanged archives are only read once.
+        self._hashes = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"cached": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+    def content_hash(self, file_path):
+        """The SHA-1 of the archive at file_path, read again only when its size or modification time change."""
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            raise UserWarning("Unable to find the .f3d archive at {}.".format(file_path))
+        known = self._hashes.get(file_path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        digest = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+        self._hashes[file_path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        return digest.hexdigest()
+
+    def master(self, file_path):
+        """Return the master document of the archive at file_path, importing it if needed.
+
+        The master is shared by everything using the cache, so don't change
+        or close it.
+        """
+        return self._entry(file_path).master
+
+    def import_to_target(self, file_path, target_component, copy=False):
+        """Put the archive at file_path into target_component and return the occurrence.
+
+        Parameters
+        ----------
+        copy : bool
+            When the design already holds the archive, add an independent copy
+            of it instead of another occurrence of the same component.
+        """
+        entry = self._entry(file_path)
+        design = target_component.parentDesign
+        for known_design, component in entry.components:
+            if design is not None and known_design == design:
+                if copy:
+                    return target_component.occurrences.addNewComponentCopy(component, _identity())
+                return target_component.occurrences.addExistingComponent(component, _identity())
+        occurrence = target_component.occurrences.addNewComponentCopy(entry.master.design.rootComponent,
+                                                                      _identity())
+        entry.components.append((design, occurrence.component))
+        return occurrence
+
+    def clear(self):
+        """Close every master document."""
+        for entry in self._entries.values():
+            _close(entry.master)
+        self._entries.clear()
+
+    def _entry(self, file_path):
+        key = self.content_hash(file_path)
+        entry = self._entries.get(key)
+        if entry is not None and entry.master.isValid:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        import_manager = adsk.core.Application.get().importManager
+        try:
+            import_options = import_manager.createFusionArchiveImportOptions(file_path)
+        except Exception:
+            raise UserWarning("Unable to find the .f3d archive at {}.".format(file_path))
+        with tracing.span("ImportManager.importToNewDocument", "adsk", file_path=file_path):
+            master = import_manager.importToNewDocument(import_options)
+        entry = self._entries[key] = _Entry(master)
+        self.misses += 1
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            _close(evicted.master)
+            self.evictions += 1
+        return entry
+
+
+def _identity():
+    return adsk.core.Matrix3D.create()
+
+
+def _close(fdoc):
+    if fdoc.isValid:
+        fdoc.close(False)
+
+
+_shared = None
+
+
+def shared_cache():
+    """Return the cache shared by open_template and the fgens, making it on first use."""
+    global _shared
+    if _shared is None:
+        _shared = TemplateCache()
+    return _shared
+
+
+def set_shared_cache(cache):
+    """Replace the shared cache, such as to change its size. Returns the old cache."""
+    global _shared
+    old, _shared = _shared, cache
+    return old
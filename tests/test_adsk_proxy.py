@@ -0,0 +1,116 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import adsk_proxy
+import aide_draw
+import document_pool
+import generate_json
+
+plant_tree = {
+    "plant:folder": {
+        "flocculator:folder": {
+            "baffle:fdoc": {"parameters": {"width": "1 in"}},
+            "channel:fdoc": {},
+        },
+        "sed_tank:folder": {
+            "plate:fdoc": {},
+        },
+    },
+}
+
+
+class test_adsk_proxy(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency())
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+        self.plant = self.backend.root_folder.dataFolders.itemByName("plant")
+        self.flocculator = self.plant.dataFolders.itemByName("flocculator")
+        self.old_pool = document_pool.set_shared_pool(document_pool.DocumentPool())
+        self.backend.reset_counters()
+
+    def tearDown(self):
+        document_pool.shared_pool().close_all()
+        document_pool.set_shared_pool(self.old_pool)
+
+    def test_outside_a_transaction_the_live_collection_is_returned(self):
+        self.assertIsNone(adsk_proxy.current())
+        files = adsk_proxy.data_files(self.flocculator)
+        self.assertIsInstance(files, adsk_sim.core.DataFiles)
+
+    def test_sync_dict_reads_each_listing_once(self):
+        generate_json.sync_dict({}, self.backend.root_folder)
+        # The root, plant, flocculator and sed_tank folders.
+        self.assertEqual(self.backend.calls["DataFolders.count"], 4)
+        self.assertEqual(self.backend.calls["DataFiles.count"], 4)
+        self.assertEqual(self.backend.calls["DataFiles.item"], 3)
+
+    def test_reads_are_counted(self):
+        with adsk_proxy.transaction() as tx:
+            for _ in range(3):
+                files = adsk_proxy.data_files(self.flocculator)
+                names = [files.item(i).name for i in range(files.count)]
+        self.assertEqual(names, ["baffle", "channel"])
+        self.assertEqual(self.backend.calls["DataFiles.item"], 2)
+        # The collection, its count and two items, then the same again from memory twice.
+        self.assertEqual(tx.remote_reads, 4)
+        self.assertEqual(tx.reads_avoided, 8)
+        self.assertIsNone(adsk_proxy.current())
+
+    def test_nested_transaction_joins(self):
+        with adsk_proxy.transaction() as outer:
+            with adsk_proxy.transaction() as inner:
+                self.assertIs(inner, outer)
+            self.assertIs(adsk_proxy.current(), outer)
+
+    def test_find_version_reads_versions_once(self):
+        baffle = a_ut.find_dataFile(self.flocculator, "baffle")
+        adsk_sim.make_file(self.flocculator, "baffle")
+        with adsk_proxy.transaction() as tx:
+            a_ut.find_version(baffle, 1)
+            self.backend.reset_counters()
+            self.assertEqual(a_ut.find_version(baffle, 2).versionNumber, 2)
+        self.assertEqual(self.backend.calls["DataFile.versions"], 0)
+        self.assertGreater(tx.reads_avoided, 0)
+
+    def test_save_invalidates_folder_and_versions(self):
+        fdoc = self.backend.app.documents.add()
+        with adsk_proxy.transaction() as tx:
+            self.assertRaises(UserWarning, a_ut.find_dataFile, self.flocculator, "weir")
+            a_ut.find_version(a_ut.find_dataFile(self.flocculator, "baffle"), 1)
+            a_ut.save_fdoc_online(fdoc, self.flocculator, "weir")
+            self.assertEqual(a_ut.find_dataFile(self.flocculator, "weir").name, "weir")
+            a_ut.save_fdoc_online(fdoc, self.flocculator, "baffle")
+            baffle = a_ut.find_dataFile(self.flocculator, "baffle")
+            self.assertEqual(a_ut.find_version(baffle, 2).versionNumber, 2)
+        self.assertEqual(tx.invalidations, 3)
+
+    def test_added_folder_is_found(self):
+        with adsk_proxy.transaction():
+            self.assertRaises(UserWarning, a_ut.find_dataFolder, self.plant, "filter")
+            aide_draw.sync_folder_structure({"filter": {}}, self.plant)
+            self.assertEqual(a_ut.find_dataFolder(self.plant, "filter").name, "filter")
+        self.assertEqual(self.backend.calls["DataFolders.add"], 1)
+
+    def test_document_references(self):
+        baffle = a_ut.find_dataFile(self.flocculator, "baffle")
+        data_file = adsk_sim.make_file(self.plant, "assembly", references=[baffle])
+        fdoc = self.backend.app.documents.open(data_file)
+        with adsk_proxy.transaction():
+            for _ in range(2):
+                refs = adsk_proxy.document_references(fdoc)
+                self.assertEqual(refs.count, 1)
+                refs.item(0)
+        self.assertEqual(self.backend.calls["FusionDocument.documentReferences"], 1)
+        self.assertEqual(self.backend.calls["DocumentReferences.item"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
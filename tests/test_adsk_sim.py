@@ -0,0 +1,71 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+filename = os.path.join(dir, '../')
+sys.path.append(filename)
+
+import adsk_sim
+
+cube_tree = {
+    "plant:folder": {
+        "cube:fdoc": {"parameters": {"width": "1 in", "height": "2 in"}},
+    },
+}
+
+
+class test_adsk_sim(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency(server=0.3, upload=2.0))
+        adsk_sim.make_tree(self.backend.root_folder, cube_tree)
+
+    def test_install_registers_adsk_modules(self):
+        import adsk.core, adsk.fusion
+        self.assertIs(adsk.core.Application.get(), self.backend.app)
+        self.assertIs(adsk.fusion.FusionDocument, adsk_sim.fusion.FusionDocument)
+
+    def test_server_calls_are_counted_and_charged(self):
+        app = self.backend.app
+        folder = app.data.activeProject.rootFolder.dataFolders.itemByName("plant")
+        fdoc = app.documents.open(folder.dataFiles.item(0))
+        self.assertEqual(fdoc.design.userParameters.itemByName("width").expression, "1 in")
+        self.assertEqual(self.backend.calls["Documents.open"], 1)
+        self.assertEqual(self.backend.server_calls, 3)
+        self.assertAlmostEqual(self.backend.clock, 0.9)
+
+    def test_parameter_writes_recompute_unless_deferred(self):
+        app = self.backend.app
+        folder = self.backend.root_folder.dataFolders.itemByName("plant")
+        design = app.documents.open(folder.dataFiles.item(0)).design
+        design.allParameters.itemByName("width").expression = "3 in"
+        design.isComputeDeferred = True
+        design.allParameters.itemByName("width").expression = "4 in"
+        design.allParameters.itemByName("height").expression = "5 in"
+        design.isComputeDeferred = False
+        self.assertEqual(self.backend.calls["Design.compute"], 2)
+
+    def test_save_as_creates_versions_and_finishes_upload(self):
+        app = self.backend.app
+        folder = self.backend.root_folder.dataFolders.itemByName("plant")
+        fdoc = app.documents.open(folder.dataFiles.item(0))
+        fdoc.design.allParameters.itemByName("width").expression = "3 in"
+        completed = []
+
+        class Handler(adsk_sim.core.DataEventHandler):
+            def notify(self, args):
+                completed.append(args.file)
+
+        app.dataFileComplete.add(Handler())
+        fdoc.saveAs("cube", folder, "", "")
+        adsk_sim.doEvents()
+        self.assertEqual(completed, [])
+        self.backend.advance(2.0)
+        adsk_sim.doEvents()
+        self.assertEqual(len(completed), 1)
+        self.assertEqual(completed[0].versionNumber, 2)
+        self.assertEqual(completed[0].versions.count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os, sys, json, gc, shutil, tempfile, tracemalloc
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import aide_assembly
+from aide_assembly import AideAssembly, Folder, Fdoc
+
+
+def plant():
+    return {
+        "plant:folder": {
+            "flocculator:folder": {
+                "baffle:fdoc": {"parameters": {"length": "1 m", "width": "2 m"},
+                                "open_template": {"fdoc_template": "test_cube"}},
+                "tank:fdoc": {"parameters": {"height": "3 m"},
+                              "fdocs": {"baffle": {"parameters": {"length": "2 m"}, "lfom": {"hole_list": [1, 2]}}}},
+            },
+            "baffle:fdoc": {"open_template": {"fdoc_template": "test_cube"}},
+            "empty:folder": {},
+        }
+    }
+
+
+class test_aide_assembly(unittest.TestCase):
+
+    def setUp(self):
+        self.assembly = AideAssembly.from_dict(plant())
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        self.assertEqual(json.loads(json.dumps(self.assembly.to_dict())), plant())
+        json_path = os.path.join(self.tmp, "plant.json")
+        self.assembly.save(json_path)
+        with open(json_path) as f:
+            self.assertEqual(json.load(f), plant())
+        self.assertEqual(AideAssembly(json_path).to_dict(), self.assembly.to_dict())
+
+    def test_nodes(self):
+        tank = self.assembly.find("plant/flocculator/tank")
+        self.assertIsInstance(tank, Fdoc)
+        self.assertEqual(tank.path, ("plant", "flocculator", "tank"))
+        self.assertEqual(tank.key, "tank:fdoc")
+        self.assertEqual(tank.parameters, {"height": "3 m"})
+        self.assertEqual(tank.links[0].args("lfom"), {"hole_list": [1, 2]})
+        self.assertIsNone(tank.args("open_template"))
+        self.assertIs(self.assembly.find(("plant", "flocculator")), tank.parent)
+        self.assertIsNone(self.assembly.find("plant/flocculator/tank/baffle"))
+        self.assertIsNone(self.assembly.find("plant/missing"))
+        self.assertEqual(len(self.assembly), 6)
+
+    def test_indexes(self):
+        a = self.assembly
+        self.assertEqual(sorted(n.path for n in a.nodes_named("baffle")),
+                         [("plant", "baffle"), ("plant", "flocculator", "baffle")])
+        self.assertEqual(a.nodes_named("tank"), [a.find("plant/flocculator/tank")])
+        self.assertEqual(len(a.fdocs_using_template("test_cube")), 2)
+        self.assertEqual(a.fdocs_with_fgen("lfom"), [a.find("plant/flocculator/tank")])
+        self.assertEqual(len(a.folders()), 3)
+        self.assertEqual(len(a.fdocs()), 3)
+
+    def test_equal_values_are_shared(self):
+        first = self.assembly.find("plant/flocculator/baffle")
+        second = self.assembly.find("plant/baffle")
+        self.assertIs(first.args("open_template"), second.args("open_template"))
+        self.assertIs(first.name, second.name)
+
+    def test_changes(self):
+        a = self.assembly
+        folder = a.add_folder(a.find("plant"), "filter")
+        fdoc = a.add_fdoc(folder, "baffle", {"open_template": {"fdoc_template": "test_cube"}})
+        self.assertIs(a.find("plant/filter/baffle"), fdoc)
+        self.assertEqual(len(a.nodes_named("baffle")), 3)
+        with self.assertRaises(ValueError):
+            a.add_folder(a.find("plant"), "filter")
+
+        a.remove(a.find("plant/flocculator"))
+        self.assertIsNone(a.find("plant/flocculator"))
+        self.assertEqual(a.nodes_named("tank"), [])
+        self.assertEqual(a.fdocs_with_fgen("lfom"), [])
+        self.assertEqual(len(a.nodes_named("baffle")), 2)
+        self.assertEqual(len(a), 5)
+
+    def test_untyped_folders(self):
+        synced = {"plant": {"data_folder": None, "folders": {"tank:fdoc": {"data_file": None, "parameters": {}}}}}
+        a = AideAssembly.from_dict(synced)
+        self.assertIsInstance(a.find("plant"), Folder)
+        self.assertEqual(a.to_dict(), {"plant:folder": {"tank:fdoc": {"parameters": {}}}})
+        with self.assertRaises(ValueError):
+            AideAssembly.from_dict({"plant:folder": {"tank": 1}})
+
+    def test_smaller_than_dicts(self):
+        tree = {"folder_{}:folder".format(i): {
+            "part_{}_{}:fdoc".format(i, j): {"parameters": {"length": "{} in".format(j), "width": "2 in"},
+                                             "open_template": {"fdoc_template": "cube"}}
+            for j in range(100)} for i in range(50)}
+        json_path = os.path.join(self.tmp, "plant.json")
+        with open(json_path, "w") as f:
+            json.dump(tree, f)
+        del tree
+
+        gc.collect()
+        tracemalloc.start()
+        with open(json_path) as f:
+            tree = json.load(f)
+        dict_size = tracemalloc.get_traced_memory()[0]
+        del tree
+        gc.collect()
+        tracemalloc.stop()
+        tracemalloc.start()
+        assembly = AideAssembly(json_path)
+        gc.collect()
+        assembly_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertEqual(len(assembly), 5050)
+        self.assertLess(assembly_size, dict_size * 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import utilities as ut
+import aide_schema
+
+
+class test_aide_schema(unittest.TestCase):
+
+    def json_paths(self, tree, **kwargs):
+        return [v.json_path for v in aide_schema.validate(tree, **kwargs)]
+
+    def test_repo_jsons_are_valid(self):
+        for name in ["test_folder_creation", "test_sync_dict_with_two_level_dict"]:
+            tree = ut._load_json(os.path.join(dir, "../test_data/json/{}.json".format(name)))
+            self.assertEqual(aide_schema.validate(tree), [])
+        tree = ut._load_json(os.path.join(dir, "../test_data/json/test_update_params.json"))
+        self.assertEqual(aide_schema.validate(tree, root=aide_schema.FDOC), [])
+
+    def test_every_violation_is_reported_with_its_path(self):
+        tree = {
+            "plant:folder": {
+                "tank:fdoc": {"parameters": {"height": ["2 m"]}, "paint": {}},
+                "pipe:pdoc": {},
+                "a:b:fdoc": {},
+            },
+            "data_folder": {},
+            "lfom:fdoc": {"fdocs": {"pipe": {"parameters": "1 m"}}},
+        }
+        self.assertEqual(self.json_paths(tree, fgen_names=["parameters", "fdocs"]), [
+            "/data_folder",
+            "/plant:folder/pipe:pdoc",
+            "/plant:folder/a:b:fdoc",
+            "/plant:folder/tank:fdoc/parameters/height",
+            "/plant:folder/tank:fdoc/paint",
+            "/lfom:fdoc/fdocs/pipe/parameters",
+        ])
+
+    def test_refs_are_allowed_in_synced_dicts(self):
+        tree = {"plant": {"data_folder": None, "folders": {"tank:fdoc": {"data_file": None, "parameters": {}}}}}
+        self.assertEqual(len(aide_schema.validate(tree)), 2)
+        self.assertEqual(aide_schema.validate(tree, allow_refs=True), [])
+
+    def test_check_raises(self):
+        with self.assertRaises(aide_schema.SchemaError) as context:
+            aide_schema.check({"tank:fdoc": []})
+        self.assertIn("/tank:fdoc", str(context.exception))
+
+    def test_slash_in_key_is_escaped(self):
+        self.assertEqual(self.json_paths({"a/b:pdoc": {}}), ["/a~1b:pdoc"])
+
+
+if __name__ == '__main__':
+    unittest.main()
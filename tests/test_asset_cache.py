@@ -0,0 +1,136 @@
+import unittest
+import os, sys, shutil, tempfile, threading, hashlib, collections
+import http.server
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import asset_cache
+
+
+class AssetServer(http.server.ThreadingHTTPServer):
+    """Serves self.assets {path: bytes} with ETags, counting the requests."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), AssetHandler)
+        self.assets = {}
+        self.requests = collections.Counter()
+        self.not_modified = 0
+
+    def url(self, path):
+        return "http://127.0.0.1:{}{}".format(self.server_address[1], path)
+
+
+class AssetHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.requests[self.path] += 1
+        content = server.assets.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class test_asset_cache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = AssetServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.assets = {"/tank.f3z": b"tank" * 100, "/same.f3z": b"tank" * 100, "/cat.jpg": b"cat"}
+        self.server.requests.clear()
+        self.server.not_modified = 0
+        self.directory = tempfile.mkdtemp()
+        self.cache = asset_cache.AssetCache(self.directory, offline=False)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_fetch_is_cached(self):
+        url = self.server.url("/tank.f3z")
+        path = self.cache.fetch(url)
+        self.assertEqual(self.read(path), b"tank" * 100)
+        self.assertEqual(self.cache.fetch(url), path)
+        self.assertEqual(self.server.requests["/tank.f3z"], 1)
+        self.assertEqual((self.cache.downloads, self.cache.hits), (1, 1))
+
+    def test_content_addressed(self):
+        first = self.cache.fetch(self.server.url("/tank.f3z"))
+        second = self.cache.fetch(self.server.url("/same.f3z"))
+        self.assertEqual(first, second)
+        self.assertEqual(os.path.basename(first), hashlib.sha256(b"tank" * 100).hexdigest())
+        self.assertEqual(self.cache.size, 400)
+
+    def test_revalidation(self):
+        url = self.server.url("/cat.jpg")
+        path = self.cache.fetch(url)
+        self.assertEqual(self.cache.fetch(url, max_age=0), path)
+        self.assertEqual((self.server.not_modified, self.cache.revalidated), (1, 1))
+
+        self.server.assets["/cat.jpg"] = b"another cat"
+        new_path = self.cache.fetch(url, max_age=0)
+        self.assertEqual(self.read(new_path), b"another cat")
+        # Nothing else used the old content, so its file is gone.
+        self.assertFalse(os.path.exists(path))
+
+    def test_offline_and_unreachable(self):
+        url = self.server.url("/cat.jpg")
+        path = self.cache.fetch(url)
+        del self.server.assets["/cat.jpg"]
+        # The server fails, so the cached copy is used.
+        self.assertEqual(self.cache.fetch(url, max_age=0), path)
+        self.assertEqual(self.cache.stale, 1)
+
+        offline = asset_cache.AssetCache(self.directory, offline=True)
+        self.assertEqual(offline.fetch(url, max_age=0), path)
+        with self.assertRaises(asset_cache.AssetUnavailable):
+            offline.fetch(self.server.url("/tank.f3z"))
+        offline.close()
+        self.assertEqual(self.server.requests["/tank.f3z"], 0)
+
+    def test_prefetch(self):
+        urls = [self.server.url(p) for p in ["/tank.f3z", "/cat.jpg", "/missing"]]
+        results = self.cache.prefetch(urls + urls[:1])
+        self.assertEqual(self.read(results[urls[1]]), b"cat")
+        self.assertIsInstance(results[urls[2]], asset_cache.AssetUnavailable)
+        self.assertEqual(self.server.requests["/tank.f3z"], 1)
+
+    def test_eviction(self):
+        self.cache.max_bytes = 500
+        self.cache.fetch(self.server.url("/cat.jpg"))
+        self.server.assets["/big"] = b"b" * 499
+        self.cache.fetch(self.server.url("/big"))
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertNotIn(self.server.url("/cat.jpg"), self.cache)
+        self.assertIn(self.server.url("/big"), self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import cylindrical_pattern_feature as cpf
+
+HOLE_LIST = [4, 1, 4, 6, 6, 6, 2, 4]
+
+
+class test_cylindrical_pattern_feature(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        data_file = adsk_sim.make_file(self.backend.root_folder, "lfom", {"d": "1 in"},
+                                       features=["lfom_hole", "lfom_seed"])
+        self.fdoc = self.backend.app.documents.open(data_file)
+        self.backend.reset_counters()
+
+    def patterns(self):
+        features = self.fdoc.design.rootComponent.features.circularPatternFeatures
+        return {f.name: f for f in (features.item(i) for i in range(features.count))}
+
+    def test_groups(self):
+        groups = cpf.pattern_groups(HOLE_LIST, 24)
+        self.assertEqual([(n, rows) for n, _, rows in groups], [(2, [6]), (4, [0, 2, 7]), (6, [3, 4, 5])])
+        self.assertEqual(groups[1][1], 45.0)
+        with self.assertRaises(UserWarning):
+            cpf.pattern_groups([30], 24)
+
+    def test_batch_recomputes_once(self):
+        report = cpf.start(HOLE_LIST, 24, "lfom_hole", "lfom_seed", self.fdoc)
+        self.assertEqual(len(report.created), 3)
+        self.assertEqual(report.recomputes, 1)
+        self.assertEqual(self.backend.calls["CircularPatternFeatures.add"], 3)
+        self.assertEqual(self.backend.calls["Design.compute"], 1)
+        six = self.patterns()["cylindrical_pattern_feature_6_holes"]
+        self.assertEqual(six.quantity.value, 6)
+        self.assertEqual(six.totalAngle.expression, "75 deg")
+        self.assertEqual(six.inputEntities.count, 3)
+
+    def test_unbatched_recomputes_per_row(self):
+        cpf.start(HOLE_LIST, 24, "lfom_hole", "lfom_seed", self.fdoc, batch=False)
+        self.assertEqual(self.backend.calls["CircularPatternFeatures.add"], 7)
+        self.assertEqual(self.backend.calls["Design.compute"], 7)
+
+    def test_redraw_updates_in_place(self):
+        cpf.start(HOLE_LIST, 24, "lfom_hole", "lfom_seed", self.fdoc)
+        self.backend.reset_counters()
+        report = cpf.start(HOLE_LIST, 24, "lfom_hole", "lfom_seed", self.fdoc)
+        self.assertEqual((len(report.unchanged), report.recomputes), (3, 0))
+        self.assertEqual(self.backend.calls["Design.compute"], 0)
+
+        report = cpf.start([4, 1, 4, 6, 6, 3, 3, 4], 24, "lfom_hole", "lfom_seed", self.fdoc)
+        self.assertEqual((report.created, report.updated, report.unchanged, report.deleted),
+                         (["cylindrical_pattern_feature_3_holes"], ["cylindrical_pattern_feature_6_holes"],
+                          ["cylindrical_pattern_feature_4_holes"], ["cylindrical_pattern_feature_2_holes"]))
+        self.assertEqual(report.recomputes, 1)
+        self.assertEqual(sorted(self.patterns()), ["cylindrical_pattern_feature_3_holes",
+                                                   "cylindrical_pattern_feature_4_holes",
+                                                   "cylindrical_pattern_feature_6_holes"])
+        self.assertEqual(self.patterns()["cylindrical_pattern_feature_6_holes"].inputEntities.count, 2)
+
+    def test_batches_with_overlapping_prefixes(self):
+        cpf.start([4, 6], 24, "lfom_hole", "lfom_seed", self.fdoc, name_prefix="seed")
+        cpf.start([2, 3], 24, "lfom_hole", "lfom_seed", self.fdoc, name_prefix="seed_even")
+        self.backend.reset_counters()
+        odd = cpf.start([4, 6], 24, "lfom_hole", "lfom_seed", self.fdoc, name_prefix="seed")
+        even = cpf.start([2, 3], 24, "lfom_hole", "lfom_seed", self.fdoc, name_prefix="seed_even")
+        self.assertEqual((odd.deleted, len(odd.unchanged)), ([], 2))
+        self.assertEqual((even.created, len(even.unchanged)), ([], 2))
+        self.assertEqual(self.backend.calls["Design.compute"], 0)
+
+    def test_pure_python_groups_match(self):
+        np, cpf.np = cpf.np, None
+        try:
+            groups = cpf.pattern_groups(HOLE_LIST, 24)
+        finally:
+            cpf.np = np
+        self.assertEqual(groups, [(2, 15.0, [6]), (4, 45.0, [0, 2, 7]), (6, 75.0, [3, 4, 5])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import document_pool
+import generate_json
+
+
+class test_document_pool(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        self.files = [adsk_sim.make_file(self.backend.root_folder, "part_{}".format(i), {"width": "{} in".format(i)})
+                      for i in range(5)]
+        self.pool = document_pool.DocumentPool(max_open=2)
+
+    def test_reopening_reuses_the_handle(self):
+        fdoc = self.pool.open(self.files[0])
+        self.assertIs(self.pool.open(self.files[0]), fdoc)
+        self.assertEqual(self.backend.calls["Documents.open"], 1)
+        self.assertEqual(self.pool.hits, 1)
+
+    def test_least_recently_used_clean_documents_are_closed(self):
+        for data_file in self.files:
+            self.pool.open(data_file)
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.backend.app.documents.count, 2)
+        self.assertEqual(self.pool.closes, 3)
+
+    def test_pinned_and_dirty_documents_stay_open(self):
+        with self.pool.pinned(self.files[0]) as pinned:
+            dirty = self.pool.open(self.files[1])
+            dirty.design.userParameters.itemByName("width").expression = "9 in"
+            for data_file in self.files[2:]:
+                self.pool.open(data_file)
+            self.assertTrue(pinned.isValid and dirty.isValid)
+        self.assertFalse(pinned.isValid)
+
+    def test_memory_budget(self):
+        pool = document_pool.DocumentPool(max_open=10, max_memory_mb=100, size_estimator=lambda d: 40)
+        for data_file in self.files:
+            pool.open(data_file)
+        self.assertLessEqual(pool.memory_mb, 100)
+
+    def test_already_open_documents_are_adopted_not_closed(self):
+        fdoc = self.backend.app.documents.open(self.files[0])
+        self.assertIs(self.pool.open(self.files[0]), fdoc)
+        self.assertEqual(self.pool.close_all(), 0)
+        self.assertTrue(fdoc.isValid)
+
+    def test_sync_dict_uses_the_pool(self):
+        generate_json.get_parameter_dictionary(self.files[0], self.pool)
+        self.assertEqual(generate_json.get_parameter_dictionary(self.files[0], self.pool), {"width": "0 in"})
+        self.assertEqual(self.backend.calls["Documents.open"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
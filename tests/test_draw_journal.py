@@ -0,0 +1,146 @@
+import unittest
+import os, sys, json, tempfile, shutil
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import aide_draw
+import document_pool
+import draw_journal
+import generate_json
+import run_manifest
+import save_queue
+
+plant_tree = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "1 m"}},
+        "pipe:fdoc": {"parameters": {"length": "1 m"}},
+        "weir:fdoc": {"parameters": {"length": "1 m"}},
+    },
+}
+
+
+def plant_dict(pipe_parameters):
+    return {"plant": {"folders": {
+        "tank:fdoc": {"parameters": {"height": "2 m"}},
+        "pipe:fdoc": {"parameters": pipe_parameters},
+        "weir:fdoc": {"parameters": {"length": "20 cm"}},
+    }}}
+
+
+class test_draw_journal(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+        self.old_pool = document_pool.set_shared_pool(document_pool.DocumentPool())
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "plant.journal")
+
+    def tearDown(self):
+        draw_journal.stop()
+        document_pool.set_shared_pool(self.old_pool)
+        shutil.rmtree(self.tmp)
+
+    def draw(self, pipe_parameters):
+        folder_dict = generate_json.sync_dict(plant_dict(pipe_parameters), self.backend.root_folder)
+        # A manifest that isn't saved, as when Fusion itself crashes.
+        return aide_draw.draw_incremental(folder_dict, run_manifest.RunManifest())
+
+    def test_resume_skips_committed_saves(self):
+        with draw_journal.journaling(self.path):
+            # The pipe has no diameter, so the draw dies at the second fdoc.
+            self.assertRaises(UserWarning, self.draw, {"diameter": "1 m"})
+        self.backend.reset_counters()
+        with draw_journal.journaling(self.path, resume=True) as journal:
+            plan = self.draw({"length": "2 m"})
+        self.assertEqual(plan.resumed, [("plant", "tank")])
+        self.assertEqual(plan.drawn, [("plant", "pipe"), ("plant", "weir")])
+        self.assertEqual(self.backend.calls["Document.save"], 2)
+        self.assertEqual(journal.skipped, 1)
+        self.assertIn("saved before the run was interrupted", plan.report())
+        self.assertEqual(list(draw_journal.JournalState.read(self.path).saved),
+                         ["plant/tank", "plant/pipe", "plant/weir"])
+
+    def test_changed_fdoc_is_drawn_again(self):
+        with draw_journal.journaling(self.path):
+            self.draw({"length": "2 m"})
+        with draw_journal.journaling(self.path, resume=True):
+            plan = self.draw({"length": "3 m"})
+        self.assertEqual(plan.drawn, [("plant", "pipe")])
+
+    def test_save_helpers(self):
+        folder = a_ut.find_dataFolder(self.backend.root_folder, "plant")
+        fdoc = self.backend.app.documents.add()
+        with draw_journal.journaling(self.path):
+            a_ut.save_fdoc_online(fdoc, folder, "tank_2")
+        with draw_journal.journaling(self.path, resume=True) as journal:
+            self.backend.reset_counters()
+            self.assertIsNone(a_ut.save_fdoc_online(fdoc, folder, "tank_2"))
+            a_ut.save_fdoc_online(fdoc, folder, "tank_3")
+        self.assertEqual(self.backend.calls["Document.saveAs"], 1)
+        self.assertEqual(journal.skipped, 1)
+        self.assertEqual(journal.saved[(folder.id, "tank_3")]["version"], 1)
+
+    def test_coordinator_journals_finished_uploads(self):
+        folder = a_ut.find_dataFolder(self.backend.root_folder, "plant")
+        coordinator = save_queue.SaveCoordinator(poll_interval=0, clock=self.backend.now)
+        with draw_journal.journaling(self.path) as journal:
+            a_ut.save_fdoc_online(self.backend.app.documents.add(), folder, "tank_2", coordinator)
+            self.assertEqual(journal.saved, {})
+            coordinator.barrier()
+        coordinator.close()
+        self.assertIn((folder.id, "tank_2"), journal.saved)
+
+    def test_folders_and_drawn_documents(self):
+        with draw_journal.journaling(self.path) as journal:
+            aide_draw.sync_folder_structure({"plant": {}, "filter": {}}, self.backend.root_folder)
+            fdoc = self.backend.app.documents.add()
+            aide_draw.draw_fdoc(fdoc, {})
+        records = [json.loads(line) for line in open(self.path)]
+        self.assertEqual([(r["op"], r.get("name"), r.get("created")) for r in records[1:3]],
+                         [("folder", "plant", False), ("folder", "filter", True)])
+        self.assertEqual(records[3]["op"], draw_journal.DRAWN)
+        self.assertEqual(list(journal.drawn), [draw_journal.document_name(fdoc)])
+
+    def test_torn_line_is_dropped(self):
+        with draw_journal.journaling(self.path):
+            aide_draw.sync_folder_structure({"plant": {}}, self.backend.root_folder)
+        with open(self.path, "a") as f:
+            f.write('{"op":"folder","par')
+        self.assertTrue(draw_journal.JournalState.read(self.path).torn)
+        with draw_journal.journaling(self.path, resume=True) as journal:
+            self.assertEqual((journal.replayed, len(journal.folders)), (2, 1))
+            aide_draw.sync_folder_structure({"filter": {}}, self.backend.root_folder)
+        self.assertFalse(draw_journal.JournalState.read(self.path).torn)
+        self.assertEqual(len(draw_journal.JournalState.read(self.path).folders), 2)
+
+    def test_fsync_in_batches(self):
+        now = [0.0]
+        journal = draw_journal.Journal(self.path, sync_every=4, sync_interval=10, clock=lambda: now[0])
+        fdoc = self.backend.app.documents.add()
+        for _ in range(9):
+            journal.document_drawn(draw_journal.document_name(fdoc), "hash")
+        # One for the first line, then one every 4 lines.
+        self.assertEqual(journal.syncs, 3)
+        now[0] = 11
+        journal.document_drawn(draw_journal.document_name(fdoc), "hash")
+        self.assertEqual(journal.syncs, 4)
+        journal.close()
+
+    def test_cli(self):
+        import io, contextlib
+        with draw_journal.journaling(self.path):
+            self.draw({"length": "2 m"})
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(draw_journal.main([self.path]), 0)
+        self.assertIn("3 saves committed", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
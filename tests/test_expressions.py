@@ -0,0 +1,73 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+filename = os.path.join(dir, '../')
+sys.path.append(filename)
+
+from json_transformations import expressions
+
+plant_dict = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "2 m", "wall": "5 mm"}},
+        "pipe:fdoc": {"parameters": {"length": "tank.height + 2 * tank.wall", "od": "length / 100",
+                                     "angle": "d12 + tank.wall"}},
+        "floc:folder": {
+            "baffle:fdoc": {"parameters": {"height": "pipe.length - 10 cm", "spacing": "height / 4"}},
+        },
+    },
+}
+
+
+def pid(path, name):
+    return (tuple(path.split("/")), name)
+
+
+class test_expressions(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = expressions.ExpressionResolver(plant_dict)
+
+    def test_cross_fdoc_references_resolve_to_concrete_values(self):
+        self.assertEqual(self.resolver.concrete(pid("plant/pipe", "length")), "2.01 m")
+        self.assertEqual(self.resolver.concrete(pid("plant/floc/baffle", "spacing")), "0.4775 m")
+
+    def test_unknown_names_are_left_for_fusion(self):
+        self.assertEqual(self.resolver.concrete(pid("plant/pipe", "angle")), "d12 + (5 mm)")
+
+    def test_order_puts_dependencies_first(self):
+        order = self.resolver.order
+        self.assertLess(order.index(pid("plant/tank", "height")), order.index(pid("plant/pipe", "length")))
+        self.assertLess(order.index(pid("plant/pipe", "length")), order.index(pid("plant/floc/baffle", "height")))
+
+    def test_cycles_are_detected(self):
+        cyclic = {"a:fdoc": {"parameters": {"x": "b.y + 1 in"}}, "b:fdoc": {"parameters": {"y": "a.x"}}}
+        with self.assertRaises(expressions.CycleError) as cm:
+            expressions.ExpressionResolver(cyclic)
+        self.assertEqual(len(cm.exception.cycle), 3)
+
+    def test_update_touches_only_the_affected_cone(self):
+        before = self.resolver.evaluations
+        affected = self.resolver.set_expression(pid("plant/pipe", "length"), "3 m")
+        self.assertEqual(len(affected), 4)
+        self.assertEqual(self.resolver.evaluations - before, 4)
+        self.assertEqual(self.resolver.concrete(pid("plant/floc/baffle", "spacing")), "0.725 m")
+
+    def test_shared_subexpressions_are_memoized(self):
+        shared = {"a:fdoc": {"parameters": {"x": "1 in", "y": "(x * 2) + 1 in", "z": "(x * 2) + 1 in"}}}
+        resolver = expressions.ExpressionResolver(shared)
+        self.assertEqual(resolver.memo_hits, 2)
+        self.assertEqual(resolver.concrete(pid("a", "z")), "3 in")
+
+    def test_memo_keeps_only_current_values(self):
+        resolver = expressions.ExpressionResolver(plant_dict)
+        size = len(resolver._memo)
+        for i in range(50):
+            resolver.set_expression(pid("plant/tank", "height"), "{} m".format(i + 1))
+        self.assertEqual(len(resolver._memo), size)
+        self.assertEqual(resolver.concrete(pid("plant/pipe", "length")), "50.01 m")
+        self.assertEqual(expressions.parse.cache_info().maxsize, expressions.PARSE_CACHE_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import aide_draw
+import fgen_manager
+
+
+class test_fgen_manager(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        self.table = aide_draw.fgen_table()
+
+    def test_table_records_implemented_functions(self):
+        self.assertIsNotNone(self.table.fgens["parameters"].update)
+        self.assertIsNotNone(self.table.fgens["fdocs"].generate)
+
+    def test_missing_fgens_are_reported_up_front(self):
+        self.assertIn("download", self.table.missing)
+        with self.assertRaises(KeyError):
+            self.table.check({"parameters": {}, "fdocs": {"child": {"download": {}}}}, recursive=True)
+
+    def test_draw_fdoc_checks_before_running_any_fgen(self):
+        d = adsk_sim.make_file(self.backend.root_folder, "cube", {"width": "1 in"})
+        fdoc = self.backend.app.documents.open(d)
+        with self.assertRaises(KeyError):
+            aide_draw.draw_fdoc(fdoc, {"parameters": {"width": "2 in"}, "not_an_fgen": {}})
+        self.assertEqual(fdoc.design.userParameters.itemByName("width").expression, "1 in")
+        aide_draw.draw_fdoc(fdoc, {"parameters": {"width": "2 in"}})
+        self.assertEqual(fdoc.design.userParameters.itemByName("width").expression, "2 in")
+
+    def test_stubs_are_found_when_loaded(self):
+        class Stub:
+            def generate_fdoc(self, fdoc, args):
+                """Not written yet."""
+                raise NotImplementedError()
+
+            def update_fdoc(self, fdoc, args):
+                return args
+
+        fgen = fgen_manager.Fgen("stub", "", Stub())
+        self.assertIsNone(fgen.generate)
+        self.assertIsNotNone(fgen.update)
+
+    def test_not_implemented_skips_only_that_call(self):
+        calls = []
+
+        class Stub:
+            def update_fdoc(self, fdoc, args):
+                calls.append(args)
+                if args == 1:
+                    raise NotImplementedError
+                return args
+
+        table = fgen_manager.FgenTable({})
+        table.fgens["stub"] = fgen_manager.Fgen("stub", "", Stub())
+        self.assertIsNone(table.run("stub", object(), 1))
+        self.assertEqual(table.run("stub", object(), 2), 2)
+        self.assertEqual(calls, [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
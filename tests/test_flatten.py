@@ -0,0 +1,84 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+from json_transformations import flatten as fl
+
+normal_dict = {
+    'a': '0',
+    'b': {'a': '1.0', 'b': '1.1'},
+    'c': {'a': '2.0', 'b': {'a': '2.1.0', 'b': '2.1.1'}},
+}
+
+flat_normal_dict = {
+    ('a',): '0',
+    ('b', 'a'): '1.0',
+    ('b', 'b'): '1.1',
+    ('c', 'a'): '2.0',
+    ('c', 'b', 'a'): '2.1.0',
+    ('c', 'b', 'b'): '2.1.1',
+}
+
+aide_dict = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "1 m"}},
+        "lfom:fdoc": {"parameters": {"rows": 4}, "fdocs": {"pipe": {"parameters": {"length": "2 m"}}}},
+        "empty:folder": {},
+    },
+}
+
+
+class test_flatten(unittest.TestCase):
+
+    def test_flatten_dict(self):
+        self.assertEqual(fl.flatten(normal_dict), flat_normal_dict)
+
+    def test_flatten_dict_inverse(self):
+        self.assertEqual(fl.flatten(normal_dict, inverse=True), {v: k for k, v in flat_normal_dict.items()})
+        with self.assertRaises(ValueError):
+            fl.flatten({'a': '0', 'b': '0'}, inverse=True)
+
+    def test_path_reducer(self):
+        self.assertEqual(fl.flatten(normal_dict, "path")["c/b/a"], "2.1.0")
+
+    def test_aide_reducer_drops_types(self):
+        flat = fl.flatten(aide_dict, "aide")
+        self.assertEqual(flat[("plant", "tank", "parameters", "height")], "1 m")
+        with self.assertRaises(ValueError):
+            fl.unflatten(flat, "aide")
+
+    def test_unflatten_round_trip(self):
+        for reducer in ["tuple", "path"]:
+            self.assertEqual(fl.unflatten(fl.flatten(aide_dict, reducer), reducer), aide_dict)
+        self.assertEqual(fl.unflatten(fl.flatten(normal_dict, inverse=True), inverse=True), normal_dict)
+
+    def test_deep_tree_doesnt_recurse(self):
+        d = leaf = {}
+        for i in range(5 * sys.getrecursionlimit()):
+            leaf["k"] = {}
+            leaf = leaf["k"]
+        leaf["k"] = 1
+        flat = fl.flatten(d)
+        self.assertEqual(len(next(iter(flat))), 5 * sys.getrecursionlimit() + 1)
+
+    def test_flatten_many_shares_keys(self):
+        flats = fl.flatten_many([{"parameters": {"length": i}} for i in range(3)])
+        keys = [next(iter(flat)) for flat in flats]
+        self.assertEqual(keys[0], ("parameters", "length"))
+        self.assertIs(keys[0], keys[2])
+
+    def test_parameter_diff(self):
+        new = {"plant:folder": {
+            "tank:fdoc": {"parameters": {"height": "2 m"}},
+            "lfom:fdoc": {"parameters": {"rows": 4, "holes": 8}, "fdocs": {"pipe": {"parameters": {}}}},
+        }}
+        change = fl.parameter_diff(aide_dict, new)
+        self.assertEqual(change.changed, {(("plant", "tank"), "height"): ("1 m", "2 m")})
+        self.assertEqual(change.added, {(("plant", "lfom"), "holes"): 8})
+        self.assertEqual(change.removed, {(("plant", "lfom", "pipe"), "length"): "2 m"})
+
+
+if __name__ == '__main__':
+    unittest.main()
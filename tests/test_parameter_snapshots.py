@@ -0,0 +1,72 @@
+import unittest
+import os, sys, tempfile, shutil
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import adsk_sim
+adsk_sim.install()
+import document_pool
+import generate_json
+import parameter_snapshots
+
+
+def project_tree(n_files):
+    folders = {}
+    for i in range(n_files):
+        folder = folders.setdefault("folder_{}:folder".format(i % 10), {})
+        folder["part_{}:fdoc".format(i)] = {"parameters": {"length": "{} cm".format(i)}}
+    return folders
+
+
+class test_parameter_snapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        adsk_sim.make_tree(self.backend.root_folder, project_tree(500))
+        document_pool.set_shared_pool(document_pool.DocumentPool())
+        self.tmp = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.tmp, "snapshots.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def sync(self):
+        store = parameter_snapshots.SnapshotStore(self.store_path)
+        folder_dict = generate_json.sync_dict({}, self.backend.root_folder, store=store)
+        store.prune()
+        store.close()
+        return folder_dict, store
+
+    def test_unchanged_project_opens_nothing(self):
+        self.sync()
+        self.backend.reset_counters()
+        folder_dict, store = self.sync()
+        self.assertEqual(self.backend.calls["Documents.open"], 0)
+        self.assertEqual(store.hits, 500)
+        part = folder_dict["folder_3"]["folders"]["part_13:fdoc"]
+        self.assertEqual(part["parameters"], {"length": "13 cm"})
+
+    def test_new_version_is_read_again(self):
+        self.sync()
+        folder = self.backend.root_folder.dataFolders.itemByName("folder_3")
+        adsk_sim.make_file(folder, "part_13", {"length": "2 m"})
+        self.backend.reset_counters()
+        folder_dict, store = self.sync()
+        self.assertEqual(self.backend.calls["Documents.open"], 1)
+        self.assertEqual(store.outdated, 1)
+        self.assertEqual(folder_dict["folder_3"]["folders"]["part_13:fdoc"]["parameters"], {"length": "2 m"})
+
+    def test_deleted_files_are_pruned(self):
+        self.sync()
+        folder = self.backend.root_folder.dataFolders.itemByName("folder_3")
+        folder.dataFiles.itemByName("part_13").deleteMe()
+        _, store = self.sync()
+        self.assertEqual(store.pruned, 1)
+        store = parameter_snapshots.SnapshotStore(self.store_path)
+        self.assertEqual(len(store), 499)
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
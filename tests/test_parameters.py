@@ -0,0 +1,48 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import parameters
+
+
+class test_parameters(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        d = adsk_sim.make_file(self.backend.root_folder, "cube", {"width": "1 in", "height": "2 in", "length": "3 in"})
+        self.fdoc = self.backend.app.documents.open(d)
+
+    def test_normalize_expression(self):
+        self.assertEqual(parameters.normalize_expression("1.0 in"), parameters.normalize_expression("1in"))
+        self.assertEqual(parameters.normalize_expression("d2 * 2"), "d2*2.0")
+
+    def test_batch_skips_unchanged_and_recomputes_once(self):
+        self.backend.reset_counters()
+        changed = parameters.update_fdoc(self.fdoc, {"width": "1.0 in", "height": "5 in", "length": 4})
+        self.assertEqual(changed, ["height", "length"])
+        self.assertEqual(self.backend.calls["Parameter.setExpression"], 2)
+        self.assertEqual(self.backend.calls["Design.compute"], 1)
+        self.assertEqual(self.fdoc.design.userParameters.itemByName("length").expression, "4")
+
+    def test_report(self):
+        report = parameters.ParameterBatch(self.fdoc).apply({"width": "1 in", "height": "5 in", "length": "6 in"})
+        self.assertEqual((report.writes_avoided, report.recomputes, report.recomputes_avoided), (1, 1, 2))
+
+    def test_missing_parameter_is_reported_after_applying_the_rest(self):
+        with self.assertRaises(UserWarning):
+            parameters.update_fdoc(self.fdoc, {"depth": "1 in", "height": "5 in"})
+        self.assertEqual(self.fdoc.design.userParameters.itemByName("height").expression, "5 in")
+
+    def test_unbatched_writes_every_parameter(self):
+        self.backend.reset_counters()
+        parameters.update_fdoc(self.fdoc, {"width": "1 in", "height": "5 in"}, batch=False)
+        self.assertEqual(self.backend.calls["Design.compute"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os, sys, tempfile, shutil
+
+dir = os.path.dirname(__file__)
+filename = os.path.join(dir, '../')
+sys.path.append(filename)
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import path_index
+
+plant_tree = {
+    "plant:folder": {
+        "flocculator:folder": {
+            "baffle:fdoc": {"parameters": {"width": "1 in"}},
+            "channel:fdoc": {},
+        },
+    },
+}
+
+
+class test_path_index(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency())
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+        self.tmp = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.tmp, "index.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_find_dataFile_scans_past_first_file(self):
+        self.assertEqual(a_ut.find_fdoc_path("/plant/flocculator/channel").name, "channel")
+
+    def test_hit_costs_one_server_call(self):
+        index = path_index.PathIndex(self.index_path)
+        a_ut.find_fdoc_path("/plant/flocculator/channel", index=index)
+        self.backend.reset_counters()
+        d = a_ut.find_fdoc_path("/plant/../plant/flocculator/channel", index=index)
+        self.assertEqual(d.name, "channel")
+        self.assertEqual(self.backend.server_calls, 1)
+        self.assertEqual((index.hits, index.misses), (1, 1))
+
+    def test_index_persists_between_sessions(self):
+        index = path_index.PathIndex(self.index_path)
+        a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index)
+        index.save()
+        index = path_index.PathIndex(self.index_path)
+        self.backend.reset_counters()
+        a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index)
+        self.assertEqual(index.stats()["hits"], 1)
+        self.assertEqual(self.backend.server_calls, 1)
+
+    def test_new_version_and_deleted_file(self):
+        index = path_index.PathIndex()
+        d = a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index)
+        adsk_sim.make_file(d._parent, "baffle")
+        self.assertEqual(a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index).versionNumber, 2)
+        self.assertEqual(a_ut.find_fdoc_path("/plant/flocculator/baffle:1", index=index).versionNumber, 1)
+        self.assertEqual(index.refreshed, 1)
+        d.deleteMe()
+        with self.assertRaises(UserWarning):
+            a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index)
+        self.assertEqual(index.stale, 1)
+
+    def test_moved_file(self):
+        index = path_index.PathIndex()
+        d = a_ut.find_fdoc_path("/plant/flocculator/channel", index=index)
+        plant = d._parent._parent
+        d.move(plant)
+        with self.assertRaises(UserWarning):
+            a_ut.find_fdoc_path("/plant/flocculator/channel", index=index)
+        self.assertEqual(index.stale, 1)
+        self.assertEqual(a_ut.find_fdoc_path("/plant/channel", index=index).id, d.id)
+
+    def test_lru_eviction(self):
+        index = path_index.PathIndex(max_entries=1)
+        a_ut.find_fdoc_path("/plant/flocculator/baffle", index=index)
+        a_ut.find_fdoc_path("/plant/flocculator/channel", index=index)
+        self.assertEqual((len(index), index.evictions), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
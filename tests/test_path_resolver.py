@@ -0,0 +1,77 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import path_resolver
+
+plant_tree = {
+    "plant:folder": {
+        "flocculator:folder": {
+            "baffle:fdoc": {"parameters": {"width": "1 in"}},
+            "channel:fdoc": {"open_template": {"fdoc_template": "/plant/templates/channel:v1"}},
+        },
+        "sed_tank:folder": {
+            "plate:fdoc": {"fdocs": {"plate_holder": {"open_template": {"fdoc_template": "/plant/templates/holder"}}}},
+        },
+        "templates:folder": {
+            "channel:fdoc": {},
+            "holder:fdoc": {},
+        },
+    },
+}
+
+
+class test_path_resolver(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency())
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+        templates = self.backend.root_folder.dataFolders.itemByName("plant").dataFolders.itemByName("templates")
+        # A second version of channel.
+        adsk_sim.make_file(templates, "channel")
+        self.backend.reset_counters()
+
+    def test_collect_paths(self):
+        self.assertEqual(path_resolver.collect_paths(plant_tree), [
+            "plant/flocculator/baffle", "plant/flocculator/channel", "/plant/templates/channel:v1",
+            "plant/sed_tank/plate", "/plant/templates/holder", "plant/templates/channel", "plant/templates/holder"])
+
+    def test_normalize_folders(self):
+        self.assertEqual(path_resolver.normalize_folders(["..", "a", "b", "..", "c"]), ["..", "a", "c"])
+
+    def test_same_files_as_find_fdoc_path(self):
+        root = self.backend.root_folder
+        paths = path_resolver.collect_paths(plant_tree) + ["/plant/sed_tank/../flocculator/channel",
+                                                           "/plant/templates/channel:2"]
+        data_files = path_resolver.resolve_paths(paths, root)
+        for path in paths:
+            self.assertIs(data_files[path], a_ut.find_fdoc_path(path, root), path)
+
+    def test_calls_scale_with_folders(self):
+        root = self.backend.root_folder
+        paths = []
+        for i in range(20):
+            paths += ["plant/flocculator/baffle", "/plant/flocculator/../templates/channel:{}".format(i % 2 + 1),
+                      "plant/templates/holder", "plant/sed_tank/plate"]
+        data_files = path_resolver.resolve_paths(paths, root)
+        self.assertEqual(len(data_files), len(set(paths)))
+        # plant, flocculator, sed_tank and templates are each looked up once.
+        self.assertEqual(self.backend.calls["DataFolders.itemByName"], 4)
+        # flocculator, sed_tank and templates are each listed once.
+        self.assertEqual(self.backend.calls["DataFiles.count"] - self.backend.calls["DataFile.versions"], 3)
+        self.assertEqual(self.backend.calls["DataFile.versions"], 1)
+
+    def test_missing(self):
+        root = self.backend.root_folder
+        self.assertRaises(UserWarning, path_resolver.resolve_paths, ["plant/flocculator/weir"], root)
+        self.assertRaises(UserWarning, path_resolver.resolve_paths, ["plant/filter/bed"], root)
+        self.assertRaises(UserWarning, path_resolver.resolve_paths, ["plant/templates/channel:3"], root)
+
+
+if __name__ == '__main__':
+    unittest.main()
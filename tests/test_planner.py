@@ -0,0 +1,93 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import document_pool
+import planner
+
+plant_tree = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "1 m", "width": "1 m"}},
+        "pipe:fdoc": {"parameters": {"length": "1 m"}},
+    },
+}
+
+plant_json = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "2 m", "width": "1 m"}},
+        "pipe:fdoc": {"parameters": {"length": "3 m"}},
+    },
+}
+
+
+class test_planner(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency(server=0.3, compute=0.05, upload=1.0))
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+
+    def test_plan_is_flat_and_ordered(self):
+        plan = planner.plan_json(plant_json)
+        kinds = [op.kind for op in plan]
+        self.assertEqual(kinds[0], planner.CREATE_FOLDER)
+        self.assertEqual(kinds.count(planner.OPEN_DOCUMENT), 2)
+        self.assertEqual(kinds.count(planner.SET_PARAMETER), 3)
+        self.assertEqual(kinds[-2:], [planner.SAVE, planner.SAVE])
+
+    def test_repeated_json_is_merged(self):
+        plan = planner.plan_json(plant_json)
+        n_operations = len(plan)
+        plan.add_json({"plant:folder": {"tank:fdoc": {"parameters": {"height": "5 m"}}}})
+        self.assertEqual(len(plan), n_operations)
+        self.assertEqual(plan.merged[planner.OPEN_DOCUMENT], 1)
+        height = [op for op in plan if op.kind == planner.SET_PARAMETER and op.args["name"] == "height"]
+        self.assertEqual([op.args["expression"] for op in height], ["5 m"])
+
+    def test_linked_fdocs_and_patterns(self):
+        plan = planner.plan_json({"lfom:fdoc": {
+            "fdocs": {"pipe": {"parameters": {"length": "1 m"}}},
+            "cylindrical_pattern_feature": {"hole_list": [1, 4, 4]},
+        }})
+        opens = [op for op in plan if op.kind == planner.OPEN_DOCUMENT]
+        self.assertEqual([op.document for op in opens], ["lfom", "ref:pipe"])
+        self.assertEqual(plan.calls()["CircularPatternFeatures.add"], 1)
+
+    def test_assets(self):
+        import fgen_manager, lfom
+        table = fgen_manager.FgenTable({"lfom": {}, "parameters": {}})
+        plan = planner.plan_json({"a:fdoc": {"lfom": {"hole_list": [2]}}, "b:fdoc": {"lfom": {"hole_list": [3]}}})
+        self.assertEqual(plan.assets(table), [lfom.IMAGE_URL])
+        self.assertEqual(planner.plan_json(plant_tree).assets(table), [])
+
+    def test_estimate_matches_execution(self):
+        plan = planner.plan_json(plant_json)
+        cost = plan.estimate(self.backend.latency)
+        self.backend.reset_counters()
+        report = planner.execute(plan, self.backend.root_folder, document_pool.DocumentPool())
+        self.assertEqual(report.saved, ["plant/pipe", "plant/tank"])
+        self.assertEqual(report.done[planner.SET_PARAMETER], 3)
+        self.assertEqual(self.backend.calls["Documents.open"], 2)
+        self.assertEqual(self.backend.calls["Design.compute"], cost.calls["Design.compute"])
+        # The plan prices the folder as new, which it isn't here.
+        self.assertEqual(self.backend.server_calls, cost.round_trips - 1)
+
+    def test_cli_prints_plan(self):
+        import io, json, tempfile, contextlib
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(plant_json, f)
+        out = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(planner.main([f.name, "--summary"]), 0)
+        finally:
+            os.remove(f.name)
+        self.assertIn("server round trips", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
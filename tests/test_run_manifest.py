@@ -0,0 +1,72 @@
+import unittest
+import os, sys, tempfile, shutil
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import aide_draw
+import document_pool
+import generate_json
+import run_manifest
+
+plant_tree = {
+    "plant:folder": {
+        "tank:fdoc": {"parameters": {"height": "1 m"}},
+        "pipe:fdoc": {"parameters": {"length": "1 m"}},
+        "weir:fdoc": {"parameters": {"length": "1 m"}},
+    },
+}
+
+
+def plant_dict(tank_height):
+    return {"plant": {"folders": {
+        "tank:fdoc": {"parameters": {"height": tank_height}},
+        "pipe:fdoc": {"parameters": {"length": "tank.height + 10 cm"}},
+        "weir:fdoc": {"parameters": {"length": "20 cm"}},
+    }}}
+
+
+class test_run_manifest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        adsk_sim.make_tree(self.backend.root_folder, plant_tree)
+        # Documents opened by other tests belong to another backend.
+        self.old_pool = document_pool.set_shared_pool(document_pool.DocumentPool())
+        self.tmp = tempfile.mkdtemp()
+        self.manifest_path = run_manifest.manifest_path(os.path.join(self.tmp, "plant.json"))
+
+    def tearDown(self):
+        document_pool.set_shared_pool(self.old_pool)
+        shutil.rmtree(self.tmp)
+
+    def draw(self, tank_height):
+        folder_dict = generate_json.sync_dict(plant_dict(tank_height), self.backend.root_folder)
+        return aide_draw.draw_incremental(folder_dict, run_manifest.RunManifest(self.manifest_path))
+
+    def test_first_run_draws_everything(self):
+        plan = self.draw("2 m")
+        self.assertEqual(len(plan.drawn), 3)
+        self.assertEqual(set(plan.reasons.values()), {"new"})
+
+    def test_unchanged_run_skips_everything(self):
+        self.draw("2 m")
+        self.backend.reset_counters()
+        plan = self.draw("2 m")
+        self.assertEqual((len(plan.drawn), len(plan.skipped)), (0, 3))
+        self.assertEqual(self.backend.calls["Document.save"], 0)
+
+    def test_changed_fdoc_and_its_dependents_are_redrawn(self):
+        self.draw("2 m")
+        plan = self.draw("3 m")
+        self.assertEqual(plan.drawn, [("plant", "tank"), ("plant", "pipe")])
+        self.assertEqual(plan.reasons[("plant", "tank")], "parameters changed: height")
+        self.assertEqual(plan.reasons[("plant", "pipe")], "depends on plant/tank")
+        self.assertIn("skip plant/weir", plan.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
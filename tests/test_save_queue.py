@@ -0,0 +1,59 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+filename = os.path.join(dir, '../')
+sys.path.append(filename)
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import save_queue
+
+
+class test_save_queue(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency(server=0.3, upload=1.0))
+        self.folder = self.backend.root_folder
+        self.coordinator = save_queue.SaveCoordinator(max_in_flight=2, poll_interval=0, clock=self.backend.now)
+
+    def tearDown(self):
+        self.coordinator.close()
+
+    def new_fdoc(self):
+        return self.backend.app.documents.add()
+
+    def test_submit_returns_before_upload_finishes(self):
+        future = a_ut.save_fdoc_online(self.new_fdoc(), self.folder, "a", self.coordinator)
+        self.assertFalse(future.done())
+        self.assertEqual(self.coordinator.in_flight, 1)
+
+    def test_backpressure_caps_uploads_in_flight(self):
+        for name in ["a", "b", "c"]:
+            self.coordinator.submit(self.new_fdoc(), self.folder, name)
+            self.assertLessEqual(self.coordinator.in_flight, 2)
+        self.assertTrue(self.coordinator.futures[0].done())
+
+    def test_barrier_reports_every_save(self):
+        for name in ["a", "b", "c"]:
+            self.coordinator.submit(self.new_fdoc(), self.folder, name)
+        report = self.coordinator.barrier()
+        self.assertEqual(list(report.latencies), [(self.folder.id, name) for name in ["a", "b", "c"]])
+        self.assertTrue(all(f.done() and f.result().name == f.name for f in report.futures))
+        self.assertEqual(self.coordinator.in_flight, 0)
+        # The third save waited for a slot, so it took longer than the upload itself.
+        self.assertGreater(report.latencies[(self.folder.id, "c")], report.latencies[(self.folder.id, "a")])
+
+    def test_same_name_in_two_folders(self):
+        other = self.folder.dataFolders.add("other")
+        self.coordinator.submit(self.new_fdoc(), self.folder, "a")
+        self.coordinator.submit(self.new_fdoc(), other, "a")
+        self.coordinator.submit(self.new_fdoc(), other, "a")
+        latencies = self.coordinator.barrier().latencies
+        self.assertEqual(list(latencies), [(self.folder.id, "a"), (other.id, "a")])
+        self.assertEqual(len(latencies[(other.id, "a")]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
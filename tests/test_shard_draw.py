@@ -0,0 +1,153 @@
+import unittest
+import os, sys, multiprocessing
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import adsk_proxy
+import asset_cache
+import document_pool
+import planner
+import shard_draw
+import tracing
+
+plant_tree = {
+    "plant:folder": {
+        "flocculator:folder": {
+            "baffle:fdoc": {"parameters": {"width": "1 in"}},
+            "channel:fdoc": {"parameters": {"width": "1 in"}},
+        },
+        "sed_tank:folder": {
+            "plate:fdoc": {"parameters": {"length": "1 m"}},
+            "tube:fdoc": {"parameters": {"length": "1 m"}},
+        },
+        "tank:fdoc": {"parameters": {"height": "1 m"}},
+    },
+}
+
+plant_json = {
+    "plant:folder": {
+        "flocculator:folder": {
+            "baffle:fdoc": {"parameters": {"width": "2 in"}},
+            "channel:fdoc": {"parameters": {"width": "3 in"}},
+        },
+        "sed_tank:folder": {
+            "plate:fdoc": {"parameters": {"length": "2 m"}},
+            "tube:fdoc": {"parameters": {"length": "3 m"}},
+        },
+        "tank:fdoc": {"parameters": {"height": "2 m"}},
+    },
+}
+
+
+def install_plant(fail_on=None):
+    backend = adsk_sim.install()
+    tree = plant_tree
+    if shard_draw.current_worker() == fail_on:
+        # This worker's Fusion is missing the tube.
+        tree = {"plant:folder": dict(plant_tree["plant:folder"], **{"sed_tank:folder": {
+            "plate:fdoc": {"parameters": {"length": "1 m"}}}})}
+    adsk_sim.make_tree(backend.root_folder, tree)
+
+
+class test_shard_draw(unittest.TestCase):
+
+    def setUp(self):
+        adsk_sim.install()
+        self.context = multiprocessing.get_context("fork")
+
+    def test_independent_fdocs_are_separate_shards(self):
+        shards = shard_draw.shard(plant_json)
+        self.assertEqual([s.paths for s in shards], [[("plant", "flocculator", "baffle")],
+                                                     [("plant", "flocculator", "channel")],
+                                                     [("plant", "sed_tank", "plate")],
+                                                     [("plant", "sed_tank", "tube")],
+                                                     [("plant", "tank")]])
+        self.assertEqual(list(shards[0].folder_dict), ["plant:folder"])
+
+    def test_references_keep_fdocs_together(self):
+        linked = {"a:fdoc": {"fdocs": {"pipe": {}}}, "b:fdoc": {"fdocs": {"pipe": {}}}, "c:fdoc": {}}
+        self.assertEqual([s.paths for s in shard_draw.shard(linked)], [[("a",), ("b",)], [("c",)]])
+        dependent = {"plant:folder": {
+            "tank:fdoc": {"parameters": {"height": "1 m"}},
+            "pipe:fdoc": {"parameters": {"length": "2 * tank.height"}},
+            "weir:fdoc": {"parameters": {"width": "1 m"}},
+        }}
+        shards = shard_draw.shard(dependent)
+        self.assertEqual([s.paths for s in shards], [[("plant", "tank"), ("plant", "pipe")], [("plant", "weir")]])
+
+    def test_folders(self):
+        self.assertEqual(shard_draw.folders(plant_json), {"plant:folder": {"flocculator:folder": {},
+                                                                           "sed_tank:folder": {}}})
+
+    def test_scheduler_steals_from_the_back(self):
+        shards = [shard_draw.Shard(i, {}, [], weight) for i, weight in enumerate([10, 1, 1, 1])]
+        scheduler = shard_draw.Scheduler(shards, 2)
+        self.assertEqual([s.id for s in scheduler.queues[0]], [0])
+        self.assertEqual([s.id for s in scheduler.queues[1]], [1, 2, 3])
+        self.assertEqual(scheduler.next(0).id, 0)
+        self.assertEqual(scheduler.next(0).id, 3)
+        self.assertEqual(scheduler.steals, 1)
+        self.assertEqual(scheduler.next(1).id, 1)
+
+    def test_scheduler_retries_elsewhere(self):
+        s = shard_draw.Shard(0, {}, [], 1)
+        scheduler = shard_draw.Scheduler([], 2)
+        s.failed_on.add(0)
+        scheduler.retry(s)
+        self.assertIsNone(scheduler.next(0))
+        self.assertIs(scheduler.next(1), s)
+        # Once it failed on every worker, any worker may try again.
+        s.failed_on.add(1)
+        scheduler.retry(s)
+        self.assertIs(scheduler.next(0), s)
+
+    def test_worker_drops_inherited_state(self):
+        old_cache = asset_cache.set_shared_cache("cache")
+        old_pool = document_pool.set_shared_pool("pool")
+        try:
+            with adsk_proxy.transaction(), tracing.tracing():
+                dropped = shard_draw._reset_inherited()
+                self.assertIsNone(adsk_proxy.current())
+                self.assertFalse(tracing.enabled())
+            self.assertIn("cache", dropped)
+            self.assertIn("pool", dropped)
+            self.assertIsNone(asset_cache.set_shared_cache(None))
+        finally:
+            asset_cache.set_shared_cache(old_cache)
+            document_pool.set_shared_pool(old_pool)
+
+    def test_draw_sharded(self):
+        events = []
+        report = shard_draw.draw_sharded(plant_json, workers=2, initializer=install_plant, context=self.context,
+                                         poll_interval=0.01, progress=lambda s, kind, detail: events.append(kind))
+        self.assertEqual(report.failed, [])
+        self.assertEqual(sorted(report.saved), ["plant/flocculator/baffle", "plant/flocculator/channel",
+                                                "plant/sed_tank/plate", "plant/sed_tank/tube", "plant/tank"])
+        self.assertEqual(report.done[planner.SET_PARAMETER], 5)
+        self.assertEqual(sum(report.by_worker().values()), 5)
+        self.assertEqual(events.count(shard_draw.DONE), 6)
+        self.assertIn(shard_draw.PROGRESS, events)
+
+    def test_failed_shard_is_retried_on_another_worker(self):
+        report = shard_draw.draw_sharded(plant_json, workers=2, initializer=install_plant, initargs=(0,),
+                                         context=self.context, poll_interval=0.01)
+        self.assertEqual(report.failed, [])
+        tube = [s for s in report.shards if s.paths == [("plant", "sed_tank", "tube")]][0]
+        self.assertEqual(tube.worker, 1)
+        if tube.attempts > 1:
+            self.assertEqual(report.retries, 1)
+
+    def test_shard_failing_everywhere(self):
+        report = shard_draw.draw_sharded({"missing:fdoc": {}}, workers=1, initializer=install_plant,
+                                         retries=1, context=self.context, poll_interval=0.01)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.failed[0].attempts, 2)
+        self.assertIn("doesn't exist", report.failed[0].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
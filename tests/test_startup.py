@@ -0,0 +1,37 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+filename = os.path.join(dir, '../')
+sys.path.append(filename)
+sys.path.append(os.path.join(dir, '../benchmarks'))
+
+import adsk_sim
+adsk_sim.install()
+import import_time
+
+
+class test_startup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The time budget is checked by benchmarks/import_time.py only, as it depends on the machine's load.
+        cls.aide_us, cls.rows, cls.loaded = import_time.measure()
+
+    def test_draw_test_and_fgen_modules_are_lazy(self):
+        for module in import_time.LAZY_MODULES:
+            self.assertNotIn(module, self.loaded)
+
+    def test_run_registers_the_command_only(self):
+        backend = adsk_sim.install()
+        import aide, aide_gui
+        aide.run(None)
+        ui = backend.app.userInterface
+        self.assertIsNotNone(ui.commandDefinitions.itemById('aideInputs'))
+        self.assertIsNotNone(ui.allToolbarPanels.itemById('SolidScriptsAddinsPanel').controls.itemById('aideInputs'))
+        aide.stop(None)
+        self.assertIsNone(ui.commandDefinitions.itemById('aideInputs'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os, sys, shutil, tempfile
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+import adsk_sim
+adsk_sim.install()
+import adsk_utilities as a_ut
+import template_cache
+
+
+class test_template_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install()
+        self.cache = template_cache.TemplateCache(max_entries=2)
+        self.dir = tempfile.mkdtemp()
+        self.tank = self.archive("tank.f3z", b"tank")
+
+    def tearDown(self):
+        self.cache.clear()
+        shutil.rmtree(self.dir)
+
+    def archive(self, name, content):
+        file_path = os.path.join(self.dir, name)
+        with open(file_path, "wb") as f:
+            f.write(content)
+        return file_path
+
+    def new_design(self):
+        return self.backend.app.documents.add().design
+
+    def test_archive_is_imported_once(self):
+        designs = [self.new_design() for _ in range(3)]
+        for design in designs + designs:
+            a_ut.open_template(self.tank, design.rootComponent, cache=self.cache)
+        self.assertEqual(self.backend.calls["ImportManager.importToNewDocument"], 1)
+        self.assertEqual(self.backend.calls["ImportManager.importToTarget"], 0)
+        # One copy into each design, then an occurrence of that copy.
+        self.assertEqual(self.backend.calls["Occurrences.addNewComponentCopy"], 3)
+        self.assertEqual(self.backend.calls["Occurrences.addExistingComponent"], 3)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 5))
+
+    def test_copy(self):
+        design = self.new_design()
+        first = self.cache.import_to_target(self.tank, design.rootComponent)
+        second = self.cache.import_to_target(self.tank, design.rootComponent, copy=True)
+        self.assertIsNot(first.component, second.component)
+
+    def test_master_is_shared(self):
+        master = a_ut.open_template(self.tank, cache=self.cache)
+        self.assertIs(a_ut.open_template(self.tank, cache=self.cache), master)
+        # The same content under another name is the same template.
+        self.assertIs(self.cache.master(self.archive("copy.f3z", b"tank")), master)
+
+    def test_changed_archive_is_imported_again(self):
+        master = self.cache.master(self.tank)
+        with open(self.tank, "wb") as f:
+            f.write(b"a bigger tank")
+        self.assertIsNot(self.cache.master(self.tank), master)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_eviction_closes_least_recently_used(self):
+        masters = [self.cache.master(self.archive("{}.f3z".format(i), str(i).encode())) for i in range(3)]
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertFalse(masters[0].isValid)
+        self.assertTrue(masters[2].isValid)
+
+    def test_missing_archive(self):
+        with self.assertRaises(UserWarning):
+            self.cache.master(os.path.join(self.dir, "missing.f3z"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os, sys, json, tempfile
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import document_pool
+import planner
+import tracing
+
+
+@tracing.traced(category="test")
+def outer(n):
+    with tracing.span("inner", "test", n=n):
+        return n * 2
+
+
+class test_tracing(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.stop()
+
+    def test_off_records_nothing(self):
+        self.assertFalse(tracing.enabled())
+        self.assertIs(tracing.span("a"), tracing.span("b"))
+        self.assertEqual(outer(2), 4)
+
+    def test_nested_spans(self):
+        ticks = iter(range(100))
+        with tracing.tracing(clock=lambda: next(ticks)) as tracer:
+            outer(1)
+            outer(2)
+        stats = tracer.stats
+        self.assertEqual(stats["test_tracing.outer"].count, 2)
+        self.assertEqual(stats["test_tracing.outer"].total, 6)
+        self.assertEqual(stats["test_tracing.outer"].self_time, 4)
+        self.assertEqual(stats["inner"].total, 2)
+        events = tracer.chrome_trace()["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["test_tracing.outer", "inner"] * 2)
+        self.assertEqual(events[1]["args"], {"n": 1})
+        self.assertIn("test_tracing.outer", tracer.summary())
+
+    def test_errors_and_memory(self):
+        with tracing.tracing(memory=True) as tracer:
+            with self.assertRaises(KeyError):
+                with tracing.span("fails"):
+                    raise KeyError()
+            with tracing.span("allocates"):
+                kept = [0] * 100000
+        self.assertEqual(tracer.stats["fails"].errors, 1)
+        self.assertGreater(tracer.stats["allocates"].memory, 500000)
+        self.assertFalse(tracing.enabled())
+
+    def test_draw_is_traced(self):
+        backend = adsk_sim.install()
+        adsk_sim.make_tree(backend.root_folder, {"plant:folder": {"tank:fdoc": {"parameters": {"height": "1 m"}}}})
+        plan = planner.plan_json({"plant:folder": {"tank:fdoc": {"parameters": {"height": "2 m"}}}})
+        trace_path = os.path.join(tempfile.mkdtemp(), "draw.trace.json")
+        with tracing.tracing(trace_path) as tracer:
+            planner.execute(plan, backend.root_folder, document_pool.DocumentPool())
+        self.assertEqual(tracer.stats["Documents.open"].count, 1)
+        self.assertEqual(tracer.stats["parameters.ParameterBatch.apply"].count, 1)
+        self.assertEqual(tracer.stats["planner.execute"].count, 1)
+        with open(trace_path) as f:
+            trace = json.load(f)
+        self.assertEqual(len(trace["traceEvents"]), len(tracer.events))
+        self.assertTrue(all(e["ph"] == "X" for e in trace["traceEvents"]))
+        summary_path = tracer.save_summary(os.path.join(os.path.dirname(trace_path), "draw.summary.txt"))
+        with open(summary_path) as f:
+            self.assertIn("planner.execute", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os, sys, io, json
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+
+from json_transformations import transforms as tr
+
+
+class FusionObject:
+    pass
+
+
+def synced_tree(n_folders=3, n_fdocs=3):
+    return {"folder_{}".format(i): {
+        "data_folder": FusionObject(),
+        "folders": {"part_{}:fdoc".format(j): {"data_file": FusionObject(), "parameters": {"length": "1 in"}}
+                    for j in range(n_fdocs)},
+    } for i in range(n_folders)}
+
+
+class test_transforms(unittest.TestCase):
+
+    def test_transforms_are_fused(self):
+        d = {"a:fdoc": {"parameters": {"x": 1}, "data_file": FusionObject()}, "b:data_file": {}, "c": 2}
+        result = tr.apply(d, tr.strip_refs(), tr.strip_type("data_file"), tr.map_values(lambda k, v: v + 1))
+        self.assertEqual(result, {"a:fdoc": {"parameters": {"x": 2}}, "c": 3})
+
+    def test_unchanged_subtrees_are_shared(self):
+        d = {"synced": {"data_folder": FusionObject(), "x": 1}, "plain": {"y": {"z": 1}}}
+        result = tr.apply(d, tr.strip_refs())
+        self.assertEqual(result["synced"], {"x": 1})
+        self.assertIs(result["plain"], d["plain"])
+        self.assertIs(tr.apply(d["plain"], tr.strip_refs()), d["plain"])
+
+    def test_dump_matches_json_dumps(self):
+        d = synced_tree()
+        d["lists"] = {"holes": [1, {"a": [2, 3]}], "empty": {}}
+        expected = tr.apply(d, tr.strip_refs())
+        for indent in [None, 2]:
+            f = io.StringIO()
+            tr.dump(d, f, tr.strip_refs(), indent=indent)
+            self.assertEqual(f.getvalue(), json.dumps(expected, indent=indent))
+
+    def test_deep_tree(self):
+        d = leaf = {}
+        for i in range(3 * sys.getrecursionlimit()):
+            leaf["k"] = {"ref": FusionObject()}
+            leaf = leaf["k"]
+        text = "".join(tr.iter_json(d, tr.strip_refs()))
+        self.assertNotIn("ref", text)
+        result, depth = tr.apply(d, tr.strip_refs()), 0
+        while result:
+            result, depth = result["k"], depth + 1
+        self.assertEqual(depth, 3 * sys.getrecursionlimit())
+
+
+if __name__ == '__main__':
+    unittest.main()
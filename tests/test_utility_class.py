@@ -1,5 +1,5 @@
 import unittest
-import os, sys
+import os, sys, json, tempfile, shutil
 
 dir = os.path.dirname(__file__)
 filename = os.path.join(dir, '../')
@@ -16,8 +16,62 @@ class test_strip_dictionary(unittest.TestCase):
         stripped_dict = ut.strip_dictionary(test_dict_1, "test_type")
         self.assertEqual(stripped_dict, {})
 
+    def test_strip_dictionary_nested(self):
+        d = {"keep": {"test_type:apple": 1, "pear": {"a": 1}}, "other:x": {"b": 2}}
+        stripped_dict = ut.strip_dictionary(d, ["test_type", "other"])
+        self.assertEqual(stripped_dict, {"keep": {"pear": {"a": 1}}})
+        self.assertIs(stripped_dict["keep"]["pear"], d["keep"]["pear"])
+
+    def test_map_dictionary(self):
+        d = {"a": 1, "b": {"c": 2}}
+        self.assertEqual(ut.map_dictionary(lambda k, v: v * 10, d), {"a": 10, "b": {"c": 20}})
+        self.assertEqual(d, {"a": 1, "b": {"c": 2}})
+
+    def test_save_aide_json_strips_refs(self):
+        d = {"plant": {"data_folder": object(), "folders": {"tank:fdoc": {"data_file": object(),
+                                                                            "parameters": {"h": "1 m"}}}}}
+        tmp = tempfile.mkdtemp()
+        try:
+            path = ut.save_aide_json(d, os.path.join(tmp, "new", "plant.json"))
+            self.assertEqual(ut._load_json(path), {"plant": {"folders": {"tank:fdoc": {"parameters": {"h": "1 m"}}}}})
+        finally:
+            shutil.rmtree(tmp)
+
     def test_abs_path_with_dot_dot(self):
         self.assertEqual(ut.abs_path("../tests/hi.hi"), ut.abs_path("hi.hi"))
 
+class test_load_json(unittest.TestCase):
+
+    aide_dict = {
+        "cube:fdoc": {"parameters": {"height": "2 in", "holes": [1, 2, 35e3]}},
+        "plant:folder": {"tank:fdoc": {"parameters": {"name": "a \"quoted\" } name"}}},
+        "count": 12345,
+    }
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(self.aide_dict, f, indent=2)
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load_json(self):
+        self.assertEqual(ut._load_json(self.path), self.aide_dict)
+
+    def test_entries_are_streamed_in_order(self):
+        for chunk_size in [1, 3, 64, 1 << 16]:
+            entries = list(ut.iter_json_entries(self.path, chunk_size))
+            self.assertEqual([k for k, v in entries], list(self.aide_dict))
+            self.assertEqual(dict(entries), self.aide_dict)
+
+    def test_invalid_json_raises(self):
+        for text in ['[1, 2]', '{"a": 1,}', '{"a": 1']:
+            with open(self.path, "w") as f:
+                f.write(text)
+            with self.assertRaises(ValueError):
+                list(ut.iter_json_entries(self.path, 2))
+
+
 if __name__ == '__main__':
     unittest.main()
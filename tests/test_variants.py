@@ -0,0 +1,73 @@
+import unittest
+import os, sys
+
+dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(dir, '../'))
+sys.path.append(os.path.join(dir, '../fgens'))
+
+import adsk_sim
+adsk_sim.install()
+import parameters
+import save_queue
+import variants
+
+
+class test_variants(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = adsk_sim.install(adsk_sim.CloudLatency(server=0.3, compute=0.1, upload=1.0))
+        self.folder = self.backend.root_folder
+        self.template = adsk_sim.make_file(self.folder, "box", {"width": "1 in", "height": "1 in", "depth": "1 in"})
+        self.backend.reset_counters()
+
+    def saved(self, name):
+        data_file = [f for f in self.folder.dataFiles if f.name == name][0]
+        fdoc = self.backend.app.documents.open(data_file)
+        params = fdoc.design.userParameters
+        return {params.item(i).name: params.item(i).expression for i in range(params.count)}
+
+    def generate(self, sweep, **kwargs):
+        coordinator = save_queue.SaveCoordinator(poll_interval=0, clock=self.backend.now)
+        try:
+            return variants.generate(self.template, sweep, self.folder, coordinator=coordinator,
+                                     clock=self.backend.now, **kwargs)
+        finally:
+            coordinator.close()
+
+    def test_template_is_opened_once(self):
+        sweep = variants.sweep({"width": ["1 in", "2 in"], "height": ["1 in", "2 in", "3 in"]})
+        report = self.generate(sweep, name_format="box_{i}")
+        self.assertEqual(len(report), 6)
+        self.assertEqual(self.backend.calls["Documents.open"], 1)
+        self.assertEqual(self.backend.calls["Document.saveAs"], 6)
+        # Only the parameters that changed since the previous variant are written.
+        self.assertEqual(report.writes, 6)
+        self.assertEqual(self.saved("box_5"), {"width": "2 in", "height": "3 in", "depth": "1 in"})
+        self.assertEqual(report.save_report.failed, [])
+
+    def test_left_out_parameters_go_back_to_the_template(self):
+        self.generate([("a", {"width": "5 in"}), ("b", {"height": "5 in"})])
+        self.assertEqual(self.saved("b"), {"width": "1 in", "height": "5 in", "depth": "1 in"})
+
+    def test_faster_than_one_open_per_variant(self):
+        sweep = [{"width": "{} in".format(i)} for i in range(10)]
+        report = self.generate(sweep)
+        self.assertEqual(report.names[0], "box_0")
+
+        self.backend.reset_counters()
+        for i, params in enumerate(sweep):
+            fdoc = self.backend.app.documents.open(self.template)
+            parameters.update_fdoc(fdoc, params)
+            fdoc.saveAs("one_by_one_{}".format(i), self.folder, "", "")
+            fdoc.close(False)
+        one_by_one = 60.0 * len(sweep) / self.backend.now()
+        self.assertGreater(report.variants_per_minute, one_by_one)
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(UserWarning):
+            self.generate([("a", {"length": "5 in"})])
+        self.assertEqual(self.backend.calls["Document.saveAs"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+Spans around the hot paths of a draw, written as a Chrome trace.
+
+When a draw is slow, the trace shows where the time went: opening documents,
+looking up files and folders, running each fgen or saving. The draw code is
+instrumented with span and traced, which do nothing until tracing is started:
+
+    with tracing.tracing("draw.trace.json", memory=True) as tracer:
+        aide_draw.draw_incremental(folder_dict, manifest)
+    print(tracer.summary())
+
+Load the JSON in chrome://tracing or https://ui.perfetto.dev to see the spans
+nested on a timeline. The summary lists each span name with its count, total
+and self time, and with memory=True the memory allocated (tracemalloc) while
+it ran.
+
+While tracing is off, span returns a shared do-nothing context manager and a
+traced function costs one extra call and a global lookup.
+"""
+
+import os
+import json
+import time
+import functools
+import contextlib
+import threading
+import collections
+import tracemalloc
+
+_tracer = None
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start", "memory", "child_time")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.child_time = 0.0
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.memory = tracemalloc.get_traced_memory()[0] if self.tracer.memory else None
+        self.start = self.tracer.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = self.tracer.clock()
+        stack = self.tracer._stack()
+        stack.pop()
+        duration = end - self.start
+        if stack:
+            stack[-1].child_time += duration
+        memory = tracemalloc.get_traced_memory()[0] - self.memory if self.memory is not None else None
+        self.tracer._record(self, duration, memory, exc_type)
+        return False
+
+
+class SpanStats:
+    """The totals of every span with the same name.
+
+    Attributes
+    ----------
+    count : int
+    total : float
+        Seconds, including the spans inside.
+    self_time : float
+        Seconds, not counting the spans inside.
+    max : float
+        Seconds of the longest span.
+    memory : int
+        Bytes allocated and still held when the spans ended, when tracing memory.
+    errors : int
+        Spans that ended with an exception.
+    """
+
+    __slots__ = ("count", "total", "self_time", "max", "memory", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.self_time = 0.0
+        self.max = 0.0
+        self.memory = 0
+        self.errors = 0
+
+
+class Tracer:
+    """Records spans. Made by start.
+
+    Parameters
+    ----------
+    memory : bool
+        Record how much memory each span allocated, with tracemalloc.
+    clock : function
+        Returns the current time in seconds. Defaults to time.perf_counter.
+
+    Attributes
+    ----------
+    events : list of dict
+        The finished spans as Chrome trace events.
+    stats : {name: SpanStats}
+    """
+
+    def __init__(self, memory=False, clock=None):
+        self.memory = memory
+        self.clock = clock or time.perf_counter
+        self.events = []
+        self.stats = collections.OrderedDict()
+        self._origin = self.clock()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, category="", **args):
+        return _Span(self, name, category, args)
+
+    def _record(self, span, duration, memory, exc_type):
+        event = {"name": span.name, "cat": span.category, "ph": "X", "pid": os.getpid(),
+                 "tid": threading.get_ident(), "ts": (span.start - self._origin) * 1e6, "dur": duration * 1e6}
+        args = dict(span.args) if span.args else {}
+        if memory is not None:
+            args["memory_delta"] = memory
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = SpanStats()
+            stats.count += 1
+            stats.total += duration
+            stats.self_time += duration - span.child_time
+            stats.max = max(stats.max, duration)
+            stats.memory += memory or 0
+            stats.errors += exc_type is not None
+
+    def chrome_trace(self):
+        """The trace as a dict in the Chrome trace event format."""
+        return {"traceEvents": sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+    def save(self, file_path):
+        """Write the Chrome trace JSON to file_path and return file_path."""
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(file_path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return file_path
+
+    def save_summary(self, file_path):
+        """Write summary() to file_path, such as next to the trace, and return file_path."""
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(file_path, "w") as f:
+            f.write(self.summary() + "\n")
+        return file_path
+
+    def summary(self, sort="self_time"):
+        """A table of the span names, the slowest first."""
+        lines = ["{:<44} {:>7} {:>10} {:>10} {:>10} {:>10}".format("span", "count", "total ms", "self ms",
+                                                                   "max ms", "memory KB")]
+        rows = sorted(self.stats.items(), key=lambda item: -getattr(item[1], sort))
+        for name, s in rows:
+            lines.append("{:<44} {:>7} {:>10.1f} {:>10.1f} {:>10.1f} {:>10}".format(
+                name, s.count, s.total * 1e3, s.self_time * 1e3, s.max * 1e3,
+                "{:.1f}".format(s.memory / 1024) if self.memory else "-"))
+        return "\n".join(lines)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def current():
+    """The running Tracer, or None."""
+    return _tracer
+
+
+def start(memory=False, clock=None):
+    """Start tracing and return the Tracer. Tracing that was already running is replaced."""
+    global _tracer
+    tracer = Tracer(memory, clock)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        tracer._started_tracemalloc = True
+    _tracer = tracer
+    return tracer
+
+
+def stop():
+    """Stop tracing and return the Tracer that was running, or None."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and tracer._started_tracemalloc:
+        tracemalloc.stop()
+    return tracer
+
+
+@contextlib.contextmanager
+def tracing(file_path=None, memory=False, clock=None):
+    """Trace the block, saving the Chrome trace to file_path at the end if given. Yields the Tracer."""
+    tracer = start(memory, clock)
+    try:
+        yield tracer
+    finally:
+        stop()
+        if file_path:
+            tracer.save(file_path)
+
+
+def span(name, category="", **args):
+    """A context manager timing the block as a span, when tracing is on."""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _Span(tracer, name, category, args)
+
+
+def traced(name=None, category=""):
+    """Decorate a function so that every call is a span, when tracing is on.
+
+    The span is named after the function, as module.function, unless name is given.
+    """
+    def decorate(f):
+        span_name = name or "{}.{}".format(f.__module__, f.__qualname__)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return f(*args, **kwargs)
+            with _Span(tracer, span_name, category, None):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorate
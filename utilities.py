@@ -1,8 +1,9 @@
-import os, sys, inspect
-import importlib
-import pkgutil
+import os, sys
 import json
 from time import gmtime, strftime
+import json_keys as keys
+from aide_schema import parse_key
+from json_transformations import transforms
 
 def abs_path(file_path):
     """
@@ -12,7 +13,8 @@ def abs_path(file_path):
     Needed because the Fusion 360 environment doesn't resolve relative paths
     well.
     """
-    return os.path.join(os.path.dirname(inspect.getfile(sys._getframe(1))), file_path)
+    caller_file = sys._getframe(1).f_globals.get("__file__") or os.path.join(os.getcwd(), "_")
+    return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(caller_file)), file_path))
 
 def str_time():
     """
@@ -31,50 +33,162 @@ def save_aide_json(d:dict, file_path:str):
     """
     Saves the dict as a JSON for long-term storage. This deletes all currently
     refs and saves this to a JSON file at the file_path given. Will create the
-    file path if it doesn't exist. If it is relative, it is relative to This
-    __file__ path
+    file path if it doesn't exist. If it is relative, it is relative to the
+    caller's __file__ path. The dict itself is left untouched, and the JSON is
+    written as the dict is walked rather than from a stripped copy. Returns the
+    absolute file_path.
     """
+    if not os.path.isabs(file_path):
+        caller_file = sys._getframe(1).f_globals.get("__file__") or os.path.join(os.getcwd(), "_")
+        file_path = os.path.join(os.path.dirname(os.path.abspath(caller_file)), file_path)
+    file_path = os.path.normpath(file_path)
     #strip the dictionary of all refs:
-    return 0
-
-
-###################### FUNCTIONS TODO ####################################
+    return transforms.save(d, file_path, transforms.strip_refs())
 
 
 def strip_dictionary(d, t):
     """
-    TODO: return a new dictionary that is stripped of a certain type. make this
-    work with a list of types.
+    Returns a new dictionary without the keys that start with t, or with any of
+    t when it is a list, such as "t:name" keys. Subtrees without any such keys
+    are shared with d rather than copied.
     """
-    new_d = {}
-    for k,v in d.items():
-        if not k.split(":")[0] == t:
-            if isinstance(v,dict):
-                new_d[k] = strip_dictionary(d, t)
-            else:
-                new_d[k] = v
-    return new_d
+    ts = {t} if isinstance(t, str) else set(t)
+    return transforms.apply(d, transforms.strip_keys(lambda k: k.split(":")[0] in ts))
 
 
 def map_dictionary(f, d):
     """
-    TODO: Applies f(k, v) to all dictionary values and returns the resulting dictionary.
-    Works with nested dictionaries
+    Applies f(k, v) to all dictionary values and returns the resulting dictionary.
+    Works with nested dictionaries, where f is applied to the innermost values.
     """
-    for k, v in d.items():
-        if isinstance(v, dict):
-            map_dictionary(f, d)
-        else:
-            todo = 0
+    return transforms.apply(d, transforms.map_values(f))
+
 
 def _load_json(file_path):
     """
     This should safely load jsons, ensuring jsons conform to AIDE standards and throw an error otherwise.
-    simplest implementation possible right now:
-    """
-    try:
-        d = json.load(open(file_path))
-    except:
-        raise
-    else:
-        return json.load(open(file_path))
+    simplest implementation possible right now: the file is parsed once and closed again.
+    """
+    with open(file_path) as f:
+        return json.load(f)
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_entries(file_path, chunk_size=1 << 16):
+    """
+    Yields the (key, value) pairs of the top level object of a JSON file as
+    soon as each value has been read, such as the "name:fdoc" and
+    "name:folder" entries of an AIDE JSON. Only the entry being parsed is kept
+    in memory, so memory stays proportional to the largest entry rather than
+    the whole file.
+
+    Raises
+    ------
+    ValueError
+        Raised when the file isn't a JSON object.
+    """
+    with open(file_path) as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.decode()
+            if not isinstance(key, str):
+                reader.fail("Expected a string key")
+            reader.expect(":")
+            yield key, reader.decode()
+            if reader.expect(",}") == "}":
+                return
+
+
+class _ChunkReader:
+    """Reads a file in chunks and decodes one JSON value at a time from it."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.consumed = 0
+        self.eof = False
+
+    def _read(self, size):
+        """Read at least size more characters, unless the file ends. Returns False at the end of the file."""
+        if self.eof:
+            return False
+        # Drop what was already parsed.
+        self.consumed += self.pos
+        parts = [self.buffer[self.pos:]]
+        read = 0
+        while read < size:
+            chunk = self.f.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                break
+            parts.append(chunk)
+            read += len(chunk)
+        self.buffer = "".join(parts)
+        self.pos = 0
+        return read > 0
+
+    def peek(self):
+        """Skip whitespace and return the next character, or "" at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read(self.chunk_size):
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters):
+        c = self.peek()
+        if not c or c not in characters:
+            self.fail("Expected one of {!r}".format(characters))
+        self.pos += 1
+        return c
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                end = None
+            # A value that ends with the buffer, such as a number, might continue in the next chunk.
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            # Read as much again as is buffered, so that long values are re-parsed a bounded number of times.
+            if not self._read(max(self.chunk_size, len(self.buffer))):
+                if end is not None:
+                    self.pos = end
+                    return value
+                self.fail("Invalid JSON value")
+
+    def fail(self, message):
+        raise ValueError("{} at character {} of {}".format(message, self.consumed + self.pos, self.f.name))
+
+
+def iter_fdocs(folder_dict, path=()):
+    """
+    Yields (fdoc_path, fdoc_dict) for every top level fdoc in an AIDE-compliant
+    folder_dict, where fdoc_path is a tuple of the folder names and the fdoc
+    name. Folders are walked depth first. Both "name:folder" keys and the
+    layout made by generate_json.sync_dict (folders holding their contents
+    under "folders") are understood.
+    """
+    for k, v in folder_dict.items():
+        if not isinstance(v, dict):
+            continue
+        name, key_type = parse_key(k)
+        if key_type == keys.FDOC_TYPE:
+            yield path + (name,), v
+        elif key_type == keys.FOLDER_TYPE:
+            for item in iter_fdocs(v, path + (name,)):
+                yield item
+        elif not key_type and "folders" in v:
+            for item in iter_fdocs(v["folders"], path + (name,)):
+                yield item
@@ -0,0 +1,196 @@
+"""
+Generate many parametrized documents from one template with a single open.
+
+A design sweep makes dozens to hundreds of variants of the same template that
+differ only in their parameters. Opening (or importing) the template, updating
+its parameters and saving it for every variant pays for the open every time.
+Here the template is opened once and kept open: each variant writes only the
+parameters that differ from the variant before it, in one
+parameters.ParameterBatch, and is saved to its own name and folder through a
+save_queue.SaveCoordinator, so the uploads overlap with the next variant.
+
+    report = variants.generate(data_file, variants.sweep({"width": ["1 in", "2 in"], "height": ["1 in", "3 in"]}),
+                               folder, name_format="box_{width}_{height}")
+    print(report)
+
+Each variant is either a dict of {parameter name: expression}, named with
+name_format, or a (name, parameters) or (name, parameters, folder) tuple. A
+parameter set by an earlier variant but left out of a later one goes back to
+its expression in the template, so every variant is the template plus its
+own parameters, whatever came before it.
+"""
+
+import time
+import itertools
+import collections
+
+import adsk.core
+import adsk_utilities as a_ut
+import parameters
+import save_queue
+
+DEFAULT_NAME_FORMAT = "{template}_{i}"
+
+
+class VariantReport:
+    """Returned by generate.
+
+    Attributes
+    ----------
+    names : list of str
+        The names the variants were saved as, in order.
+    parameter_reports : list of parameters.ParameterReport
+        What writing the parameters of each variant did.
+    save_report : save_queue.SaveReport
+        The saves, once they all finished.
+    seconds : float
+        From opening the template until the last upload finished.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.parameter_reports = []
+        self.save_report = None
+        self.seconds = 0.0
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def variants_per_minute(self):
+        if not self.seconds:
+            return float("inf") if self.names else 0.0
+        return 60.0 * len(self.names) / self.seconds
+
+    @property
+    def writes(self):
+        return sum(len(r.changed) for r in self.parameter_reports)
+
+    @property
+    def writes_avoided(self):
+        return sum(r.writes_avoided for r in self.parameter_reports)
+
+    @property
+    def failed(self):
+        return self.save_report.failed if self.save_report else []
+
+    def __str__(self):
+        return "{} variants in {:.2f} s ({:.1f} per minute), {} parameter writes, {} avoided, {} failed saves".format(
+            len(self.names), self.seconds, self.variants_per_minute, self.writes, self.writes_avoided,
+            len(self.failed))
+
+
+def sweep(ranges):
+    """Yield every combination of the expressions in ranges, {parameter name: list of expressions}.
+
+    The last parameter changes fastest, so consecutive variants mostly differ
+    in a single parameter.
+    """
+    names = list(ranges)
+    for expressions in itertools.product(*(ranges[name] for name in names)):
+        yield collections.OrderedDict(zip(names, expressions))
+
+
+def open_template(template):
+    """Open template once, for generate.
+
+    Parameters
+    ----------
+    template : dataFile or str
+        A dataFile, which is opened, or the path of an .f3d archive, which is
+        imported as in adsk_utilities.open_template.
+
+    Returns
+    -------
+    fdoc : FusionDocument
+    """
+    if isinstance(template, str):
+        return a_ut.open_template(template)
+    return adsk.core.Application.get().documents.open(template, False)
+
+
+def _template_name(template):
+    if isinstance(template, str):
+        return template.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return template.name
+
+
+def _unpack(variant, i, folder, name_format, template_name):
+    """Return (name, parameters, folder) of a variant as given to generate."""
+    if isinstance(variant, dict):
+        return name_format.format(i=i, template=template_name, **variant), variant, folder
+    if len(variant) == 2:
+        return variant[0], variant[1], folder
+    name, params, variant_folder = variant
+    return name, params, variant_folder or folder
+
+
+def generate(template, variants, folder=None, name_format=DEFAULT_NAME_FORMAT, coordinator=None, close=True,
+             clock=None):
+    """Save a document for every variant of template, opening the template once.
+
+    Parameters
+    ----------
+    template : dataFile, str or FusionDocument
+        The template to open, see open_template, or a document that is already
+        open. An open document is left open.
+    variants : iterable
+        Parameter dicts, or (name, parameters) or (name, parameters, folder)
+        tuples. A generator is read one variant at a time.
+    folder : dataFolder, optional
+        Where the variants without a folder of their own are saved.
+    name_format : str
+        Names the variants given as plain dicts. It is formatted with i, the
+        index of the variant, template, the name of the template, and the
+        parameters of the variant.
+    coordinator : save_queue.SaveCoordinator, optional
+        Used for the saves. One is made, and closed at the end, when not given.
+    close : bool
+        Close the document the template was opened as when done.
+    clock : function
+        Returns the current time in seconds. Defaults to time.perf_counter.
+
+    Returns
+    -------
+    report : VariantReport
+
+    Raises
+    ------
+    UserWarning
+        Raised, before anything is saved for it, when a variant sets a
+        parameter that the template doesn't have.
+    """
+    clock = clock or time.perf_counter
+    report = VariantReport()
+    start = clock()
+
+    opened = not hasattr(template, "design")
+    fdoc = open_template(template) if opened else template
+    template_name = _template_name(template) if opened else fdoc.name
+    own_coordinator = coordinator is None
+    if own_coordinator:
+        coordinator = save_queue.SaveCoordinator(clock=clock)
+
+    try:
+        batch = parameters.ParameterBatch(fdoc)
+        template_expressions = {name: param.expression for name, param in batch.params.items()}
+        # The parameters set by earlier variants, which are reset when a variant leaves them out.
+        touched = set()
+        for i, variant in enumerate(variants):
+            name, params, variant_folder = _unpack(variant, i, folder, name_format, template_name)
+            if variant_folder is None:
+                raise ValueError("The variant {} has no folder to be saved in".format(name))
+            desired = collections.OrderedDict((p, template_expressions[p]) for p in sorted(touched) if p not in params)
+            desired.update(params)
+            report.parameter_reports.append(batch.apply(desired))
+            touched.update(p for p in params if p in template_expressions)
+            a_ut.save_fdoc_online(fdoc, variant_folder, name, coordinator)
+            report.names.append(name)
+        report.save_report = coordinator.barrier()
+    finally:
+        if own_coordinator:
+            coordinator.close()
+        if opened and close:
+            fdoc.close(False)
+    report.seconds = clock() - start
+    return report